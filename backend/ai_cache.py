@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Result cache for AI analyses
+Two tiers: an in-process LRU and a shared MongoDB collection with a TTL index
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+def make_cache_key(*parts):
+    """Build a content-addressed key (SHA-256) from the given parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU tier"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MongoCacheTier:
+    """Shared tier backed by a MongoDB collection; expired documents are removed by a TTL index"""
+
+    def __init__(self, collection, ttl_seconds=86400):
+        self.collection = collection
+        self.ttl_seconds = int(ttl_seconds)
+        try:
+            self.collection.create_index('expires_at', expireAfterSeconds=0)
+        except Exception as e:
+            print(f'WARNING: Could not create TTL index on {collection.name}: {e}')
+
+    def get(self, key):
+        try:
+            doc = self.collection.find_one(
+                {'_id': key, 'expires_at': {'$gt': datetime.utcnow()}},
+                {'value': 1}
+            )
+        except Exception as e:
+            print(f'WARNING: Cache lookup failed on {self.collection.name}: {e}')
+            return None
+        return doc['value'] if doc else None
+
+    def set(self, key, value):
+        now = datetime.utcnow()
+        try:
+            self.collection.replace_one(
+                {'_id': key},
+                {
+                    'value': value,
+                    'created_at': now,
+                    'expires_at': now + timedelta(seconds=self.ttl_seconds)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            print(f'WARNING: Cache write failed on {self.collection.name}: {e}')
+
+
+class ResultCache:
+    """LRU tier in front of an optional MongoDB tier, with hit/miss/eviction counters"""
+
+    def __init__(self, name, max_entries=512, collection=None, ttl_seconds=86400):
+        self.name = name
+        self.memory = LRUCache(max_entries)
+        self.shared = MongoCacheTier(collection, ttl_seconds) if collection is not None else None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, key, saved_bytes=0):
+        """
+        Return a copy of the cached value, or None on a miss.
+        saved_bytes: size of the input a hit saves from reprocessing (reported in stats)
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+                self.bytes_saved += saved_bytes
+            return copy.deepcopy(value)
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                    self.bytes_saved += saved_bytes
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def stats(self):
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            'name': self.name,
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.memory.evictions,
+            'entries': len(self.memory),
+            'max_entries': self.memory.max_entries,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved
+        }
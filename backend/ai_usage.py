@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gemini token accounting and per-user daily budgets
+Every response's usage metadata is added to one MongoDB document per
+(user, day, route, model); per-route token histograms are kept in process
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from prompt_budget import CHARS_PER_TOKEN, estimate_tokens
+
+# Upper bounds of the per-call token histogram buckets (the last bucket is open-ended)
+TOKEN_HISTOGRAM_BOUNDS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+UNSCOPED_ROUTE = 'background'
+
+Usage = namedtuple('Usage', ['prompt_tokens', 'response_tokens', 'total_tokens', 'estimated'])
+# resets_at: next UTC midnight, when the day's usage starts from zero
+BudgetStatus = namedtuple('BudgetStatus', ['allowed', 'used', 'budget', 'resets_at'])
+
+_usage_scope = ContextVar('ai_usage_scope', default=None)
+
+
+@contextmanager
+def usage_scope(user_id, route):
+    """Attribute Gemini calls made inside the block to user_id and route (used outside requests)"""
+    token = _usage_scope.set((str(user_id) if user_id else None, route))
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def current_usage_scope():
+    return _usage_scope.get()
+
+
+def usage_day(now=None):
+    return (now or datetime.utcnow()).strftime('%Y-%m-%d')
+
+
+def next_reset(now=None):
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day) + timedelta(days=1)
+
+
+def _count(metadata, name):
+    value = getattr(metadata, name, None)
+    if value is None and isinstance(metadata, dict):
+        value = metadata.get(name)
+    return int(value or 0)
+
+
+def usage_from_metadata(metadata, prompt, response_chars):
+    """Token counts from a response's usage_metadata, estimated from text lengths when missing"""
+    prompt_tokens = _count(metadata, 'prompt_token_count')
+    response_tokens = _count(metadata, 'candidates_token_count')
+    if metadata is not None and prompt_tokens:
+        total = _count(metadata, 'total_token_count') or prompt_tokens + response_tokens
+        return Usage(prompt_tokens, response_tokens, total, False)
+    prompt_tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+    response_tokens = math.ceil(response_chars / CHARS_PER_TOKEN)
+    return Usage(prompt_tokens, response_tokens, prompt_tokens + response_tokens, True)
+
+
+def _response_text(response):
+    try:
+        return response.text or ''
+    except Exception:  # Blocked or empty candidates raise instead of returning ''
+        return ''
+
+
+class TokenHistogram:
+    """Fixed-bucket histogram of tokens per call"""
+
+    def __init__(self, bounds=TOKEN_HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': round(self.total / self.count, 1) if self.count else 0.0,
+            'max': self.max,
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+
+class UsageTracker:
+    """Record Gemini token usage per (user, day, route, model) and enforce daily budgets"""
+
+    def __init__(self, collection, daily_token_budget=0, scope_resolver=None):
+        self.collection = collection
+        self.daily_token_budget = int(daily_token_budget)
+        self.scope_resolver = scope_resolver
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._stats = {'calls': 0, 'estimated_calls': 0, 'record_errors': 0, 'budget_rejections': 0}
+
+    def ensure_indexes(self):
+        self.collection.create_index(
+            [('user_id', ASCENDING), ('day', ASCENDING), ('route', ASCENDING), ('model', ASCENDING)],
+            unique=True
+        )
+
+    def resolve_scope(self):
+        """(user_id, route) of the current call: an explicit usage_scope wins over the resolver"""
+        scope = current_usage_scope()
+        if scope is None and self.scope_resolver is not None:
+            scope = self.scope_resolver()
+        user_id, route = scope or (None, None)
+        return user_id, route or UNSCOPED_ROUTE
+
+    def record(self, user_id, route, model, usage):
+        """Add one call's usage to the day's aggregate and the route histograms"""
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['estimated_calls'] += int(usage.estimated)
+            histograms = self._histograms.get(route)
+            if histograms is None:
+                histograms = self._histograms[route] = (TokenHistogram(), TokenHistogram())
+            histograms[0].add(usage.prompt_tokens)
+            histograms[1].add(usage.response_tokens)
+
+        try:
+            self.collection.update_one(
+                {
+                    'user_id': ObjectId(user_id) if user_id else None,
+                    'day': usage_day(),
+                    'route': route,
+                    'model': model
+                },
+                {
+                    '$inc': {
+                        'calls': 1,
+                        'estimated_calls': int(usage.estimated),
+                        'prompt_tokens': usage.prompt_tokens,
+                        'response_tokens': usage.response_tokens,
+                        'total_tokens': usage.total_tokens
+                    },
+                    '$set': {'updated_at': datetime.utcnow()}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            with self._lock:
+                self._stats['record_errors'] += 1
+            print(f'WARNING: Could not record AI usage: {e}')
+
+    def track(self, prompt, response, model, stream=False):
+        """
+        Record usage of a generate_content() response and return it.
+        Streaming responses are wrapped so usage is recorded once the last chunk is read.
+        """
+        user_id, route = self.resolve_scope()
+        if not stream:
+            usage = usage_from_metadata(getattr(response, 'usage_metadata', None), prompt, len(_response_text(response)))
+            self.record(user_id, route, model, usage)
+            return response
+        return self._track_stream(prompt, response, model, user_id, route)
+
+    def _track_stream(self, prompt, chunks, model, user_id, route):
+        metadata = None
+        response_chars = 0
+        try:
+            for chunk in chunks:
+                # Counts are cumulative; the final chunk carries the complete usage
+                metadata = getattr(chunk, 'usage_metadata', None) or metadata
+                response_chars += len(_response_text(chunk))
+                yield chunk
+        finally:
+            self.record(user_id, route, model, usage_from_metadata(metadata, prompt, response_chars))
+
+    def tokens_used(self, user_id, day=None):
+        """Total tokens a user has consumed on a UTC day (today by default)"""
+        rows = self.collection.aggregate([
+            {'$match': {'user_id': ObjectId(user_id), 'day': day or usage_day()}},
+            {'$group': {'_id': None, 'total': {'$sum': '$total_tokens'}}}
+        ])
+        return next((row['total'] for row in rows), 0)
+
+    def usage_by_route(self, user_id, day=None):
+        """{route: {calls, prompt_tokens, response_tokens, total_tokens}} for a user's day"""
+        by_route = {}
+        for doc in self.collection.find({'user_id': ObjectId(user_id), 'day': day or usage_day()}):
+            totals = by_route.setdefault(doc['route'], {
+                'calls': 0, 'prompt_tokens': 0, 'response_tokens': 0, 'total_tokens': 0
+            })
+            for field in totals:
+                totals[field] += doc.get(field, 0)
+        return by_route
+
+    def check_budget(self, user_id, budget=None):
+        """BudgetStatus for today; a budget of 0 means unlimited"""
+        budget = self.daily_token_budget if budget is None else int(budget)
+        if not user_id or budget <= 0:
+            return BudgetStatus(True, None, budget, None)
+        try:
+            used = self.tokens_used(user_id)
+        except Exception as e:
+            print(f'WARNING: Could not read AI usage, allowing request: {e}')
+            return BudgetStatus(True, None, budget, None)
+        return BudgetStatus(used < budget, used, budget, next_reset())
+
+    def record_rejection(self):
+        """Count a call that was refused (or downgraded to local scoring) by the budget"""
+        with self._lock:
+            self._stats['budget_rejections'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            routes = {
+                route: {'prompt_tokens': prompt.to_dict(), 'response_tokens': response.to_dict()}
+                for route, (prompt, response) in sorted(self._histograms.items())
+            }
+        stats['daily_token_budget'] = self.daily_token_budget
+        stats['routes'] = routes
+        return stats
@@ -5,12 +5,10 @@ Python Flask Backend for Resume Analyzer
 Migrated from Node.js/Express to Python/Flask with MongoDB integration
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
-from PyPDF2 import PdfReader
 import google.generativeai as genai
 import os
-import io
 import re
 import json
 import time
@@ -19,26 +17,114 @@ import jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 import uuid
+import zipfile
 from functools import wraps
+from ai_cache import ResultCache, make_cache_key
+from single_flight import SingleFlight
+from job_queue import JobQueue, COMPLETED, DEAD_LETTER
+from json_stream import StreamingJSONExtractor, extract_first_json_object
+from gemini_client import GeminiModelRegistry
+from resilience import ProviderUnavailableError, ResilientCaller
+from hedging import Hedger
+from deadlines import LATENCY_BUDGET_HEADER, REASON_PROVIDER_ERROR, DeadlineRunner, degraded_reason, parse_latency_budget
+from ats_scoring import score_resume as score_resume_locally
+from skill_matcher import get_skill_matcher, skill_key
+from batch_ranking import collect_uploaded_resumes, rank_resumes
+from multi_jd import evaluate_job_descriptions, parse_job_descriptions
+from batch_prompts import BatchItem, PackedScorer
+from pdf_extraction import PDFExtractionError, get_pdf_extraction_pool
+from uploads import MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, SpooledUploadRequest, open_pdf_upload
+from text_normalizer import normalize_resume_text
+from prompt_budget import PromptCompressor
+from ai_usage import UsageTracker, next_reset
+from db_indexes import DATABASE_NAME, ensure_indexes
+from resume_search import RESUME_SEARCH_MAX_CANDIDATES, query_terms, rank, search_fields, search_filter
+from resume_documents import (
+    LIST_PROJECTION, build_preview, content_string, fill_missing_previews, list_item,
+    parse_content, resume_analysis_text, resume_structured_data, storage_fields
+)
+from pagination import (
+    KEYSET_SORT, CountCache, decode_cursor, encode_keyset_cursor, encode_offset_cursor, keyset_filter, page_size
+)
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+app.request_class = SpooledUploadRequest  # Large uploads are spooled to disk, not held in memory
 CORS(app, origins=['http://localhost:3000'])  # Allow React frontend
 
 # Get API key, JWT secret, and MongoDB URI from environment
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY') or os.getenv('REACT_APP_GEMINI_API_KEY')
 JWT_SECRET = os.getenv('JWT_SECRET') or 'your-secret-key'  # Should be in .env file
 MONGODB_URI = os.getenv('MONGODB_URI')
+MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() in ('1', 'true', 'yes')
+
+# Gemini model settings
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+GEMINI_GENERATION_CONFIG = json.loads(os.getenv('GEMINI_GENERATION_CONFIG') or '{}')
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT') or None  # grpc (default) or rest
+GEMINI_WARMUP = os.getenv('GEMINI_WARMUP', 'false').lower() in ('1', 'true', 'yes')
+
+# Prompt versions (part of every AI cache key)
+ATS_PROMPT_VERSION = 'ats-v1'
+IMPROVEMENT_PROMPT_VERSION = 'improve-v2'
+IMPROVEMENT_GENERATION_CONFIG = {'temperature': 0.3}
+
+# Prompt token budgets as (resume, job description); inputs are compressed by section to fit
+IMPROVEMENT_PROMPT_BUDGET = (
+    int(os.getenv('IMPROVEMENT_PROMPT_RESUME_TOKENS', 1000)),
+    int(os.getenv('IMPROVEMENT_PROMPT_JD_TOKENS', 750))
+)
+COMBINED_PROMPT_BUDGET = (750, 500)
+
+# AI result cache settings
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 512))
+AI_CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+AI_MAX_IN_FLIGHT = int(os.getenv('AI_MAX_IN_FLIGHT', 256))
+
+# Extracted resume text, keyed by the SHA-256 of the uploaded PDF
+# Bump RESUME_TEXT_VERSION whenever extraction or clean_resume_text output changes
+RESUME_TEXT_VERSION = 'text-v3'
+RESUME_TEXT_CACHE_MAX_ENTRIES = int(os.getenv('RESUME_TEXT_CACHE_MAX_ENTRIES', 256))
+RESUME_TEXT_CACHE_TTL_SECONDS = int(os.getenv('RESUME_TEXT_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+
+# /api/ats/evaluate scores locally first, then layers Gemini on top unless disabled here or per request
+ATS_AI_ENRICHMENT = os.getenv('ATS_AI_ENRICHMENT', 'true').lower() in ('1', 'true', 'yes')
+
+# Background job settings
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+
+# Daily Gemini token budget per user, 0 for unlimited (a user document's
+# ai_daily_token_budget field overrides it)
+AI_DAILY_TOKEN_BUDGET = int(os.getenv('AI_DAILY_TOKEN_BUDGET', 200000))
+
+# Recruiter batch ranking: Gemini deep-dives are limited to the best few candidates
+BATCH_MAX_DEEP_DIVE = int(os.getenv('BATCH_MAX_DEEP_DIVE', 5))
 
 if not GEMINI_API_KEY:
     print('ERROR: GEMINI_API_KEY missing in .env')
 else:
     print(f'SUCCESS: GEMINI_API_KEY loaded: {GEMINI_API_KEY[:10]}...')
-    genai.configure(api_key=GEMINI_API_KEY)
+    genai.configure(api_key=GEMINI_API_KEY, transport=GEMINI_TRANSPORT)
+
+# Every Gemini call goes through retries with jittered backoff, an adaptive concurrency limit and a circuit breaker
+gemini_resilience = ResilientCaller('Gemini')
+# Optional (GEMINI_HEDGING): a slow non-stream call gets a second identical call, first answer wins
+gemini_hedger = Hedger()
+# AI routes wait at most their latency budget, then answer from local scoring marked degraded
+ai_deadlines = DeadlineRunner()
+
+# Gemini model handles are created once per worker and reused by every call site
+gemini_models = GeminiModelRegistry(
+    GEMINI_MODEL, generation_config=GEMINI_GENERATION_CONFIG, resilience=gemini_resilience, hedger=gemini_hedger
+)
+if GEMINI_API_KEY and GEMINI_WARMUP:
+    gemini_models.warm_up_in_background()
 
 if not MONGODB_URI:
     print('ERROR: MONGODB_URI missing in .env')
@@ -49,7 +135,7 @@ else:
 # MongoDB setup
 try:
     client = MongoClient(MONGODB_URI)
-    db = client['resume_analyzer']
+    db = client[DATABASE_NAME]
     
     # Collections
     users_collection = db['users']
@@ -63,6 +149,85 @@ except Exception as e:
     print(f'ERROR: Failed to connect to MongoDB: {e}')
     exit(1)
 
+# Indexes for the API's queries (also available as `python db_indexes.py`)
+if MONGO_ENSURE_INDEXES:
+    try:
+        ensure_indexes(db)
+    except Exception as e:
+        print(f'WARNING: Could not create MongoDB indexes: {e}')
+
+# Cache of Gemini ATS analyses keyed on (model, prompt version, resume, JD)
+ats_result_cache = ResultCache(
+    'ats_analysis',
+    max_entries=AI_CACHE_MAX_ENTRIES,
+    collection=db['ai_result_cache'],
+    ttl_seconds=AI_CACHE_TTL_SECONDS
+)
+
+# Cleaned text of uploaded PDFs; the same file is extracted once across all JDs
+resume_text_cache = ResultCache(
+    'resume_text',
+    max_entries=RESUME_TEXT_CACHE_MAX_ENTRIES,
+    collection=db['resume_text_cache'],
+    ttl_seconds=RESUME_TEXT_CACHE_TTL_SECONDS
+)
+
+# Coalesce identical in-flight Gemini requests (double submits, client retries)
+ats_flight = SingleFlight('ats_analysis', max_in_flight=AI_MAX_IN_FLIGHT)
+improvement_flight = SingleFlight('improvement_analysis', max_in_flight=AI_MAX_IN_FLIGHT)
+
+# PDF parsing runs in sandboxed worker processes, never on the request thread
+pdf_extraction_pool = get_pdf_extraction_pool()
+
+# Section-aware trimming of prompt inputs (replaces blind character truncation)
+prompt_compressor = PromptCompressor()
+
+# Active resumes per user for list totals; invalidated by this worker's writes, expires for the others'
+resume_counts = CountCache()
+
+# Durable queue for AI work drained by run_job_worker.py
+job_queue = JobQueue(db['ai_jobs'], lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS)
+try:
+    job_queue.ensure_indexes()
+except Exception as e:
+    print(f'WARNING: Could not create job queue indexes: {e}')
+
+def request_usage_scope():
+    """Attribute Gemini calls made while handling a request to its user and endpoint"""
+    if not has_request_context():
+        return None
+    return getattr(request, 'user_id', None), request.endpoint
+
+# Gemini token usage aggregated per (user, day, route, model)
+ai_usage = UsageTracker(db['ai_usage'], daily_token_budget=AI_DAILY_TOKEN_BUDGET, scope_resolver=request_usage_scope)
+try:
+    ai_usage.ensure_indexes()
+except Exception as e:
+    print(f'WARNING: Could not create AI usage indexes: {e}')
+gemini_models.usage_tracker = ai_usage
+
+# Upload limits: MAX_CONTENT_LENGTH is the hard cap, single-resume routes get a smaller one
+app.config['MAX_CONTENT_LENGTH'] = max(MAX_UPLOAD_BYTES, MAX_BATCH_UPLOAD_BYTES)
+
+def upload_limit_for(endpoint):
+    return MAX_BATCH_UPLOAD_BYTES if endpoint == 'batch_rank_resumes' else MAX_UPLOAD_BYTES
+
+@app.before_request
+def reject_oversized_uploads():
+    limit = upload_limit_for(request.endpoint)
+    if request.content_length is not None and request.content_length > limit:
+        return upload_too_large_response(limit)
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return upload_too_large_response(upload_limit_for(request.endpoint))
+
+def upload_too_large_response(limit):
+    return jsonify({
+        'message': f'Upload too large (max {limit // (1024 * 1024)} MB)',
+        'maxBytes': limit
+    }), 413
+
 # Auth middleware
 def auth_required(f):
     @wraps(f)
@@ -91,6 +256,74 @@ def auth_required(f):
     
     return decorated
 
+def ai_budget_status(user_id):
+    """Today's token usage against the user's budget (the user document can override the default)"""
+    budget = None
+    try:
+        user = users_collection.find_one({'_id': ObjectId(user_id)}, {'ai_daily_token_budget': 1})
+        budget = (user or {}).get('ai_daily_token_budget')
+    except Exception as e:
+        print(f'WARNING: Could not load AI budget for user {user_id}: {e}')
+    return ai_usage.check_budget(user_id, budget)
+
+def ai_budget_exceeded_response(status):
+    response = jsonify({
+        'message': 'Daily AI token budget exceeded. Please try again after the reset time.',
+        'tokensUsed': status.used,
+        'dailyTokenBudget': status.budget,
+        'resetsAt': status.resets_at.isoformat() + 'Z'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int((status.resets_at - datetime.utcnow()).total_seconds())))
+    return response
+
+def ai_budget_required(f):
+    """Reject AI routes with 429 once the user has spent today's token budget (use after auth_required)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        status = ai_budget_status(request.user_id)
+        if not status.allowed:
+            print(f'WARNING: AI token budget exceeded for user {request.user_id} ({status.used}/{status.budget})')
+            ai_usage.record_rejection()
+            return ai_budget_exceeded_response(status)
+        return f(*args, **kwargs)
+    
+    return decorated
+
+def optional_user_id():
+    """User id from a valid Bearer token, or None (for routes where auth is optional)"""
+    try:
+        token = request.headers.get('Authorization', '').split(' ')[1]
+        return jwt.decode(token, JWT_SECRET, algorithms=['HS256'])['user_id']
+    except (IndexError, KeyError, jwt.InvalidTokenError):
+        return None
+
+def request_deadline(data=None):
+    """Deadline from latencyBudgetMs (JSON body or form) or the X-Latency-Budget-Ms header; ValueError if invalid"""
+    value = request.headers.get(LATENCY_BUDGET_HEADER)
+    if data is not None and data.get('latencyBudgetMs') not in (None, ''):
+        value = data.get('latencyBudgetMs')
+    return ai_deadlines.deadline(parse_latency_budget(value))
+
+def call_ai(deadline, fn, *args):
+    """fn(*args) within the request's latency budget; without an API key there is nothing to call"""
+    if not GEMINI_API_KEY:
+        raise ProviderUnavailableError('GEMINI_API_KEY is not configured')
+    return deadline.run(fn, *args)
+
+def degrade(error, default_reason=None):
+    """
+    Response fields marking a locally computed answer that stands in for a failed AI call,
+    or None when the error shouldn't be hidden (bad request, unparseable answer, ...)
+    """
+    reason = degraded_reason(error) or default_reason
+    if reason is None:
+        return None
+    endpoint = request.endpoint if has_request_context() else None
+    print(f'WARNING: AI unavailable for {endpoint} ({reason}: {error}), answering from local scoring')
+    ai_deadlines.record_degraded(endpoint, reason)
+    return {'degraded': True, 'degradedReason': reason}
+
 # Utility functions
 def hash_password(password):
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -105,27 +338,33 @@ def generate_jwt(user_id):
     }
     return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
 
-# PDF text extractor
-def pdf_to_text(pdf_file):
-    try:
-        pdf_bytes = io.BytesIO(pdf_file.read())
-        reader = PdfReader(pdf_bytes)
-        text = "".join(page.extract_text() or "" for page in reader.pages)
-        return text
-    except Exception as e:
-        print(f"PDF extraction error: {str(e)}")
-        return ""
-
-# Clean resume text
-def clean_resume_text(content):
-    if not isinstance(content, str):
-        content = str(content)
-    
-    content = re.sub(r'[^\w\s\.,;:()\-@]', ' ', content)
-    content = re.sub(r'\s+', ' ', content)
-    content = re.sub(r'\n\s*\n', '\n', content)
+# PDF text extractor (sandboxed worker pool); raises PDFExtractionError
+def pdf_to_text(pdf_source):
+    extraction = pdf_extraction_pool.extract(pdf_source)
+    slowest = max(extraction.page_seconds, default=0)
+    print(f"SUCCESS: Extracted {extraction.pages_extracted}/{extraction.page_count} pages in {extraction.seconds:.2f} seconds (slowest page {slowest:.2f}s)")
+    if extraction.truncated:
+        print(f"WARNING: PDF truncated to the first {extraction.pages_extracted} pages")
+    return extraction.text
+
+# Extract and clean an uploaded resume (a PDFUpload); re-uploads of the same file skip both steps
+def resume_text_from_pdf(upload):
+    cache_key = make_cache_key(RESUME_TEXT_VERSION, pdf_extraction_pool.max_pages, upload.sha256)
+    cached_text = resume_text_cache.get(cache_key, saved_bytes=upload.size)
+    if cached_text is not None:
+        print('SUCCESS: Resume text served from cache')
+        return cached_text
     
-    return content.strip()
+    # Lines kept: prompt compression finds section headings at line starts
+    cleaned_text = clean_resume_text(pdf_to_text(upload.source), preserve_lines=True)
+    if cleaned_text:
+        resume_text_cache.set(cache_key, cleaned_text)
+    return cleaned_text
+
+# Clean resume text (strip punctuation but keep tech-name symbols like C++ and CI/CD, collapse whitespace;
+# preserve_lines keeps line and section breaks)
+def clean_resume_text(content, preserve_lines=False):
+    return normalize_resume_text(content, preserve_lines=preserve_lines)
 
 # ATS prompt formatting
 def get_ats_prompt(resume_text, job_description):
@@ -147,6 +386,8 @@ Provide in this exact JSON format:
 Return only the JSON, no other text."""
 
 # Parse Gemini response
+PARSE_FAILURE_MESSAGE = 'Could not parse AI response.'
+
 def parse_gemini_response(response_text):
     try:
         try:
@@ -174,18 +415,35 @@ def parse_gemini_response(response_text):
             'atsScore': 0,
             'matchedSkills': [],
             'missingSkills': [],
-            'gapAnalysis': ['Could not parse AI response.'],
+            'gapAnalysis': [PARSE_FAILURE_MESSAGE],
             'keywordDensity': 0,
             'skillsMatch': 0,
             'experienceMatch': 0,
         }
 
+def merge_ats_results(local_results, ai_results):
+    """Layer Gemini ATS results over local scores; keep local values if Gemini couldn't be parsed"""
+    if ai_results.get('gapAnalysis') == [PARSE_FAILURE_MESSAGE]:
+        return local_results
+    
+    merged = dict(local_results)
+    merged.update({key: value for key, value in ai_results.items() if value not in (None, [], '')})
+    return merged
+
 # Gemini AI resume analysis
 # Optimized combined ATS analysis and improvements in single API call
+def compress_prompt_inputs(resume_text, job_description, budget):
+    """Fit resume and job description into a (resume, jd) token budget, dropping the least relevant sentences"""
+    compressed = prompt_compressor.compress(resume_text, job_description, *budget)
+    before = compressed.resume_tokens_before + compressed.jd_tokens_before
+    after = compressed.resume_tokens_after + compressed.jd_tokens_after
+    if after < before:
+        print(f'Prompt inputs compressed: ~{before} -> ~{after} tokens')
+    return compressed.resume, compressed.job_description
+
 def get_combined_analysis_prompt(resume_text, job_description):
-    # Truncate inputs to prevent overly long prompts
-    resume_text = resume_text[:3000] if len(resume_text) > 3000 else resume_text
-    job_description = job_description[:2000] if len(job_description) > 2000 else job_description
+    # Keep prompts short without cutting sections off mid-sentence
+    resume_text, job_description = compress_prompt_inputs(resume_text, job_description, COMBINED_PROMPT_BUDGET)
     
     return f"""You are an expert resume reviewer and career coach for a company called 'Resume Analyser'. Your task is to provide highly specific, actionable feedback to help a user improve their resume for a specific job.
 
@@ -273,16 +531,27 @@ def analyze_resume_with_combined_ai(job_description, resume_text):
 
 
 
+def ats_cache_key(resume_text, job_description):
+    return make_cache_key(GEMINI_MODEL, gemini_models.generation_config(), ATS_PROMPT_VERSION, resume_text, job_description)
+
 def analyze_resume_with_ai(job_description, resume_text):
+    cache_key = ats_cache_key(resume_text, job_description)
+    cached_results = ats_result_cache.get(cache_key)
+    if cached_results is not None:
+        print('SUCCESS: ATS analysis served from cache')
+        return cached_results
+    
+    return ats_flight.do(cache_key, _run_ats_analysis, cache_key, job_description, resume_text)
+
+def _run_ats_analysis(cache_key, job_description, resume_text):
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
         prompt = get_ats_prompt(resume_text, job_description)
         
         print('Calling Gemini API...')
         print(f'Using API Key: {GEMINI_API_KEY[:20]}...')
-        print('Model: gemini-1.5-flash')
+        print(f'Model: {GEMINI_MODEL}')
         
-        response = model.generate_content(prompt)
+        response = gemini_models.generate_content(prompt)
         
         print('SUCCESS: Gemini API responded successfully')
         
@@ -296,20 +565,56 @@ def analyze_resume_with_ai(job_description, resume_text):
         parsed_results = parse_gemini_response(ai_text)
         print(f'SUCCESS: Parsed results: {json.dumps(parsed_results, indent=2)}')
         
+        # Don't cache parse failures so the next request gets a fresh attempt
+        if parsed_results.get('gapAnalysis') != [PARSE_FAILURE_MESSAGE]:
+            ats_result_cache.set(cache_key, parsed_results)
+        
         return parsed_results
         
     except Exception as e:
         print(f'ERROR: Gemini API Error: {str(e)}')
         raise e
 
+def _generate_packed_ats(prompt):
+    print('Calling Gemini API with packed ATS prompt...')
+    response = gemini_models.generate_content(prompt)
+    return response.text or ''
+
+# Bulk ATS scoring: small (resume, JD) pairs share one Gemini call, failures are retried alone
+packed_ats_scorer = PackedScorer(
+    generate=_generate_packed_ats,
+    parse=parse_gemini_response,
+    single=lambda item: analyze_resume_with_ai(item.job_description, item.resume_text),
+    is_failure=lambda results: results.get('gapAnalysis') == [PARSE_FAILURE_MESSAGE]
+)
+
+def analyze_resumes_with_ai_packed(pairs):
+    """
+    Bulk variant of analyze_resume_with_ai. pairs: [(item_id, job_description, resume_text)].
+    Yields (item_id, results or Exception); cached pairs skip Gemini, the rest are packed.
+    Results are cached under the same key as single analyses.
+    """
+    pending = []
+    for item_id, job_description, resume_text in pairs:
+        cached_results = ats_result_cache.get(ats_cache_key(resume_text, job_description))
+        if cached_results is not None:
+            yield item_id, cached_results
+        else:
+            pending.append(BatchItem(str(item_id), resume_text, job_description))
+    
+    ids = {str(item_id): item_id for item_id, _, _ in pairs}
+    for item, results in packed_ats_scorer.score(pending):
+        if isinstance(results, dict):
+            ats_result_cache.set(ats_cache_key(item.resume_text, item.job_description), results)
+        yield ids[item.id], results
+
 # Resume improvement analysis with Gemini AI
 def get_new_improvement_prompt(resume_text, job_description):
     """
     A new, highly focused prompt to get specific 'replace this with that' suggestions.
     """
-    # Truncate inputs to prevent overly long prompts and improve focus
-    resume_text = resume_text[:4000] if len(resume_text) > 4000 else resume_text
-    job_description = job_description[:3000] if len(job_description) > 3000 else job_description
+    # Compress inputs to prevent overly long prompts and improve focus
+    resume_text, job_description = compress_prompt_inputs(resume_text, job_description, IMPROVEMENT_PROMPT_BUDGET)
     
     return f"""You are an expert resume writer. Your single task is to analyze the provided RESUME against the JOB DESCRIPTION and suggest specific text replacements.
 
@@ -358,60 +663,34 @@ def clean_and_parse_json(text: str) -> dict:
     """
     Cleans the text response from the AI and parses it into a JSON object.
     Handles markdown code blocks and other common AI response artifacts.
+    Braces inside string values (e.g. in `improved_text`) are handled correctly.
     """
     if not text:
         raise ValueError("Input text is empty.")
 
-    # Find the start of the JSON - handles ```json markdown
-    json_start_match = re.search(r'\{', text)
-    if not json_start_match:
-        raise ValueError("No JSON object found in the response.")
-    
-    json_start_index = json_start_match.start()
-    
-    # Find the corresponding closing brace for the JSON object
-    open_braces = 0
-    json_end_index = -1
-    
-    # Create a substring starting from the first open brace
-    text_from_start = text[json_start_index:]
-
-    for i, char in enumerate(text_from_start):
-        if char == '{':
-            open_braces += 1
-        elif char == '}':
-            open_braces -= 1
-            if open_braces == 0:
-                json_end_index = json_start_index + i + 1
-                break
-    
-    if json_end_index == -1:
-        raise ValueError("Could not find a complete JSON object in the response.")
-
-    json_str = text[json_start_index:json_end_index]
-    
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to decode JSON: {e}. Content: '{json_str[:200]}...'")
+    return extract_first_json_object(text)
 
 def analyze_resume_with_new_prompt(job_description, resume_text):
     """
     Uses the new, focused prompt to get suggestions, with retry logic.
+    Identical concurrent requests share a single Gemini call.
     """
+    flight_key = make_cache_key(GEMINI_MODEL, gemini_models.generation_config(IMPROVEMENT_GENERATION_CONFIG), IMPROVEMENT_PROMPT_VERSION, resume_text, job_description)
+    return improvement_flight.do(flight_key, _run_improvement_analysis, job_description, resume_text)
+
+def _run_improvement_analysis(job_description, resume_text):
     max_retries = 2
     for attempt in range(max_retries):
         start_time = time.time()
         ai_text = ''
         try:
-            model = genai.GenerativeModel('gemini-1.5-flash')
             prompt = get_new_improvement_prompt(resume_text, job_description)
             
             print(f'[Attempt {attempt + 1}/{max_retries}] Calling Gemini API with FOCUSED prompt...')
             
-            response = model.generate_content(
+            response = gemini_models.generate_content(
                 prompt,
-                generation_config={'temperature': 0.3}
+                generation_config=IMPROVEMENT_GENERATION_CONFIG
             )
             
             end_time = time.time()
@@ -426,24 +705,14 @@ def analyze_resume_with_new_prompt(job_description, resume_text):
             combined_data = clean_and_parse_json(ai_text)
             print("SUCCESS: AI response parsed successfully.")
 
-            specific_improvements = combined_data.get('specific_improvements', [])
-            
-            improvements = {
-                'specific_improvements': specific_improvements,
-                'skill_additions': [],
-                'ats_analysis': {'current_score': 0, 'expected_score_after_improvements': 0, 'improvement_potential': 0}
-            }
-            
-            ats_results = {'atsScore': 0, 'matchedSkills': [], 'missingSkills': [], 'gapAnalysis': []}
-            
-            return ats_results, improvements
+            return build_improvement_results(combined_data.get('specific_improvements', []))
             
         except (ValueError, json.JSONDecodeError) as e:
             print(f'ERROR: Parsing failed on attempt {attempt + 1}: {str(e)}')
             print(f'Raw response sample: {ai_text[:500]}...')
             if attempt < max_retries - 1:
                 print("Retrying...")
-                time.sleep(1)  # Wait a second before retrying
+                time.sleep(gemini_resilience.retry.backoff(attempt))
             else:
                 print("All retry attempts failed.")
                 raise e # Re-raise the exception to be caught by the route handler
@@ -455,6 +724,117 @@ def analyze_resume_with_new_prompt(job_description, resume_text):
     print("ERROR: Exited retry loop without success.")
     return {}, {'specific_improvements': [], 'skill_additions': [], 'ats_analysis': {}}
 
+def build_improvement_results(specific_improvements):
+    """Wrap focused-prompt suggestions in the (ats_results, improvements) shape the routes return"""
+    improvements = {
+        'specific_improvements': specific_improvements,
+        'skill_additions': [],
+        'ats_analysis': {'current_score': 0, 'expected_score_after_improvements': 0, 'improvement_potential': 0}
+    }
+    
+    ats_results = {'atsScore': 0, 'matchedSkills': [], 'missingSkills': [], 'gapAnalysis': []}
+    
+    return ats_results, improvements
+
+def local_improvement_results(job_description, resume_text):
+    """Degraded stand-in for the improvement analysis: local scores and missing skills, no rewrites"""
+    local_results = score_resume_locally(resume_text, job_description)
+    improvements = {
+        'specific_improvements': [],
+        'skill_additions': [{
+            'skill': skill,
+            'reason': 'Mentioned in the job description but not found in your resume.',
+            'section_to_add': 'Skills'
+        } for skill in local_results['missingSkills']],
+        'ats_analysis': {'current_score': local_results['atsScore'], 'expected_score_after_improvements': 0, 'improvement_potential': 0}
+    }
+    return local_results, improvements
+
+def stream_improvements_with_new_prompt(job_description, resume_text):
+    """
+    Streaming variant of analyze_resume_with_new_prompt.
+    Yields each specific improvement as soon as its JSON object is complete.
+    """
+    prompt = get_new_improvement_prompt(resume_text, job_description)
+    
+    print('Calling Gemini API with FOCUSED prompt (streaming)...')
+    start_time = time.time()
+    response = gemini_models.generate_content(
+        prompt,
+        generation_config=IMPROVEMENT_GENERATION_CONFIG,
+        stream=True
+    )
+    
+    extractor = StreamingJSONExtractor(array_key='specific_improvements')
+    count = 0
+    for chunk in response:
+        for improvement in extractor.feed(chunk.text or ''):
+            if count == 0:
+                print(f'SUCCESS: First suggestion streamed after {time.time() - start_time:.2f} seconds')
+            count += 1
+            yield improvement
+    
+    print(f'SUCCESS: Streamed {count} suggestions in {time.time() - start_time:.2f} seconds')
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+def improvement_event_stream(job_description, resume_text, deadline):
+    """
+    SSE body: one `improvement` event per suggestion, then `done` with the full response.
+    When the latency budget runs out or Gemini is unavailable, `done` carries the suggestions
+    streamed so far plus local scoring, marked degraded.
+    """
+    specific_improvements = []
+    try:
+        suggestions = stream_improvements_with_new_prompt(job_description, resume_text)
+        degraded = {}
+        while True:
+            try:
+                # Each chunk is awaited for at most what is left of the budget
+                improvement = call_ai(deadline, next, suggestions, None)
+            except Exception as e:
+                degraded = degrade(e)
+                if degraded is None:
+                    raise
+                break
+            if improvement is None:
+                break
+            yield sse_event('improvement', {'index': len(specific_improvements), 'improvement': improvement})
+            specific_improvements.append(improvement)
+        
+        if degraded:
+            ats_results, improvements = local_improvement_results(job_description, resume_text)
+            improvements['specific_improvements'] = specific_improvements
+        else:
+            ats_results, improvements = build_improvement_results(specific_improvements)
+        yield sse_event('done', {
+            'success': True,
+            'current_analysis': ats_results,
+            'improvements': improvements,
+            **degraded
+        })
+    except Exception as e:
+        print(f'Streaming improvement error: {str(e)}')
+        yield sse_event('error', {'message': 'Failed to analyze improvements', 'error': str(e)})
+
+def ndjson_line(data):
+    """Format one newline-delimited JSON record"""
+    return json.dumps(data) + '\n'
+
+def ndjson_response(records):
+    return Response(records, mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def sse_response(event_stream):
+    return Response(event_stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let proxies buffer the stream
+    })
+
 
 # Helper functions for resume improvement
 def format_resume_for_analysis(resume_content):
@@ -641,23 +1021,28 @@ def apply_improvements_to_resume(resume_content, improvements_data):
             # Remove empty skills and normalize
             current_skills = [skill.strip() for skill in current_skills if skill and skill.strip()]
             
+            existing_skill_keys = {skill_key(skill) for skill in current_skills}
+            
             for skill_addition in skill_additions:
                 skill_name = skill_addition.get('skill', '') if isinstance(skill_addition, dict) else str(skill_addition)
                 if skill_name and skill_name.strip():
                     skill_name = skill_name.strip()
-                    # Check if skill already exists (case insensitive)
-                    if skill_name.lower() not in [s.lower() for s in current_skills]:
+                    # Check if skill already exists (canonical name, so 'JS' matches 'JavaScript')
+                    if skill_key(skill_name) not in existing_skill_keys:
                         current_skills.append(skill_name)
+                        existing_skill_keys.add(skill_key(skill_name))
                         print(f'Added new skill: {skill_name}')
             
             updated_content['skills'] = current_skills
         elif skill_additions and 'skills' not in updated_content:
             # Create skills section if it doesn't exist
             new_skills = []
+            new_skill_keys = set()
             for skill_addition in skill_additions:
                 skill_name = skill_addition.get('skill', '') if isinstance(skill_addition, dict) else str(skill_addition)
-                if skill_name and skill_name.strip():
+                if skill_name and skill_name.strip() and skill_key(skill_name) not in new_skill_keys:
                     new_skills.append(skill_name.strip())
+                    new_skill_keys.add(skill_key(skill_name))
             
             if new_skills:
                 updated_content['skills'] = new_skills
@@ -672,6 +1057,55 @@ def apply_improvements_to_resume(resume_content, improvements_data):
         traceback.print_exc()
         return resume_content, []
 
+# Background job helpers
+def run_improvement_job(payload):
+    """Job handler: run the focused improvement analysis and build the route response"""
+    ats_results, improvements = analyze_resume_with_new_prompt(
+        payload['job_description'],
+        payload['resume_text']
+    )
+    
+    if not isinstance(ats_results, dict):
+        ats_results = {}
+    if not isinstance(improvements, dict):
+        improvements = {'specific_improvements': [], 'skill_additions': [], 'ats_analysis': {}}
+    
+    return {
+        'success': True,
+        'current_analysis': ats_results,
+        'improvements': improvements
+    }
+
+# Job type -> handler, used by run_job_worker.py
+JOB_HANDLERS = {
+    'improvement_analysis': run_improvement_job
+}
+
+def wants_async_job(data):
+    """Check whether the client asked for async job mode (body flag or ?async=1)"""
+    flag = request.args.get('async') or (data or {}).get('async')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def enqueue_improvement_job(resume_text, job_description, source):
+    """Queue an improvement analysis and return the 202 response"""
+    job_id = job_queue.enqueue(
+        'improvement_analysis',
+        {
+            'resume_text': resume_text,
+            'job_description': job_description,
+            'source': source
+        },
+        user_id=request.user_id
+    )
+    print(f'Queued improvement analysis job {job_id} ({source})')
+    
+    return jsonify({
+        'success': True,
+        'jobId': job_id,
+        'status': 'queued',
+        'statusUrl': f'/api/ai/jobs/{job_id}'
+    }), 202
+
 # Routes
 
 # Basic route for testing
@@ -684,6 +1118,30 @@ def home():
 def health_check():
     return jsonify({'status': 'healthy', 'api_key_loaded': bool(GEMINI_API_KEY)})
 
+# Runtime metrics endpoint
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'caches': {
+            'ats_analysis': ats_result_cache.stats(),
+            'resume_text': resume_text_cache.stats()
+        },
+        'single_flight': {
+            'ats_analysis': ats_flight.stats(),
+            'improvement_analysis': improvement_flight.stats()
+        },
+        'jobs': job_queue.counts(),
+        'gemini': gemini_models.stats(),
+        'gemini_resilience': gemini_resilience.stats(),
+        'gemini_hedging': gemini_hedger.stats(),
+        'ai_deadlines': ai_deadlines.stats(),
+        'resume_counts': resume_counts.stats(),
+        'pdf_extraction': pdf_extraction_pool.stats(),
+        'prompt_compression': prompt_compressor.stats(),
+        'ai_usage': ai_usage.stats(),
+        'packed_ats_scoring': packed_ats_scorer.stats()
+    })
+
 # Auth routes
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -697,11 +1155,6 @@ def register():
         if not name or not email or not password:
             return jsonify({'message': 'Please enter all fields'}), 400
         
-        # Check for existing user
-        existing_user = users_collection.find_one({'email': email})
-        if existing_user:
-            return jsonify({'message': 'User already exists'}), 400
-        
         # Hash password and create user
         hashed_password = hash_password(password)
         
@@ -712,7 +1165,11 @@ def register():
             'created_at': datetime.utcnow()
         }
         
-        result = users_collection.insert_one(user_doc)
+        # One round trip: the unique index on users.email rejects existing accounts
+        try:
+            result = users_collection.insert_one(user_doc)
+        except DuplicateKeyError:
+            return jsonify({'message': 'User already exists'}), 400
         user_id = str(result.inserted_id)
         
         # Generate JWT token
@@ -783,17 +1240,44 @@ def evaluate_resume():
         
         print('Processing PDF file...')
         
-        # Parse the PDF file to get text
-        resume_content = pdf_to_text(resume_file)
-        cleaned_resume = clean_resume_text(resume_content)
+        # Parse the PDF file to get text (cached by file hash)
+        try:
+            cleaned_resume = resume_text_from_pdf(open_pdf_upload(resume_file))
+        except PDFExtractionError as e:
+            print(f"PDF extraction error: {str(e)}")
+            cleaned_resume = ''
         
         if not cleaned_resume:
             return jsonify({'msg': 'Could not extract text from PDF. Please use a text-based PDF.'}), 400
         
         print(f'SUCCESS: PDF processed, text length: {len(cleaned_resume)}')
         
-        # Analyze with Gemini
-        parsed_results = analyze_resume_with_ai(job_description, cleaned_resume)
+        try:
+            deadline = request_deadline(request.form)
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
+        
+        # Fast path: local deterministic scoring, optionally enriched by Gemini
+        parsed_results = score_resume_locally(cleaned_resume, job_description)
+        analysis_source = 'local'
+        degraded = {}
+        
+        enrich = request.form.get('enrich')
+        wants_enrichment = ATS_AI_ENRICHMENT if enrich is None else enrich.lower() in ('1', 'true', 'yes')
+        # Enrichment is attributed to (and budgeted for) the caller when a valid token is sent
+        request.user_id = optional_user_id()
+        if wants_enrichment and request.user_id and not ai_budget_status(request.user_id).allowed:
+            print(f'WARNING: AI token budget exceeded for user {request.user_id}, returning local scores')
+            ai_usage.record_rejection()
+            wants_enrichment = False
+        if wants_enrichment:
+            try:
+                ai_results = call_ai(deadline, analyze_resume_with_ai, job_description, cleaned_resume)
+                parsed_results = merge_ats_results(parsed_results, ai_results)
+                analysis_source = 'gemini'
+            except Exception as ai_error:
+                # Local scores are a complete answer here, whatever the reason enrichment failed
+                degraded = degrade(ai_error, default_reason=REASON_PROVIDER_ERROR)
         
         # Store in database if user is authenticated (optional)
         auth_header = request.headers.get('Authorization')
@@ -822,7 +1306,9 @@ def evaluate_resume():
         return jsonify({
             'success': True,
             'results': parsed_results,
-            'resumeText': cleaned_resume  # Include resume text for improvement feature
+            'analysisSource': analysis_source,
+            'resumeText': cleaned_resume,  # Include resume text for improvement feature
+            **degraded
         })
         
     except Exception as err:
@@ -835,9 +1321,257 @@ def evaluate_resume():
             'details': str(err)
         }), 500
 
+# Skill heatmap: every skill occurrence in the resume, with offsets, for highlighting
+@app.route('/api/ats/heatmap', methods=['POST'])
+def skill_heatmap():
+    try:
+        data = request.get_json() or {}
+        resume_text = data.get('resumeText')
+        job_description = data.get('jobDescription', '')
+        
+        if not resume_text:
+            return jsonify({'message': 'Resume text is required'}), 400
+        
+        matcher = get_skill_matcher()
+        job_skills = matcher.skill_counts(job_description)
+        resume_matches = matcher.find_skills(resume_text)
+        
+        skill_counts = {}
+        for match in resume_matches:
+            skill_counts[match.canonical] = skill_counts.get(match.canonical, 0) + 1
+        
+        matched_job_skills = [skill for skill in job_skills if skill in skill_counts]
+        
+        return jsonify({
+            'success': True,
+            'highlights': [{
+                'start': match.start,
+                'end': match.end,
+                'text': match.surface,
+                'skill': match.canonical,
+                'category': matcher.categories.get(match.canonical, 'other'),
+                'inJobDescription': match.canonical in job_skills
+            } for match in resume_matches],
+            'skills': [{
+                'skill': skill,
+                'count': count,
+                'inJobDescription': skill in job_skills
+            } for skill, count in skill_counts.items()],
+            'jobSkills': list(job_skills),
+            'missingSkills': [skill for skill in job_skills if skill not in skill_counts],
+            'coverage': round(100 * len(matched_job_skills) / len(job_skills)) if job_skills else 0
+        })
+        
+    except Exception as e:
+        print(f'Skill heatmap error: {str(e)}')
+        return jsonify({'message': 'Failed to build heatmap', 'error': str(e)}), 500
+
+# Recruiter batch ranking: one job description, many resumes
+@app.route('/api/ats/batch-rank', methods=['POST'])
+@auth_required
+def batch_rank_resumes():
+    try:
+        job_description = request.form.get('jobDescription')
+        if not job_description:
+            return jsonify({'message': 'Job description is required'}), 400
+        
+        try:
+            top_k = max(1, int(request.form.get('topK', 10)))
+            deep_dive = min(max(0, int(request.form.get('deepDive', 0))), BATCH_MAX_DEEP_DIVE)
+        except ValueError:
+            return jsonify({'message': 'topK and deepDive must be integers'}), 400
+        
+        try:
+            deadline = request_deadline(request.form)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        spooled = []  # Zip entries streamed to temp files, closed (deleted) once the response is done
+        try:
+            resumes = collect_uploaded_resumes(request.files, spooled=spooled)
+        except zipfile.BadZipFile:
+            return jsonify({'message': 'resumesZip is not a valid zip archive'}), 400
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        if not resumes:
+            return jsonify({'message': 'Upload PDFs as resumes or a zip archive as resumesZip'}), 400
+        
+        def close_spooled():
+            for spool in spooled:
+                spool.close()
+        
+        # Local ranking is free; only the Gemini deep-dives count against the token budget
+        if deep_dive and not ai_budget_status(request.user_id).allowed:
+            print(f'WARNING: AI token budget exceeded for user {request.user_id}, skipping deep-dives')
+            ai_usage.record_rejection()
+            deep_dive = 0
+        
+        print(f'Batch ranking {len(resumes)} resumes (top {top_k}, deep-dive {deep_dive})...')
+        # Keep the request (and its spooled upload files) open until the stream finishes
+        response = ndjson_response(stream_with_context(batch_rank_stream(resumes, job_description, top_k, deep_dive, deadline)))
+        response.call_on_close(close_spooled)
+        return response
+        
+    except Exception as e:
+        print(f'Batch ranking error: {str(e)}')
+        return jsonify({'message': 'Batch ranking failed', 'error': str(e)}), 500
+
+def batch_rank_stream(resumes, job_description, top_k, deep_dive, deadline):
+    """
+    NDJSON body: a `result` per resume as it is scored, the `ranking`, optional `deep_dive`s, then `done`.
+    Deep-dives still missing when the latency budget runs out (or Gemini is unavailable) carry
+    the local results, marked degraded.
+    """
+    start_time = time.time()
+    processed = failed = 0
+    ranking = []
+    try:
+        for kind, payload in rank_resumes(resumes, job_description, None, score_resume_locally,
+                                          top_k=top_k, extract=resume_text_from_pdf):
+            if kind == 'ranking':
+                ranking = payload
+                continue
+            processed += 1
+            if 'error' in payload:
+                failed += 1
+                yield ndjson_line({'type': 'result', **payload})
+            else:
+                yield ndjson_line({
+                    'type': 'result',
+                    'filename': payload['filename'],
+                    'atsScore': payload['atsScore'],
+                    'results': payload['results']
+                })
+        
+        yield ndjson_line({'type': 'ranking', 'ranking': [{
+            'rank': rank,
+            'filename': entry['filename'],
+            'atsScore': entry['atsScore'],
+            'results': entry['results']
+        } for rank, entry in enumerate(ranking, 1)]})
+        
+        # Only the best candidates are worth Gemini, and they share packed calls
+        finalists = ranking[:deep_dive]
+        pairs = [(rank, job_description, entry['resumeText']) for rank, entry in enumerate(finalists, 1)]
+        deep_dives = analyze_resumes_with_ai_packed(pairs)
+        pending = set(range(1, len(finalists) + 1))
+        while pending:
+            try:
+                rank, ai_results = call_ai(deadline, next, deep_dives, (None, None))
+            except Exception as e:
+                degraded = degrade(e)
+                if degraded is None:
+                    raise
+                for rank in sorted(pending):
+                    entry = finalists[rank - 1]
+                    yield ndjson_line({'type': 'deep_dive', 'rank': rank, 'filename': entry['filename'], 'results': entry['results'], **degraded})
+                break
+            if rank is None:
+                break
+            pending.discard(rank)
+            entry = finalists[rank - 1]
+            if isinstance(ai_results, Exception):
+                print(f'WARNING: Deep-dive failed for {entry["filename"]}: {ai_results}')
+                yield ndjson_line({'type': 'deep_dive', 'rank': rank, 'filename': entry['filename'], 'error': str(ai_results)})
+                continue
+            yield ndjson_line({
+                'type': 'deep_dive',
+                'rank': rank,
+                'filename': entry['filename'],
+                'results': merge_ats_results(entry['results'], ai_results)
+            })
+        
+        elapsed = time.time() - start_time
+        print(f'SUCCESS: Ranked {processed} resumes in {elapsed:.2f} seconds')
+        yield ndjson_line({'type': 'done', 'processed': processed, 'failed': failed, 'elapsedSeconds': round(elapsed, 3)})
+    except Exception as e:
+        print(f'Batch ranking stream error: {str(e)}')
+        yield ndjson_line({'type': 'error', 'message': 'Batch ranking failed', 'error': str(e)})
+
+# One resume against many job descriptions, evaluated concurrently
+@app.route('/api/ats/evaluate-multi', methods=['POST'])
+@auth_required
+@ai_budget_required
+def evaluate_resume_multi():
+    try:
+        data = request.form if request.files or request.form else (request.get_json(silent=True) or {})
+        
+        try:
+            raw_job_descriptions = data.get('jobDescriptions')
+            if hasattr(data, 'getlist') and len(data.getlist('jobDescriptions')) > 1:
+                raw_job_descriptions = data.getlist('jobDescriptions')  # Repeated form fields
+            job_descriptions = parse_job_descriptions(raw_job_descriptions)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        # The resume is extracted and cleaned once for every job description
+        if 'resume' in request.files:
+            try:
+                resume_text = resume_text_from_pdf(open_pdf_upload(request.files['resume']))
+            except PDFExtractionError as e:
+                print(f"PDF extraction error: {str(e)}")
+                resume_text = ''
+        else:
+            resume_text = clean_resume_text(data.get('resumeText') or '', preserve_lines=True)
+        
+        if not resume_text:
+            return jsonify({'message': 'Upload a text-based PDF as resume or send resumeText'}), 400
+        
+        try:
+            deadline = request_deadline(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        enrich = str(data.get('enrich', 'true')).lower() in ('1', 'true', 'yes')
+        print(f'Evaluating resume against {len(job_descriptions)} job descriptions (Gemini: {enrich})...')
+        return ndjson_response(stream_with_context(
+            multi_jd_stream(resume_text, job_descriptions, deadline if enrich else None)
+        ))
+        
+    except Exception as e:
+        print(f'Multi-JD evaluation error: {str(e)}')
+        return jsonify({'message': 'Multi-JD evaluation failed', 'error': str(e)}), 500
+
+def multi_jd_stream(resume_text, job_descriptions, deadline):
+    """
+    NDJSON body: the cleaned `resume`, a `result` per job description as it finishes, then `done`.
+    Gemini enrichment (skipped when deadline is None) shares one latency budget; JDs it doesn't
+    cover keep their local scores, marked degraded.
+    """
+    start_time = time.time()
+    failed = 0
+    
+    def analyze(job_description, resume_text):
+        try:
+            return call_ai(deadline, analyze_resume_with_ai, job_description, resume_text)
+        except Exception as e:
+            degrade(e, default_reason=REASON_PROVIDER_ERROR)
+            raise
+    
+    try:
+        yield ndjson_line({'type': 'resume', 'resumeText': resume_text, 'jobDescriptions': len(job_descriptions)})
+        for entry in evaluate_job_descriptions(
+            resume_text, job_descriptions, score_resume_locally,
+            analyze=analyze if deadline is not None else None,
+            merge=merge_ats_results
+        ):
+            if 'error' in entry or 'aiError' in entry:
+                failed += 1
+                print(f'WARNING: Job description {entry["id"]} failed: {entry.get("error") or entry.get("aiError")}')
+            yield ndjson_line({'type': 'result', **entry})
+        
+        elapsed = time.time() - start_time
+        print(f'SUCCESS: Evaluated {len(job_descriptions)} job descriptions in {elapsed:.2f} seconds')
+        yield ndjson_line({'type': 'done', 'evaluated': len(job_descriptions), 'failed': failed, 'elapsedSeconds': round(elapsed, 3)})
+    except Exception as e:
+        print(f'Multi-JD evaluation stream error: {str(e)}')
+        yield ndjson_line({'type': 'error', 'message': 'Multi-JD evaluation failed', 'error': str(e)})
+
 # AI analysis routes
 @app.route('/api/ai/analyze-resume', methods=['POST'])
 @auth_required
+@ai_budget_required
 def analyze_resume():
     try:
         data = request.get_json()
@@ -847,12 +1581,25 @@ def analyze_resume():
         if not resume_text or not job_description:
             return jsonify({'message': 'Resume text and job description are required'}), 400
         
+        try:
+            deadline = request_deadline(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Use the same analysis function as ATS
-        results = analyze_resume_with_ai(job_description, resume_text)
+        degraded = {}
+        try:
+            results = call_ai(deadline, analyze_resume_with_ai, job_description, resume_text)
+        except Exception as e:
+            degraded = degrade(e)
+            if degraded is None:
+                raise
+            results = score_resume_locally(resume_text, job_description)
         
         return jsonify({
             'success': True,
-            'analysis': results
+            'analysis': results,
+            **degraded
         })
         
     except Exception as e:
@@ -861,14 +1608,14 @@ def analyze_resume():
 
 @app.route('/api/ai/test-key', methods=['POST'])
 @auth_required
+@ai_budget_required
 def test_api_key():
     try:
         if not GEMINI_API_KEY:
             return jsonify({'valid': False, 'error': 'No API key configured'}), 400
         
         # Test with a simple prompt
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("Say 'API key is working' if you can see this.")
+        response = gemini_models.generate_content("Say 'API key is working' if you can see this.")
         
         return jsonify({
             'valid': True,
@@ -883,8 +1630,26 @@ def test_api_key():
         }), 400
 
 # Resume improvement routes
+def load_saved_resume_text(resume_id):
+    """Load one of the current user's resumes as analysis text; returns (text, error_response)"""
+    try:
+        resume_object_id = ObjectId(resume_id)
+    except Exception:
+        return None, (jsonify({'message': 'Invalid Resume ID format'}), 400)
+
+    resume = resumes_collection.find_one({
+        '_id': resume_object_id,
+        'user_id': ObjectId(request.user_id)
+    })
+    
+    if not resume:
+        return None, (jsonify({'message': 'Resume not found'}), 404)
+    
+    return resume_analysis_text(resume, format_resume_for_analysis), None
+
 @app.route('/api/ai/improve-resume', methods=['POST'])
 @auth_required
+@ai_budget_required
 def improve_resume():
     try:
         data = request.get_json()
@@ -894,27 +1659,27 @@ def improve_resume():
         if not resume_id or not job_description:
             return jsonify({'message': 'Resume ID and job description are required'}), 400
         
-        try:
-            resume_object_id = ObjectId(resume_id)
-        except Exception:
-            return jsonify({'message': 'Invalid Resume ID format'}), 400
-
-        resume = resumes_collection.find_one({
-            '_id': resume_object_id,
-            'user_id': ObjectId(request.user_id)
-        })
+        resume_text, error_response = load_saved_resume_text(resume_id)
+        if error_response:
+            return error_response
         
-        if not resume:
-            return jsonify({'message': 'Resume not found'}), 404
+        if wants_async_job(data):
+            return enqueue_improvement_job(resume_text, job_description, 'saved_resume')
         
-        resume_content = resume.get('content', '')
-        if isinstance(resume_content, dict):
-            resume_text = format_resume_for_analysis(resume_content)
-        else:
-            resume_text = resume_content
+        try:
+            deadline = request_deadline(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
         
         print('Analyzing saved resume with NEW FOCUSED prompt...')
-        ats_results, improvements = analyze_resume_with_new_prompt(job_description, resume_text)
+        degraded = {}
+        try:
+            ats_results, improvements = call_ai(deadline, analyze_resume_with_new_prompt, job_description, resume_text)
+        except Exception as e:
+            degraded = degrade(e)
+            if degraded is None:
+                raise
+            ats_results, improvements = local_improvement_results(job_description, resume_text)
         
         # Ensure the response has the expected structure even on partial failure
         if not isinstance(ats_results, dict):
@@ -925,7 +1690,8 @@ def improve_resume():
         return jsonify({
             'success': True,
             'current_analysis': ats_results,
-            'improvements': improvements
+            'improvements': improvements,
+            **degraded
         })
         
     except Exception as e:
@@ -987,6 +1753,7 @@ def debug_improve_uploaded_resume():
 
 @app.route('/api/ai/improve-uploaded-resume', methods=['POST'])
 @auth_required
+@ai_budget_required
 def improve_uploaded_resume():
     """Handle improvement of uploaded resume files from ATS checker - NEW FOCUSED PROMPT"""
     try:
@@ -997,9 +1764,24 @@ def improve_uploaded_resume():
         if not resume_text or not job_description:
             return jsonify({'message': 'Resume text and job description are required'}), 400
         
+        if wants_async_job(data):
+            return enqueue_improvement_job(resume_text, job_description, 'uploaded_resume')
+        
+        try:
+            deadline = request_deadline(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         print(f'Analyzing uploaded resume with NEW FOCUSED prompt: {len(resume_text)} characters')
         
-        ats_results, improvements = analyze_resume_with_new_prompt(job_description, resume_text)
+        degraded = {}
+        try:
+            ats_results, improvements = call_ai(deadline, analyze_resume_with_new_prompt, job_description, resume_text)
+        except Exception as e:
+            degraded = degrade(e)
+            if degraded is None:
+                raise
+            ats_results, improvements = local_improvement_results(job_description, resume_text)
 
         # Ensure the response has the expected structure even on partial failure
         if not isinstance(ats_results, dict):
@@ -1010,7 +1792,8 @@ def improve_uploaded_resume():
         return jsonify({
             'success': True,
             'current_analysis': ats_results,
-            'improvements': improvements
+            'improvements': improvements,
+            **degraded
         })
         
     except Exception as e:
@@ -1019,6 +1802,98 @@ def improve_uploaded_resume():
         traceback.print_exc()
         return jsonify({'message': 'Failed to analyze improvements', 'error': str(e)}), 500
 
+@app.route('/api/ai/improve-resume/stream', methods=['POST'])
+@auth_required
+@ai_budget_required
+def improve_resume_stream():
+    """Stream improvement suggestions for a saved resume over Server-Sent Events"""
+    data = request.get_json() or {}
+    resume_id = data.get('resumeId')
+    job_description = data.get('jobDescription')
+    
+    if not resume_id or not job_description:
+        return jsonify({'message': 'Resume ID and job description are required'}), 400
+    
+    resume_text, error_response = load_saved_resume_text(resume_id)
+    if error_response:
+        return error_response
+    
+    try:
+        deadline = request_deadline(data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return sse_response(stream_with_context(improvement_event_stream(job_description, resume_text, deadline)))
+
+@app.route('/api/ai/improve-uploaded-resume/stream', methods=['POST'])
+@auth_required
+@ai_budget_required
+def improve_uploaded_resume_stream():
+    """Stream improvement suggestions for uploaded resume text over Server-Sent Events"""
+    data = request.get_json() or {}
+    resume_text = data.get('resumeText')
+    job_description = data.get('jobDescription')
+    
+    if not resume_text or not job_description:
+        return jsonify({'message': 'Resume text and job description are required'}), 400
+    
+    try:
+        deadline = request_deadline(data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return sse_response(stream_with_context(improvement_event_stream(job_description, resume_text, deadline)))
+
+@app.route('/api/ai/jobs/<job_id>', methods=['GET'])
+@auth_required
+def get_ai_job(job_id):
+    """Return the status (and result, once finished) of a background AI job"""
+    try:
+        try:
+            job = job_queue.get(job_id, user_id=request.user_id)
+        except Exception:
+            return jsonify({'message': 'Invalid job ID format'}), 400
+        
+        if not job:
+            return jsonify({'message': 'Job not found'}), 404
+        
+        response = {
+            'jobId': str(job['_id']),
+            'type': job.get('type'),
+            'status': job.get('status'),
+            'attempts': job.get('attempts', 0),
+            'maxAttempts': job.get('max_attempts', JOB_MAX_ATTEMPTS),
+            'created_at': job['created_at'].isoformat(),
+            'updated_at': job['updated_at'].isoformat()
+        }
+        if job.get('status') == COMPLETED:
+            response['result'] = job.get('result')
+        elif job.get('status') == DEAD_LETTER:
+            response['error'] = job.get('last_error')
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        print(f'Get AI job error: {str(e)}')
+        return jsonify({'message': 'Failed to fetch job', 'error': str(e)}), 500
+
+@app.route('/api/ai/usage', methods=['GET'])
+@auth_required
+def get_ai_usage():
+    """Today's Gemini token usage for the current user, by route, and the daily budget"""
+    try:
+        status = ai_budget_status(request.user_id)
+        return jsonify({
+            'tokensUsed': status.used if status.used is not None else ai_usage.tokens_used(request.user_id),
+            'dailyTokenBudget': status.budget,
+            'resetsAt': next_reset().isoformat() + 'Z',
+            'routes': ai_usage.usage_by_route(request.user_id)
+        })
+        
+    except Exception as e:
+        print(f'Get AI usage error: {str(e)}')
+        return jsonify({'message': 'Failed to fetch AI usage', 'error': str(e)}), 500
+
 # REMOVED: Implementation routes as per user request to only show analysis without auto-implementation
 # @app.route('/api/ai/implement-improvements', methods=['POST'])
 # @app.route('/api/ai/implement-uploaded-improvements', methods=['POST'])
@@ -1042,7 +1917,7 @@ def improve_uploaded_resume():
             return jsonify({'message': 'Resume not found'}), 404
         
         # Get current resume content
-        resume_content = resume.get('content', {})
+        resume_content = resume_structured_data(resume)
         
         if not isinstance(resume_content, dict):
             return jsonify({'message': 'Invalid resume format'}), 400
@@ -1084,16 +1959,16 @@ def improve_uploaded_resume():
         new_resume_doc = {
             'user_id': ObjectId(request.user_id),
             'title': new_title,
-            'content': updated_content,
-            'structured_data': updated_content if isinstance(updated_content, dict) else {},  # Required by GET endpoint
+            **storage_fields(updated_content if isinstance(updated_content, dict) else {}, applied_improvements),
             'keywords': resume.get('keywords', []),  # Copy from original
+            **search_fields(new_title, resume.get('keywords', []), updated_content),
+            'preview': build_preview(updated_content),
             'ats_score': resume.get('ats_score', 0),  # Copy from original
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),  # Required by GET endpoint
             'version': resume.get('version', 1) + 1,
             'is_active': True,  # Required by GET endpoint
             'original_resume_id': ObjectId(resume_id),
-            'improvements_applied': applied_improvements,
             'total_improvements_count': len(applied_improvements),
             'skill_additions_count': len(improvements_to_apply.get('skill_additions', [])),
             'is_improved_version': True,
@@ -1115,6 +1990,7 @@ def improve_uploaded_resume():
         }
         
         result = resumes_collection.insert_one(new_resume_doc)
+        resume_counts.invalidate(request.user_id)
         
         # Return detailed response
         return jsonify({
@@ -1261,44 +2137,39 @@ def implement_uploaded_improvements():
             version_suffix = f"v{int(time.time() % 10000)}"
             new_title = f"{resume_title.replace('- Improved', '')} - Improved {version_suffix}".strip()
         
-        # Parse content to create structured data for the new resume
-        try:
-            if isinstance(updated_content, str):
-                # If content is a string, create basic structured data
-                structured_content = {
-                    'summary': resume_content.get('summary', ''),
-                    'experience': resume_content.get('experience', []),
-                    'education': resume_content.get('education', []),
-                    'skills': resume_content.get('skills', []),
-                    'projects': resume_content.get('projects', []),
-                    'layout': {
-                        'template': 'modern',
-                        'color': '#0d6efd',
-                        'font': 'Inter'
-                    }
+        # Structured data for the new resume (its only stored copy of the content)
+        if isinstance(updated_content, str):
+            # If content is a string, create basic structured data
+            structured_content = {
+                'summary': resume_content.get('summary', ''),
+                'experience': resume_content.get('experience', []),
+                'education': resume_content.get('education', []),
+                'skills': resume_content.get('skills', []),
+                'projects': resume_content.get('projects', []),
+                'layout': {
+                    'template': 'modern',
+                    'color': '#0d6efd',
+                    'font': 'Inter'
                 }
-                content_to_save = json.dumps(structured_content)
-            else:
-                structured_content = updated_content
-                content_to_save = json.dumps(updated_content)
-        except Exception as e:
-            print(f'Error parsing content: {e}')
+            }
+        elif isinstance(updated_content, dict):
+            structured_content = updated_content
+        else:
             structured_content = {'raw_content': str(updated_content)}
-            content_to_save = str(updated_content)
         
         # Create new resume document in user's collection
         new_resume_doc = {
             'user_id': ObjectId(request.user_id),
             'title': new_title,
-            'content': content_to_save,
-            'structured_data': structured_content,  # Required by GET endpoint
+            **storage_fields(structured_content, applied_improvements),  # Required by GET endpoint
             'keywords': resume_content.get('skills', [])[:10],  # Use skills as keywords
+            **search_fields(new_title, resume_content.get('skills', [])[:10], structured_content),
+            'preview': build_preview(structured_content),  # List card, so lists never load the content
             'ats_score': 0,  # Will be calculated when user runs ATS analysis
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),  # Required by GET endpoint
             'version': 1,
             'is_active': True,  # Required by GET endpoint
-            'improvements_applied': applied_improvements,
             'total_improvements_count': len(applied_improvements),
             'skill_additions_count': len(improvements_to_apply.get('skill_additions', [])),
             'is_improved_version': True,
@@ -1322,6 +2193,7 @@ def implement_uploaded_improvements():
         }
         
         result = resumes_collection.insert_one(new_resume_doc)
+        resume_counts.invalidate(request.user_id)
         
         # Return detailed response
         return jsonify({
@@ -1367,17 +2239,15 @@ def create_resume():
         user_id = ObjectId(request.user_id)
         
         # Parse content to extract structured data
-        try:
-            content_data = json.loads(content) if isinstance(content, str) else content
-        except json.JSONDecodeError:
-            content_data = {'raw_content': content}
+        content_data = parse_content(content)
         
         resume_doc = {
             'user_id': user_id,
             'title': title,
-            'content': content,
-            'structured_data': content_data,  # Store parsed resume data
+            **storage_fields(content_data),  # The parsed resume only; `content` is derived from it on read
             'keywords': keywords,
+            **search_fields(title, keywords, content_data),
+            'preview': build_preview(content_data),  # List card, so lists never load the content
             'ats_score': data.get('atsScore', 0),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),
@@ -1404,6 +2274,7 @@ def create_resume():
                 resume_doc['created_at'] = existing_resume.get('created_at', datetime.utcnow())
                 
                 resumes_collection.replace_one({'_id': ObjectId(resume_id)}, resume_doc)
+                resume_counts.invalidate(str(user_id))  # The replacement may re-activate a deleted resume
                 return jsonify({
                     '_id': resume_id,
                     'message': 'Resume updated successfully',
@@ -1415,6 +2286,7 @@ def create_resume():
         else:
             # Create new resume
             result = resumes_collection.insert_one(resume_doc)
+            resume_counts.invalidate(str(user_id))
             return jsonify({
                 '_id': str(result.inserted_id),
                 'message': 'Resume created successfully',
@@ -1430,56 +2302,68 @@ def create_resume():
 def get_user_resumes():
     try:
         user_id = ObjectId(request.user_id)
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 10))
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
+        try:
+            limit = page_size(request.args.get('limit'))
+            page = max(1, int(request.args.get('page', 1)))
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'message': str(e) if cursor else 'page and limit must be integers'}), 400
+        # Totals are for numbered pages; cursor clients ask for them with includeTotal=true
+        include_total = position is None or request.args.get('includeTotal', '').lower() in ('1', 'true', 'yes')
         
         # Build query
         query = {'user_id': user_id, 'is_active': True}
-        if search:
-            query['$or'] = [
-                {'title': {'$regex': search, '$options': 'i'}},
-                {'keywords': {'$in': [search]}}
-            ]
-        
-        # Get total count
-        total = resumes_collection.count_documents(query)
-        
-        # Get resumes with pagination
-        resumes = resumes_collection.find(query).sort('updated_at', -1).skip((page - 1) * limit).limit(limit)
-        
-        result = []
-        for resume in resumes:
-            # Extract basic info from structured data
-            structured_data = resume.get('structured_data', {})
+        terms = query_terms(search) if search else []
+        next_cursor = None
+        if terms:
+            # Prefix match on indexed search tokens; rank the (bounded) hits, then load one page
+            if position is not None and position[0] != 'offset':
+                return jsonify({'message': 'Invalid cursor'}), 400
+            offset = position[1] if position else (page - 1) * limit
+            query.update(search_filter(terms))
+            candidates = list(resumes_collection.find(
+                query, {'search_tokens': 1, 'search_title_tokens': 1, 'updated_at': 1}
+            ).sort(KEYSET_SORT).limit(RESUME_SEARCH_MAX_CANDIDATES))
+            total = len(candidates)
+            page_ids = [doc['_id'] for doc in rank(candidates, terms)[offset:offset + limit]]
+            by_id = {doc['_id']: doc for doc in resumes_collection.find({'_id': {'$in': page_ids}}, LIST_PROJECTION)}
+            resumes = [by_id[resume_id] for resume_id in page_ids if resume_id in by_id]
+            if offset + limit < total:
+                next_cursor = encode_offset_cursor(offset + limit)
+        elif search:
+            total = 0  # Only stopwords or punctuation: nothing to match
+            resumes = []
+        else:
+            if position is not None and position[0] != 'keyset':
+                return jsonify({'message': 'Invalid cursor'}), 400
+            total = resume_counts.get(str(user_id), lambda: resumes_collection.count_documents(query)) if include_total else None
             
-            result.append({
-                'id': str(resume['_id']),
-                'title': resume['title'],
-                'created_at': resume['created_at'].isoformat(),
-                'updated_at': resume['updated_at'].isoformat(),
-                'version': resume.get('version', 1),
-                'ats_score': resume.get('ats_score', 0),
-                'keywords': resume.get('keywords', []),
-                'metadata': resume.get('metadata', {}),
-                'preview': {
-                    'name': structured_data.get('name', ''),
-                    'email': structured_data.get('email', ''),
-                    'phone': structured_data.get('phone', ''),
-                    'summary': structured_data.get('summary', '')[:100] + '...' if structured_data.get('summary', '') else '',
-                    'template': structured_data.get('layout', {}).get('template', 'modern'),
-                    'color': structured_data.get('layout', {}).get('color', '#0d6efd')
-                }
-            })
+            # Keyset pagination: continue after the cursor's (updated_at, _id); one extra row tells if there is more
+            if position is not None:
+                page_query = {**query, **keyset_filter(position[1])}
+                resumes = list(resumes_collection.find(page_query, LIST_PROJECTION).sort(KEYSET_SORT).limit(limit + 1))
+            else:
+                # Numbered pages (page > 1 without a cursor) still skip, for clients that jump between pages
+                resumes = list(resumes_collection.find(query, LIST_PROJECTION).sort(KEYSET_SORT).skip((page - 1) * limit).limit(limit + 1))
+            if len(resumes) > limit:
+                resumes = resumes[:limit]
+                next_cursor = encode_keyset_cursor(resumes[-1])
+        
+        # Previews are precomputed at write time; older documents get theirs filled in on first listing
+        result = [list_item(resume) for resume in fill_missing_previews(resumes_collection, resumes)]
+        
+        pagination = {'limit': limit, 'hasMore': next_cursor is not None, 'nextCursor': next_cursor}
+        if position is None:
+            pagination['page'] = page
+        if total is not None:
+            pagination['total'] = total
+            pagination['pages'] = (total + limit - 1) // limit
         
         response = jsonify({
             'resumes': result,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total,
-                'pages': (total + limit - 1) // limit
-            }
+            'pagination': pagination
         })
         
         # Add no-cache headers to ensure fresh data
@@ -1508,11 +2392,12 @@ def get_resume_details(resume_id):
         if not resume:
             return jsonify({'message': 'Resume not found'}), 404
         
+        structured_data = resume_structured_data(resume)
         return jsonify({
             'id': str(resume['_id']),
             'title': resume['title'],
-            'content': resume['content'],
-            'structured_data': resume.get('structured_data', {}),
+            'content': content_string(structured_data),
+            'structured_data': structured_data,
             'keywords': resume.get('keywords', []),
             'ats_score': resume.get('ats_score', 0),
             'created_at': resume['created_at'].isoformat(),
@@ -1538,6 +2423,7 @@ def delete_resume(resume_id):
         
         if result.matched_count == 0:
             return jsonify({'message': 'Resume not found'}), 404
+        resume_counts.invalidate(str(user_id))
         
         return jsonify({'message': 'Resume deleted successfully'})
         
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local deterministic ATS scoring
+Computes the same fields as the Gemini ATS analysis in milliseconds, using
+BM25-style term weighting over normalized tokens and two-word phrases, and the
+skill taxonomy for matched/missing skills
+"""
+
+import math
+import re
+from collections import Counter
+from datetime import datetime
+
+from skill_matcher import get_skill_matcher
+
+# BM25 parameters; AVERAGE_RESUME_TOKENS stands in for the corpus average length
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVERAGE_RESUME_TOKENS = 450
+
+MAX_JD_TERMS = 40
+MAX_SKILLS_REPORTED = 15
+
+# Tokens keep inner symbols used by tech names: c++, c#, node.js, ci/cd, .net
+_TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*|\.[a-z]+', re.IGNORECASE)
+_YEARS_PATTERN = re.compile(r'(\d{1,2})\s*\+?\s*(?:years?|yrs?)', re.IGNORECASE)
+_YEAR_RANGE_PATTERN = re.compile(r'\b((?:19|20)\d{2})\s*(?:-|to)\s*((?:19|20)\d{2}|present|current|now)\b', re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r'\d')
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could
+do does for from had has have having he her his how i if in into is it its just may me more most
+must my no not of on or our out over own per shall she should so some such than that the their
+them then there these they this those through to under up upon us very was we were what when where
+which while who whom why will with within without would you your yours etc e.g i.e need needs
+want wants like
+""".split())
+
+# Words common to almost every job posting; they carry little signal (low IDF)
+GENERIC_TERMS = frozenset("""
+ability able apply applicant applicants benefits candidate candidates company competitive
+culture description environment equal excellent experience experienced familiarity fast good
+great help ideal including join job knowledge looking new opportunity paced plus position
+preferred qualifications required requirements responsibilities role skills strong team teams
+understanding using work working world year years based across day days key level related
+within well highly proven demonstrated solid best new duties seeking build building deliver
+design designing develop developing maintain maintaining ensure support implement write writing
+closely problems solutions solve growing grow learn learning passionate collaborate field
+""".split())
+
+
+def tokenize(text):
+    """Lowercase text and split it into normalized tokens"""
+    if not isinstance(text, str):
+        text = str(text)
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _term_idf(term):
+    """Static IDF estimate: phrases > specific words > generic posting vocabulary"""
+    if ' ' in term:
+        return 1.5
+    if term in GENERIC_TERMS:
+        return 0.2
+    if len(term) <= 2 and not any(c in term for c in '+#'):
+        return 0.5
+    return 1.0
+
+
+def _is_term(token):
+    return token not in STOPWORDS and any(c.isalpha() for c in token)
+
+
+def _candidate_terms(tokens):
+    """Unigrams and two-word phrases that don't start or end with a stopword"""
+    terms = []
+    for i, token in enumerate(tokens):
+        if not _is_term(token):
+            continue
+        terms.append(token)
+        if i + 1 < len(tokens) and _is_term(tokens[i + 1]):
+            terms.append(f'{token} {tokens[i + 1]}')
+    return terms
+
+
+def extract_jd_terms(job_description, max_terms=MAX_JD_TERMS):
+    """Return [(term, weight)] for the most important terms of a job description"""
+    counts = Counter(_candidate_terms(tokenize(job_description)))
+    weighted = []
+    for term, tf in counts.items():
+        # Phrases only count when they repeat; otherwise every word pair would qualify
+        if ' ' in term and tf < 2:
+            continue
+        weighted.append((term, _term_idf(term) * (1.0 + math.log(tf))))
+    weighted.sort(key=lambda item: (-item[1], item[0]))
+    return weighted[:max_terms]
+
+
+def _bm25_presence(tf, doc_length):
+    """BM25 term-frequency saturation scaled to 0..1"""
+    if tf <= 0:
+        return 0.0
+    norm = 1 - BM25_B + BM25_B * (doc_length / AVERAGE_RESUME_TOKENS)
+    return (tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)) / (BM25_K1 + 1)
+
+
+def _years_required(job_description):
+    years = [int(y) for y in _YEARS_PATTERN.findall(job_description)]
+    return min(years) if years else None
+
+
+def _years_in_resume(resume_text, current_year):
+    years = [int(y) for y in _YEARS_PATTERN.findall(resume_text)]
+    for start, end in _YEAR_RANGE_PATTERN.findall(resume_text):
+        end_year = current_year if not end[0].isdigit() else int(end)
+        years.append(max(0, end_year - int(start)))
+    return max(years) if years else 0
+
+
+def _surface_forms(job_description):
+    """Map each lowercase token to the job description's own spelling (e.g. 'aws' -> 'AWS')"""
+    forms = {}
+    for surface in _TOKEN_PATTERN.findall(job_description):
+        key = surface.lower()
+        if key not in forms or (forms[key] == key and surface != key):
+            forms[key] = surface
+    return forms
+
+
+def _display(term, forms):
+    words = [forms.get(part, part) for part in term.split(' ')]
+    if all(word == word.lower() for word in words):
+        words[0] = words[0].capitalize()
+    return ' '.join(words)
+
+
+def _gap_analysis(missing, resume_text, years_required, years_found):
+    gaps = []
+    if missing:
+        gaps.append(f"Add experience or projects that use {', '.join(missing[:3])}")
+    if len(missing) > 3:
+        gaps.append(f"Mention other job keywords where truthful: {', '.join(missing[3:6])}")
+    if years_required and years_found < years_required:
+        gaps.append(f"The role asks for {years_required}+ years of experience; make your timeline explicit")
+    if len(_NUMBER_PATTERN.findall(resume_text)) < 5:
+        gaps.append("Quantify achievements with metrics (percentages, scale, time saved)")
+    if not gaps:
+        gaps.append("Strong keyword alignment; tailor your summary to the job title")
+    return gaps
+
+
+def _skill_overlap(resume_text, job_description, matcher):
+    """Matched/missing canonical skills (JD order, most frequent first) and the weighted match %"""
+    jd_skills = matcher.skill_counts(job_description)
+    if not jd_skills:
+        return None
+    resume_skills = matcher.skill_counts(resume_text)
+    ordered = sorted(jd_skills, key=lambda skill: -jd_skills[skill])  # stable: ties keep JD order
+
+    matched, missing = [], []
+    total_weight = matched_weight = 0.0
+    for skill in ordered:
+        weight = 1.0 + math.log(jd_skills[skill])
+        total_weight += weight
+        if skill in resume_skills:
+            matched.append(skill)
+            matched_weight += weight
+        else:
+            missing.append(skill)
+    return matched, missing, round(100 * matched_weight / total_weight)
+
+
+def score_resume(resume_text, job_description, current_year=None, matcher=None):
+    """
+    Score a resume against a job description locally.
+    Returns the same shape as parse_gemini_response.
+    """
+    resume_tokens = tokenize(resume_text)
+    resume_counts = Counter(_candidate_terms(resume_tokens))
+    doc_length = max(len(resume_tokens), 1)
+
+    jd_terms = extract_jd_terms(job_description)
+    if not jd_terms or not resume_tokens:
+        return {
+            'atsScore': 0,
+            'matchedSkills': [],
+            'missingSkills': [],
+            'gapAnalysis': ['Not enough text to analyze.'],
+            'keywordDensity': 0,
+            'skillsMatch': 0,
+            'experienceMatch': 0,
+        }
+
+    forms = _surface_forms(job_description)
+    total_weight = 0.0
+    covered_weight = 0.0
+    specific_weight = 0.0
+    specific_matched = 0.0
+    matched, missing = [], []
+    for term, weight in jd_terms:
+        presence = _bm25_presence(resume_counts.get(term, 0), doc_length)
+        total_weight += weight
+        covered_weight += weight * presence
+        if term in GENERIC_TERMS:
+            continue
+        specific_weight += weight
+        if presence > 0:
+            specific_matched += weight
+            matched.append(_display(term, forms))
+        else:
+            missing.append(_display(term, forms))
+
+    keyword_density = round(100 * covered_weight / total_weight) if total_weight else 0
+    skills_match = round(100 * specific_matched / specific_weight) if specific_weight else 0
+
+    # Known skills (with synonyms such as JS/JavaScript, k8s/Kubernetes) take precedence over raw terms
+    overlap = _skill_overlap(resume_text, job_description, matcher or get_skill_matcher())
+    if overlap:
+        matched, missing, skills_match = overlap
+
+    years_required = _years_required(job_description)
+    years_found = _years_in_resume(resume_text, current_year or datetime.utcnow().year)
+    if years_required:
+        experience_match = min(100, round(100 * years_found / years_required))
+    else:
+        experience_match = skills_match
+
+    ats_score = round(0.5 * skills_match + 0.3 * keyword_density + 0.2 * experience_match)
+
+    return {
+        'atsScore': ats_score,
+        'matchedSkills': matched[:MAX_SKILLS_REPORTED],
+        'missingSkills': missing[:MAX_SKILLS_REPORTED],
+        'gapAnalysis': _gap_analysis(missing, resume_text, years_required, years_found),
+        'keywordDensity': keyword_density,
+        'skillsMatch': skills_match,
+        'experienceMatch': experience_match,
+    }
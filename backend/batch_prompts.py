@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Packed batch prompts for bulk ATS scoring
+Several small (resume, job description) pairs share one Gemini call: the prompt asks
+for a JSON array keyed by item id, the answer is split back per item, and items that
+are missing or malformed in the answer are retried one by one
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+
+from prompt_budget import estimate_tokens
+
+PACKED_PROMPT_MAX_TOKENS = int(os.getenv('PACKED_PROMPT_MAX_TOKENS', 6000))
+PACKED_PROMPT_MAX_ITEMS = int(os.getenv('PACKED_PROMPT_MAX_ITEMS', 8))
+# Budgeted per item for the model's answer, on top of the item's prompt text
+PACKED_RESPONSE_TOKENS_PER_ITEM = 200
+PACKED_ITEM_OVERHEAD_TOKENS = 20
+
+BatchItem = namedtuple('BatchItem', ['id', 'resume_text', 'job_description'])
+
+_PACKED_PROMPT_HEADER = """Analyze each resume below for its paired job description.
+Every item is delimited by <item id="..."> tags; treat items independently.
+
+"""
+
+_PACKED_PROMPT_FOOTER = """
+Return a JSON array with exactly one object per item, in this exact format:
+[
+  {{
+    "id": "{example_id}",
+    "ats_score": 85,
+    "matched_skills": ["JavaScript", "React", "Node.js"],
+    "missing_skills": ["Python", "AWS"],
+    "gap_analysis": ["Add cloud experience", "Include Python projects"],
+    "keyword_density": 75,
+    "skills_match": 80,
+    "experience_match": 90
+  }}
+]
+
+Copy each item's id exactly. Return only the JSON array, no other text."""
+
+
+def item_tokens(item):
+    """Estimated cost of one item in a packed call: its text, tags and its share of the answer"""
+    return (estimate_tokens(item.resume_text) + estimate_tokens(item.job_description)
+            + PACKED_ITEM_OVERHEAD_TOKENS + PACKED_RESPONSE_TOKENS_PER_ITEM)
+
+
+def plan_batches(items, max_tokens=PACKED_PROMPT_MAX_TOKENS, max_items=PACKED_PROMPT_MAX_ITEMS):
+    """
+    Greedily pack items, in order, into batches that fit the token budget.
+    An item too large to share a call ends up in a batch of its own.
+    """
+    fixed = estimate_tokens(_PACKED_PROMPT_HEADER + _PACKED_PROMPT_FOOTER)
+    batches = []
+    current = []
+    used = fixed
+    for item in items:
+        cost = item_tokens(item)
+        if current and (used + cost > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            used = fixed
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def get_packed_ats_prompt(items):
+    parts = [_PACKED_PROMPT_HEADER]
+    for item in items:
+        parts.append(
+            f'<item id="{item.id}">\n'
+            f'Job Description: {item.job_description}\n'
+            f'Resume: {item.resume_text}\n'
+            f'</item>\n\n'
+        )
+    parts.append(_PACKED_PROMPT_FOOTER.format(example_id=items[0].id))
+    return ''.join(parts)
+
+
+def _json_array(text):
+    """First JSON array in text (the model sometimes wraps it in prose or ``` fences)"""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find('['), text.rfind(']')
+        if start < 0 or end <= start:
+            raise ValueError('No JSON array in packed response')
+        data = json.loads(text[start:end + 1])
+    if isinstance(data, dict):
+        data = data.get('results') or data.get('items') or [data]
+    if not isinstance(data, list):
+        raise ValueError('Packed response is not a JSON array')
+    return data
+
+
+def split_packed_response(text, ids):
+    """
+    Map item id -> that item's JSON text (the format parse_gemini_response expects).
+    Ids that are missing, duplicated or not objects are left out so they get retried.
+    """
+    wanted = set(ids)
+    found = {}
+    duplicates = set()
+    for obj in _json_array(text):
+        if not isinstance(obj, dict):
+            continue
+        item_id = str(obj.get('id', ''))
+        if item_id not in wanted:
+            continue
+        if item_id in found:
+            duplicates.add(item_id)
+        found[item_id] = json.dumps(obj)
+    for item_id in duplicates:
+        del found[item_id]
+    return found
+
+
+class PackedScorer:
+    """
+    Score BatchItems with as few Gemini calls as the token budget allows.
+    generate(prompt) -> response text; parse(text) -> result dict; is_failure(result) -> bool;
+    single(item) -> result dict scores one item on its own (used for lone items and retries).
+    """
+
+    def __init__(self, generate, parse, single, is_failure=None,
+                 max_tokens=PACKED_PROMPT_MAX_TOKENS, max_items=PACKED_PROMPT_MAX_ITEMS):
+        self.generate = generate
+        self.parse = parse
+        self.single = single
+        self.is_failure = is_failure or (lambda result: False)
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._stats = {'packed_calls': 0, 'packed_items': 0, 'single_calls': 0, 'retried_items': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _score_batch(self, batch):
+        """Yield (item, result) for one batch; result is an Exception if even the retry failed"""
+        parsed = {}
+        if len(batch) > 1:
+            self._count('packed_calls')
+            try:
+                answers = split_packed_response(self.generate(get_packed_ats_prompt(batch)), [item.id for item in batch])
+            except Exception as e:
+                print(f'WARNING: Packed call for {len(batch)} items failed, retrying individually: {e}')
+                answers = {}
+            for item in batch:
+                if item.id in answers:
+                    result = self.parse(answers[item.id])
+                    if not self.is_failure(result):
+                        parsed[item.id] = result
+            self._count('packed_items', len(parsed))
+
+        for item in batch:
+            if item.id in parsed:
+                yield item, parsed[item.id]
+                continue
+            if len(batch) > 1:
+                self._count('retried_items')
+            self._count('single_calls')
+            try:
+                yield item, self.single(item)
+            except Exception as e:
+                yield item, e
+
+    def score(self, items):
+        """Yield (item, result or Exception) for every item, batch by batch"""
+        for batch in plan_batches(items, self.max_tokens, self.max_items):
+            yield from self._score_batch(batch)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max_tokens'] = self.max_tokens
+        stats['max_items'] = self.max_items
+        return stats
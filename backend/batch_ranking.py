@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch resume ranking
+One job description, many candidate PDFs: extract in the sandboxed PDF pool, score locally,
+keep a heap-based top-k, and report each result as soon as it is ready
+"""
+
+import heapq
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pdf_extraction import get_pdf_extraction_pool
+from uploads import MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, open_pdf_upload, pdf_upload_from_stream
+
+MAX_BATCH_RESUMES = int(os.getenv('MAX_BATCH_RESUMES', 500))
+
+
+def collect_uploaded_resumes(files, max_resumes=MAX_BATCH_RESUMES, max_file_bytes=MAX_UPLOAD_BYTES,
+                             max_total_bytes=MAX_BATCH_UPLOAD_BYTES, spooled=None):
+    """
+    Gather (filename, PDFUpload) from a multipart upload: any number of PDFs under
+    'resumes' and/or zip archives under 'resumesZip'. Non-PDF zip entries are skipped.
+    Zip entries are streamed out one at a time (large ones to temp files appended to
+    `spooled`, for the caller to close once the batch is done). An entry above
+    max_file_bytes, or entries expanding past max_total_bytes in all, raise ValueError.
+    """
+    resumes = []
+    total_bytes = 0
+    spooled = [] if spooled is None else spooled
+    try:
+        for storage in files.getlist('resumes'):
+            if storage and storage.filename:
+                upload = open_pdf_upload(storage)
+                total_bytes += upload.size
+                resumes.append((storage.filename, upload))
+        if len(resumes) > max_resumes:
+            raise ValueError(f'Too many resumes in one batch (max {max_resumes})')
+
+        for storage in files.getlist('resumesZip'):
+            with zipfile.ZipFile(storage.stream) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith('.pdf'):
+                        continue
+                    if os.path.basename(info.filename).startswith('.'):
+                        continue  # __MACOSX/._resume.pdf and similar metadata files
+                    if len(resumes) >= max_resumes:
+                        raise ValueError(f'Too many resumes in one batch (max {max_resumes})')
+                    # Declared sizes reject most oversized entries unread; the stream copy enforces the real ones
+                    if info.file_size > max_file_bytes:
+                        raise ValueError(f'{info.filename} is larger than {max_file_bytes} bytes uncompressed')
+                    if total_bytes + info.file_size > max_total_bytes:
+                        raise ValueError(f'Zip contents exceed {max_total_bytes} bytes uncompressed')
+                    with archive.open(info) as entry:
+                        try:
+                            upload, spool = pdf_upload_from_stream(
+                                entry, min(max_file_bytes, max_total_bytes - total_bytes))
+                        except ValueError:
+                            raise ValueError(f'{info.filename} expands past the upload size limits')
+                    if spool is not None:
+                        spooled.append(spool)
+                    total_bytes += upload.size
+                    resumes.append((info.filename, upload))
+    except BaseException:
+        for spool in spooled:
+            spool.close()
+        raise
+    return resumes
+
+
+class TopK:
+    """Keep the k best-scoring entries with a min-heap"""
+
+    def __init__(self, k):
+        self.k = max(1, int(k))
+        self._heap = []
+        self._seq = 0
+
+    def push(self, score, entry):
+        self._seq += 1
+        item = (score, -self._seq, entry)  # earlier entries win ties
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def ranked(self):
+        return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+
+def rank_resumes(resumes, job_description, clean_text, score, top_k=10, extract=None, executor=None):
+    """
+    Yield ('result', entry) for every resume as it finishes, then ('ranking', top_entries).
+    resumes: [(filename, pdf)] where pdf is whatever extract accepts (PDF bytes or a path by default).
+    entry = {'filename', 'atsScore', 'results', 'resumeText'} or {'filename', 'error'}.
+    clean_text may be None when extract already returns cleaned text.
+    Extraction calls block on the process pool, so a thread per pool worker keeps it busy.
+    """
+    pool = get_pdf_extraction_pool()
+    extract = extract or pool.extract_text
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=pool.workers, thread_name_prefix='batch-extract')
+    top = TopK(top_k)
+
+    try:
+        futures = {executor.submit(extract, pdf): filename for filename, pdf in resumes}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                text = future.result()
+                cleaned = clean_text(text) if clean_text else text
+            except Exception as e:
+                yield 'result', {'filename': filename, 'error': f'PDF extraction failed: {e}'}
+                continue
+
+            if not cleaned:
+                yield 'result', {'filename': filename, 'error': 'Could not extract text from PDF'}
+                continue
+
+            results = score(cleaned, job_description)
+            entry = {
+                'filename': filename,
+                'atsScore': results['atsScore'],
+                'results': results,
+                'resumeText': cleaned
+            }
+            top.push(results['atsScore'], entry)
+            yield 'result', entry
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    yield 'ranking', top.ranked()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: streaming JSON extractor vs. the legacy brace-counting scanner
+Run: python bench_json_extractor.py
+"""
+
+import json
+import re
+import timeit
+
+from json_stream import StreamingJSONExtractor, extract_first_json_object
+
+
+def legacy_clean_and_parse_json(text):
+    """The previous clean_and_parse_json scanner (not string-aware), kept for comparison"""
+    json_start_index = re.search(r'\{', text).start()
+    open_braces = 0
+    json_end_index = -1
+    for i, char in enumerate(text[json_start_index:]):
+        if char == '{':
+            open_braces += 1
+        elif char == '}':
+            open_braces -= 1
+            if open_braces == 0:
+                json_end_index = json_start_index + i + 1
+                break
+    return json.loads(text[json_start_index:json_end_index])
+
+
+def build_response(target_bytes=50_000):
+    """Build a realistic ~50 KB Gemini response wrapped in markdown"""
+    improvements = []
+    body = ''
+    while len(body) < target_bytes:
+        n = len(improvements)
+        improvements.append({
+            'section': 'Experience',
+            'original_text': f'Responsible for data cleaning and preprocessing task {n}.',
+            'improved_text': f'Engineered data pipelines that cleaned over {n * 10}GB of raw data, improving data quality by 30%.',
+            'reason': 'Uses a strong action verb and quantifies the impact with specific metrics.',
+            'keywords_added': ['data pipelines', 'data quality']
+        })
+        body = json.dumps({'specific_improvements': improvements}, indent=2)
+    return '```json\n' + body + '\n```'
+
+
+def run(repeat=5, number=20):
+    text = build_response()
+    assert legacy_clean_and_parse_json(text) == extract_first_json_object(text)
+
+    def streamed():
+        extractor = StreamingJSONExtractor(array_key='specific_improvements')
+        for i in range(0, len(text), 256):
+            extractor.feed(text[i:i + 256])
+        return extractor.close()
+
+    cases = [
+        ('legacy scanner', lambda: legacy_clean_and_parse_json(text)),
+        ('extractor (whole text)', lambda: extract_first_json_object(text)),
+        ('extractor (256 B chunks + elements)', streamed),
+    ]
+
+    print(f"Response size: {len(text) / 1024:.1f} KB, {number} parses x {repeat} repeats")
+    baseline = None
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+        baseline = baseline or best
+        print(f"  {name:<38} {best * 1000:8.3f} ms/parse  ({baseline / best:4.1f}x vs legacy)")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Peak-RSS comparison: legacy upload handling vs. spooled, memory-mapped uploads
+Each mode runs in a fresh process that posts one large multipart PDF upload
+(streamed from disk) and reports how much the process's peak RSS grew.
+Run: python bench_upload_memory.py [--size-mb 20]
+"""
+
+import argparse
+import io
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+
+BOUNDARY = 'bench-upload-boundary'
+
+
+def build_pdf(path, size_mb):
+    """A PDF padded with an incompressible image so the upload has the requested size"""
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes('RGB', (side, side), random.randbytes(side * side * 3))
+    pdf = canvas.Canvas(path)
+    pdf.drawString(72, 720, 'Senior Python developer: Flask, MongoDB, Docker, AWS')
+    pdf.drawImage(ImageReader(image), 72, 72, width=400, height=400)
+    pdf.save()
+
+
+def build_multipart_body(pdf_path, body_path):
+    with open(pdf_path, 'rb') as source, open(body_path, 'wb') as body:
+        body.write((
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="resume"; filename="resume.pdf"\r\n'
+            'Content-Type: application/pdf\r\n\r\n'
+        ).encode())
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            body.write(chunk)
+        body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+
+
+def peak_rss_mb():
+    """Peak RSS of this process; VmHWM because ru_maxrss survives exec from the parent"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run_mode(mode, body_path):
+    from flask import Flask, request
+    from reportlab.pdfgen import canvas
+
+    from pdf_extraction import PDFExtractionPool
+    from uploads import SpooledUploadRequest, open_pdf_upload
+
+    app = Flask(__name__)
+    pool = PDFExtractionPool(workers=1, memory_limit_mb=0)
+    if mode == 'spooled':
+        app.request_class = SpooledUploadRequest
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        resume_file = request.files['resume']
+        if mode == 'legacy':
+            # The previous pdf_to_text: read() plus a BytesIO wrapper, bytes pickled to the worker
+            pdf_bytes = io.BytesIO(resume_file.read())
+            text = pool.extract_text(pdf_bytes.getvalue())
+        else:
+            text = pool.extract_text(open_pdf_upload(resume_file).source)
+        return {'length': len(text)}
+
+    client = app.test_client()
+    # Warm up imports, the worker process and Flask with a tiny upload first
+    warm_up = io.BytesIO()
+    canvas.Canvas(warm_up).save()
+    client.post('/upload', data={'resume': (io.BytesIO(warm_up.getvalue()), 'warm-up.pdf')})
+    baseline = peak_rss_mb()
+    size = os.path.getsize(body_path)
+    with open(body_path, 'rb') as body:
+        response = client.post(
+            '/upload',
+            input_stream=body,
+            content_type=f'multipart/form-data; boundary={BOUNDARY}',
+            content_length=size
+        )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    pool.shutdown()
+    print(f'{peak_rss_mb() - baseline:.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure per-upload peak RSS')
+    parser.add_argument('--size-mb', type=float, default=20)
+    parser.add_argument('--mode', choices=['legacy', 'spooled'])
+    parser.add_argument('--body')
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.body)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_path = os.path.join(workdir, 'resume.pdf')
+        body_path = os.path.join(workdir, 'body.bin')
+        build_pdf(pdf_path, args.size_mb)
+        build_multipart_body(pdf_path, body_path)
+        upload_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+
+        print(f'Upload size: {upload_mb:.1f} MB')
+        results = {}
+        for mode in ('legacy', 'spooled'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--body', body_path],
+                capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout.strip().splitlines()[-1]
+            results[mode] = float(output)
+            print(f'{mode:>8}: peak RSS +{results[mode]:.1f} MB')
+
+        saved = results['legacy'] - results['spooled']
+        print(f'Peak RSS reduction per upload: {saved:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
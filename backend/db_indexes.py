@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MongoDB index management
+Declares the indexes the API's queries rely on and creates whichever are missing.
+Runs at app startup (MONGO_ENSURE_INDEXES) and as a command:
+
+    python db_indexes.py          # create missing indexes, print what changed
+    python db_indexes.py --list   # print the indexes of every managed collection
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+DATABASE_NAME = 'resume_analyzer'
+
+IndexSpec = namedtuple('IndexSpec', ['collection', 'name', 'keys', 'options'])
+
+INDEXES = [
+    # Registration relies on this to reject a second account for the same email
+    IndexSpec('users', 'email_unique', [('email', ASCENDING)], {'unique': True}),
+    # get_user_resumes: equality on user_id and is_active, then the keyset order (newest first, _id tiebreak)
+    IndexSpec('resumes', 'user_active_updated_id',
+              [('user_id', ASCENDING), ('is_active', ASCENDING), ('updated_at', DESCENDING), ('_id', DESCENDING)], {}),
+    # Resume search: multikey on the normalized tokens, prefix-matched with anchored patterns
+    IndexSpec('resumes', 'user_active_search',
+              [('user_id', ASCENDING), ('is_active', ASCENDING), ('search_tokens', ASCENDING)], {}),
+    IndexSpec('ats_evaluations', 'user_created',
+              [('user_id', ASCENDING), ('created_at', DESCENDING)], {}),
+]
+
+# (collection, index name) superseded by an index above; dropped once the replacement exists
+OBSOLETE_INDEXES = [
+    ('resumes', 'user_active_updated'),  # Now user_active_updated_id, which adds the keyset tiebreak
+]
+
+# Outcomes
+CREATED = 'created'
+EXISTS = 'exists'
+FAILED = 'failed'
+DROPPED = 'dropped'
+
+
+def ensure_indexes(db, specs=INDEXES, obsolete=OBSOLETE_INDEXES):
+    """Create missing indexes and drop superseded ones; returns [(spec, outcome, error message or None)]"""
+    report = []
+    for spec in specs:
+        collection = db[spec.collection]
+        try:
+            if spec.name in collection.index_information():
+                report.append((spec, EXISTS, None))
+                continue
+            collection.create_index(spec.keys, name=spec.name, **spec.options)
+            report.append((spec, CREATED, None))
+            print(f'SUCCESS: Created index {spec.collection}.{spec.name}')
+        except DuplicateKeyError as e:
+            report.append((spec, FAILED, str(e)))
+            print(f'WARNING: Index {spec.collection}.{spec.name} not created, existing documents '
+                  f'violate uniqueness; remove the duplicates and rerun db_indexes.py: {e}')
+        except OperationFailure as e:
+            report.append((spec, FAILED, str(e)))
+            print(f'WARNING: Index {spec.collection}.{spec.name} not created: {e}')
+
+    in_place = {spec.collection for spec, outcome, _ in report if outcome != FAILED}
+    for collection_name, index_name in obsolete:
+        collection = db[collection_name]
+        # Only once the collection's replacement indexes are in place, so queries never lose their index
+        if collection_name not in in_place or index_name not in collection.index_information():
+            continue
+        try:
+            collection.drop_index(index_name)
+            report.append((IndexSpec(collection_name, index_name, None, {}), DROPPED, None))
+            print(f'SUCCESS: Dropped superseded index {collection_name}.{index_name}')
+        except OperationFailure as e:
+            print(f'WARNING: Could not drop superseded index {collection_name}.{index_name}: {e}')
+    return report
+
+
+def list_indexes(db, specs=INDEXES):
+    """{collection: {index name: key spec}} for every collection in specs"""
+    return {
+        name: {index: info['key'] for index, info in db[name].index_information().items()}
+        for name in sorted({spec.collection for spec in specs})
+    }
+
+
+def main(argv):
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    from ai_usage import UsageTracker
+    from job_queue import JobQueue
+
+    load_dotenv()
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        print('ERROR: MONGODB_URI missing in .env')
+        return 1
+    db = MongoClient(mongodb_uri)[DATABASE_NAME]
+
+    if '--list' in argv:
+        for collection, indexes in list_indexes(db).items():
+            print(f'{collection}:')
+            for name, keys in indexes.items():
+                print(f'  - {name}: {keys}')
+        return 0
+
+    report = ensure_indexes(db)
+    # Subsystems that own their collections' indexes
+    JobQueue(db['ai_jobs']).ensure_indexes()
+    UsageTracker(db['ai_usage']).ensure_indexes()
+
+    for spec, outcome, error in report:
+        print(f'  - {spec.collection}.{spec.name}: {outcome}' + (f' ({error})' if error else ''))
+    failed = sum(1 for _, outcome, _ in report if outcome == FAILED)
+    managed = sum(1 for _, outcome, _ in report if outcome != DROPPED)
+    print(f'{"ERROR" if failed else "SUCCESS"}: {managed - failed}/{managed} indexes in place')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
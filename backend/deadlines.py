@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency budgets for AI routes
+A Deadline runs provider work on a shared pool and stops waiting when the request's
+budget is spent; routes then answer from local scoring, marked degraded, instead of
+failing. Work that outlives its deadline finishes in the background (and still fills
+the caches for the next request).
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from resilience import FATAL, ResilienceError, classify_error
+
+AI_LATENCY_BUDGET_SECONDS = float(os.getenv('AI_LATENCY_BUDGET_SECONDS', 25))
+AI_LATENCY_BUDGET_MAX_SECONDS = float(os.getenv('AI_LATENCY_BUDGET_MAX_SECONDS', 120))
+DEADLINE_WORKERS = int(os.getenv('DEADLINE_WORKERS', 32))
+LATENCY_BUDGET_HEADER = 'X-Latency-Budget-Ms'
+
+# Degraded reasons
+REASON_TIMEOUT = 'timeout'
+REASON_UNAVAILABLE = 'provider_unavailable'  # Circuit open, no concurrency slot, no API key
+REASON_PROVIDER_ERROR = 'provider_error'     # Transient provider failures outlasted the retries
+
+
+class DeadlineExceededError(TimeoutError):
+    """The latency budget ran out before the provider answered"""
+
+
+def parse_latency_budget(value, default=AI_LATENCY_BUDGET_SECONDS, maximum=AI_LATENCY_BUDGET_MAX_SECONDS):
+    """Seconds from a millisecond value sent by the client; default when absent, clamped to maximum"""
+    if value in (None, ''):
+        return default
+    try:
+        milliseconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('latencyBudgetMs must be a number of milliseconds')
+    if milliseconds <= 0:
+        raise ValueError('latencyBudgetMs must be positive')
+    return min(milliseconds / 1000.0, maximum)
+
+
+def degraded_reason(error):
+    """Why a failed AI call may be answered locally, or None if it should surface as an error"""
+    if isinstance(error, DeadlineExceededError):
+        return REASON_TIMEOUT
+    if isinstance(error, ResilienceError):
+        return REASON_UNAVAILABLE
+    if classify_error(error) != FATAL:
+        return REASON_PROVIDER_ERROR
+    return None
+
+
+class DeadlineRunner:
+    """Shared pool that runs work under deadlines, with counters for /api/metrics"""
+
+    def __init__(self, max_workers=DEADLINE_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'expired': 0, 'degraded': {}}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='deadline')
+            return self._executor
+
+    def deadline(self, seconds):
+        return Deadline(seconds, self)
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            self._stats['calls'] += 1
+        # A copy of the caller's context, so request-scoped state (usage attribution) follows the work
+        return self._get_executor().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def record_expired(self):
+        with self._lock:
+            self._stats['expired'] += 1
+
+    def record_degraded(self, route, reason):
+        with self._lock:
+            by_route = self._stats['degraded'].setdefault(route or 'unknown', {})
+            by_route[reason] = by_route.get(reason, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self._stats['calls'],
+                'expired': self._stats['expired'],
+                'degraded': {route: dict(reasons) for route, reasons in self._stats['degraded'].items()},
+                'default_budget_seconds': AI_LATENCY_BUDGET_SECONDS,
+                'max_budget_seconds': AI_LATENCY_BUDGET_MAX_SECONDS
+            }
+
+
+class Deadline:
+    """A point in time shared by every provider call a request makes"""
+
+    def __init__(self, seconds, runner, clock=time.monotonic):
+        self.seconds = seconds
+        self.runner = runner
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs), or DeadlineExceededError once the budget is spent"""
+        if self.expired():
+            self.runner.record_expired()
+            raise DeadlineExceededError(f'Latency budget of {self.seconds:g}s spent')
+        future = self.runner.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            if future.done():
+                raise  # fn's own timeout (socket.timeout is a TimeoutError too)
+            # Drop the call if it is still queued; only one already running finishes in the background
+            future.cancel()
+            self.runner.record_expired()
+            raise DeadlineExceededError(f'No answer within the {self.seconds:g}s latency budget')
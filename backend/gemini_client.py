@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide Gemini model registry
+Model handles are created once per worker and share the SDK's long-lived transport
+"""
+
+import threading
+import time
+
+import google.generativeai as genai
+
+
+class GeminiModelRegistry:
+    """Create GenerativeModel handles once and route every Gemini call through them"""
+
+    def __init__(self, default_model_name, generation_config=None, usage_tracker=None, resilience=None, hedger=None,
+                 model_factory=None):
+        self.default_model_name = default_model_name
+        self.model_factory = model_factory or genai.GenerativeModel
+        self.default_generation_config = dict(generation_config or {})
+        self.usage_tracker = usage_tracker  # ai_usage.UsageTracker; records tokens of every response
+        self.resilience = resilience  # resilience.ResilientCaller; retries, concurrency limit, circuit breaker
+        self.hedger = hedger  # hedging.Hedger; second identical call when a non-stream call runs long
+        self._models = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.warmed_up = False
+
+    def get_model(self, model_name=None):
+        """Return the cached handle for model_name (default model if omitted)"""
+        name = model_name or self.default_model_name
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self.model_factory(name)
+                    self._models[name] = model
+                    print(f'SUCCESS: Gemini model handle created: {name}')
+        return model
+
+    def generation_config(self, overrides=None):
+        """Default generation config with per-call overrides applied"""
+        config = dict(self.default_generation_config)
+        config.update(overrides or {})
+        return config
+
+    def generate_content(self, prompt, model_name=None, generation_config=None, stream=False):
+        model = self.get_model(model_name)
+        config = self.generation_config(generation_config)
+        kwargs = {'stream': True} if stream else {}
+        if config:
+            kwargs['generation_config'] = config
+        name = model_name or self.default_model_name
+        with self._lock:
+            self.calls += 1
+
+        def attempt():
+            if self.resilience is not None:
+                # For streams this covers opening the stream; errors while reading chunks reach the caller
+                response = self.resilience.call(model.generate_content, prompt, **kwargs)
+            else:
+                response = model.generate_content(prompt, **kwargs)
+            if self.usage_tracker is not None:
+                # Tracked per attempt, so the losing call of a hedged pair is billed too
+                return self.usage_tracker.track(prompt, response, name, stream=stream)
+            return response
+
+        if self.hedger is not None and not stream:
+            return self.hedger.call(attempt, name)
+        return attempt()
+
+    def warm_up(self):
+        """Issue a tiny request so connection/TLS setup happens before the first user request"""
+        start_time = time.time()
+        try:
+            self.generate_content('Reply with OK.', generation_config={'max_output_tokens': 1})
+            self.warmed_up = True
+            print(f'SUCCESS: Gemini warm-up completed in {time.time() - start_time:.2f} seconds')
+        except Exception as e:
+            print(f'WARNING: Gemini warm-up failed: {e}')
+
+    def warm_up_in_background(self):
+        thread = threading.Thread(target=self.warm_up, name='gemini-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        return {
+            'default_model': self.default_model_name,
+            'models': sorted(self._models),
+            'generation_config': self.default_generation_config,
+            'calls': self.calls,
+            'warmed_up': self.warmed_up
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hedged provider requests
+If a call is still running after a high percentile of recently observed latency for its
+model, an identical second call is started and whichever returns first wins. A token
+bucket caps hedges to a fraction of all calls.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+GEMINI_HEDGING = os.getenv('GEMINI_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+GEMINI_HEDGE_PERCENTILE = float(os.getenv('GEMINI_HEDGE_PERCENTILE', 95))
+GEMINI_HEDGE_BUDGET = float(os.getenv('GEMINI_HEDGE_BUDGET', 0.05))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv('GEMINI_HEDGE_MIN_SAMPLES', 20))
+GEMINI_HEDGE_WINDOW = 200
+GEMINI_HEDGE_WORKERS = 64
+# Unused hedge allowance that may accumulate during quiet periods
+HEDGE_BURST = 5.0
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per model"""
+
+    def __init__(self, window=GEMINI_HEDGE_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, model):
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def percentile(self, model, percentile):
+        """Nearest-rank percentile of the window, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        rank = max(1, -(-len(samples) * percentile // 100))  # ceil without floats drifting
+        return samples[int(rank) - 1]
+
+    def models(self):
+        with self._lock:
+            return sorted(self._samples)
+
+
+class HedgeBudget:
+    """Token bucket: every call earns `ratio` of a hedge, a hedge spends one"""
+
+    def __init__(self, ratio=GEMINI_HEDGE_BUDGET, burst=HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class Hedger:
+    """Run calls with an optional hedge after the model's latency percentile"""
+
+    def __init__(self, enabled=GEMINI_HEDGING, percentile=GEMINI_HEDGE_PERCENTILE,
+                 budget=None, min_samples=GEMINI_HEDGE_MIN_SAMPLES, tracker=None,
+                 max_workers=GEMINI_HEDGE_WORKERS):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget or HedgeBudget()
+        self.min_samples = max(1, min_samples)
+        self.tracker = tracker or LatencyTracker()
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'hedged_calls': 0, 'hedge_wins': 0, 'budget_exhausted': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hedge')
+            return self._executor
+
+    def _timed(self, fn, model):
+        start = time.monotonic()
+        result = fn()
+        self.tracker.record(model, time.monotonic() - start)
+        return result
+
+    def _submit(self, fn, model):
+        # A copy of the caller's context, so request-scoped state follows the call
+        return self._get_executor().submit(contextvars.copy_context().run, self._timed, fn, model)
+
+    def hedge_delay(self, model):
+        """Seconds to wait before hedging, or None while hedging is off or still learning"""
+        if not self.enabled or self.tracker.count(model) < self.min_samples:
+            return None
+        return self.tracker.percentile(model, self.percentile)
+
+    def call(self, fn, model):
+        """fn() (no arguments), hedged with a second fn() when it runs long"""
+        self._count('calls')
+        self.budget.earn()
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self._timed(fn, model)
+
+        primary = self._submit(fn, model)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if not self.budget.try_spend():
+            self._count('budget_exhausted')
+            return primary.result()
+
+        self._count('hedged_calls')
+        hedge = self._submit(fn, model)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count('hedge_wins')
+                    return future.result()  # The other call finishes in the background
+                error = future.exception()
+        raise error
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['percentile'] = self.percentile
+        stats['budget_ratio'] = self.budget.ratio
+        stats['hedge_rate'] = round(stats['hedged_calls'] / stats['calls'], 4) if stats['calls'] else 0.0
+        stats['models'] = {
+            model: {
+                'samples': self.tracker.count(model),
+                'p50_seconds': round(self.tracker.percentile(model, 50), 3),
+                'hedge_after_seconds': round(self.tracker.percentile(model, self.percentile), 3)
+            }
+            for model in self.tracker.models()
+        }
+        return stats
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Durable background job queue backed by MongoDB
+Jobs are claimed with a lease; expired leases are retried and exhausted jobs are dead-lettered
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+DEAD_LETTER = 'dead_letter'
+
+
+def new_worker_id():
+    """Identify a worker by host, pid and a random suffix"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class JobQueue:
+    """Mongo-backed queue with leases, retry counts and dead-lettering"""
+
+    def __init__(self, collection, lease_seconds=300, max_attempts=3, retry_delay_seconds=5):
+        self.collection = collection
+        self.lease_seconds = int(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self.retry_delay_seconds = int(retry_delay_seconds)
+
+    def ensure_indexes(self):
+        self.collection.create_index([('status', ASCENDING), ('available_at', ASCENDING)])
+        self.collection.create_index([('status', ASCENDING), ('lease_expires_at', ASCENDING)])
+        self.collection.create_index([('user_id', ASCENDING), ('created_at', DESCENDING)])
+
+    def enqueue(self, job_type, payload, user_id=None):
+        """Add a job and return its id as a string"""
+        now = datetime.utcnow()
+        job_doc = {
+            'type': job_type,
+            'payload': payload,
+            'user_id': ObjectId(user_id) if user_id else None,
+            'status': QUEUED,
+            'attempts': 0,
+            'max_attempts': self.max_attempts,
+            'available_at': now,
+            'lease_expires_at': None,
+            'worker_id': None,
+            'result': None,
+            'last_error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        result = self.collection.insert_one(job_doc)
+        return str(result.inserted_id)
+
+    def claim(self, worker_id):
+        """Atomically lease the oldest runnable job, including ones whose lease has expired"""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                'attempts': {'$lt': self.max_attempts},
+                '$or': [
+                    {'status': QUEUED, 'available_at': {'$lte': now}},
+                    {'status': RUNNING, 'lease_expires_at': {'$lt': now}}
+                ]
+            },
+            {
+                '$set': {
+                    'status': RUNNING,
+                    'worker_id': worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'updated_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('available_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def extend_lease(self, job_id, worker_id):
+        """Renew the lease of a running job; returns False if the lease was lost"""
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker_id': worker_id},
+            {'$set': {
+                'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                'updated_at': now
+            }}
+        )
+        return result.matched_count == 1
+
+    def complete(self, job_id, worker_id, result):
+        now = datetime.utcnow()
+        update = self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker_id': worker_id},
+            {'$set': {
+                'status': COMPLETED,
+                'result': result,
+                'lease_expires_at': None,
+                'completed_at': now,
+                'updated_at': now
+            }}
+        )
+        return update.matched_count == 1
+
+    def fail(self, job_id, worker_id, error):
+        """Record a failed attempt; requeue with a delay or dead-letter when attempts are exhausted"""
+        now = datetime.utcnow()
+        job = self.collection.find_one({'_id': ObjectId(job_id), 'worker_id': worker_id}, {'attempts': 1})
+        if not job:
+            return None
+
+        if job.get('attempts', 0) >= self.max_attempts:
+            status = DEAD_LETTER
+            available_at = now
+        else:
+            status = QUEUED
+            available_at = now + timedelta(seconds=self.retry_delay_seconds * job.get('attempts', 1))
+
+        self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': RUNNING, 'worker_id': worker_id},
+            {'$set': {
+                'status': status,
+                'available_at': available_at,
+                'lease_expires_at': None,
+                'last_error': str(error)[:1000],
+                'updated_at': now
+            }}
+        )
+        return status
+
+    def reap_expired(self):
+        """Dead-letter jobs whose worker died on the final attempt"""
+        now = datetime.utcnow()
+        result = self.collection.update_many(
+            {
+                'status': RUNNING,
+                'lease_expires_at': {'$lt': now},
+                'attempts': {'$gte': self.max_attempts}
+            },
+            {'$set': {
+                'status': DEAD_LETTER,
+                'lease_expires_at': None,
+                'last_error': 'Lease expired on final attempt',
+                'updated_at': now
+            }}
+        )
+        return result.modified_count
+
+    def get(self, job_id, user_id=None):
+        query = {'_id': ObjectId(job_id)}
+        if user_id:
+            query['user_id'] = ObjectId(user_id)
+        return self.collection.find_one(query)
+
+    def counts(self):
+        """Number of jobs per status"""
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        return {row['_id']: row['count'] for row in self.collection.aggregate(pipeline)}
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental JSON extraction for AI responses
+Single-pass, resumable and string-aware: braces inside string values never end an object
+"""
+
+import json
+import re
+
+# Tokens the scanner cares about: a whole string literal (group 1 is the closing
+# quote, missing if the string continues in a later chunk) or a structural character
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*(")?'
+_OBJECT_TOKENS = re.compile(_STRING + r'|[{}]')
+_ARRAY_TOKENS = re.compile(_STRING + r'|[{}\[\]:,]')
+
+
+class StreamingJSONExtractor:
+    """
+    Feed text chunks (markdown fences and surrounding prose are skipped).
+
+    - `result` holds the first complete top-level object once it has closed.
+    - If `array_key` is given, `feed()` returns elements of that top-level
+      array as soon as each one is complete.
+    """
+
+    def __init__(self, array_key=None):
+        self.array_key = array_key
+        self.result = None
+        self.done = False
+        self._buf = ''
+        self._pos = 0
+        self._object_start = -1
+        self._tokens = _ARRAY_TOKENS if array_key is not None else _OBJECT_TOKENS
+        self._last_string = None
+        self._pending_key = None
+        self._stack = []            # open containers: '{' or '['
+        self._array_depth = None    # stack depth of the target array once found
+        self._element_start = -1
+
+    def feed(self, chunk):
+        """Consume a chunk and return the list of newly completed array elements"""
+        if not chunk or self.done:
+            return []
+        if self._object_start < 0:
+            # Nothing worth keeping until the top-level object opens
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+        else:
+            self._buf += chunk
+
+        completed = []
+        buf = self._buf
+        pos = self._pos
+        end = len(buf)
+        tokens = self._tokens
+
+        while pos < end:
+            if not self._stack:
+                # Outside any object only an opening brace matters
+                index = buf.find('{', pos)
+                if index < 0:
+                    pos = end
+                    break
+                self._object_start = index
+                self._stack.append('{')
+                pos = index + 1
+                continue
+
+            match = tokens.search(buf, pos)
+            if match is None:
+                pos = end
+                break
+            token = match.group()
+            char = token[0]
+
+            if char == '"':
+                if match.group(1) is None:
+                    # String continues in the next chunk; rescan it from its opening quote
+                    pos = match.start()
+                    break
+                self._last_string = token
+                pos = match.end()
+                continue
+
+            index = match.start()
+            pos = index + 1
+
+            if char == ':':
+                self._pending_key = self._last_string
+            elif char == ',':
+                self._pending_key = None
+            elif char in '{[':
+                is_target = (
+                    char == '[' and self._array_depth is None
+                    and len(self._stack) == 1 and self._pending_key is not None
+                    and _decode_string(self._pending_key) == self.array_key
+                )
+                self._stack.append(char)
+                self._pending_key = None
+                if is_target:
+                    self._array_depth = len(self._stack)
+                elif self._array_depth is not None and len(self._stack) == self._array_depth + 1:
+                    self._element_start = index
+            else:
+                self._stack.pop()
+                if not self._stack:
+                    self._finish(buf[self._object_start:index + 1])
+                    break
+                if self._array_depth is None:
+                    continue
+                if len(self._stack) == self._array_depth and self._element_start >= 0:
+                    element = _decode_element(buf[self._element_start:index + 1])
+                    if element is not None:
+                        completed.append(element)
+                    self._element_start = -1
+                elif len(self._stack) < self._array_depth:
+                    self._array_depth = -1  # target array closed; nothing more to emit
+
+        self._pos = pos
+        return completed
+
+    def _finish(self, json_str):
+        self.done = True
+        try:
+            self.result = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to decode JSON: {e}. Content: '{json_str[:200]}...'")
+
+    def close(self):
+        """Signal end of input; returns the parsed object or raises ValueError"""
+        if self.done:
+            return self.result
+        if self._object_start < 0:
+            raise ValueError("No JSON object found in the response.")
+        raise ValueError("Could not find a complete JSON object in the response.")
+
+
+def extract_first_json_object(text):
+    """Parse the first complete top-level JSON object in text"""
+    extractor = StreamingJSONExtractor()
+    extractor.feed(text)
+    return extractor.close()
+
+
+def _decode_string(raw):
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+
+
+def _decode_element(raw):
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f'WARNING: Skipping malformed streamed element: {e}')
+        return None
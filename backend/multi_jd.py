@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-JD evaluation
+One resume, many job descriptions: the resume is extracted and cleaned once, every JD
+is scored on a bounded thread pool (local score, then the optional Gemini analysis),
+and each result is reported as soon as it finishes
+"""
+
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MAX_JOB_DESCRIPTIONS = int(os.getenv('MULTI_JD_MAX', 20))
+MULTI_JD_CONCURRENCY = int(os.getenv('MULTI_JD_CONCURRENCY', 4))
+
+
+def parse_job_descriptions(raw, max_items=MAX_JOB_DESCRIPTIONS):
+    """
+    Accept a list (or JSON-encoded list) of strings or {'id', 'title', 'jobDescription'} objects.
+    Returns [{'id', 'title', 'jobDescription'}]; raises ValueError on bad input.
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            raise ValueError('jobDescriptions must be a JSON array')
+    if not isinstance(raw, list) or not raw:
+        raise ValueError('jobDescriptions must be a non-empty array')
+    if len(raw) > max_items:
+        raise ValueError(f'Too many job descriptions (max {max_items})')
+
+    job_descriptions = []
+    for index, item in enumerate(raw):
+        if isinstance(item, str):
+            item = {'jobDescription': item}
+        if not isinstance(item, dict) or not str(item.get('jobDescription') or '').strip():
+            raise ValueError(f'Job description {index} is empty')
+        job_descriptions.append({
+            'id': str(item.get('id') or index),
+            'title': item.get('title'),
+            'jobDescription': str(item['jobDescription']).strip()
+        })
+    return job_descriptions
+
+
+def evaluate_job_descriptions(resume_text, job_descriptions, score, analyze=None, merge=None,
+                              max_workers=MULTI_JD_CONCURRENCY, executor=None):
+    """
+    Yield one entry per job description, in completion order:
+    {'index', 'id', 'title', 'atsScore', 'results', 'analysisSource'} plus 'aiError' and
+    'degraded': True when analyze failed and the local score was kept.
+    analyze(job_description, resume_text) is the slow (Gemini) call; merge(local, ai) combines them.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(job_descriptions))),
+            thread_name_prefix='multi-jd'
+        )
+
+    def evaluate(index, item):
+        results = score(resume_text, item['jobDescription'])
+        entry = {'index': index, 'id': item['id'], 'title': item['title'], 'analysisSource': 'local'}
+        if analyze is not None:
+            try:
+                ai_results = analyze(item['jobDescription'], resume_text)
+                results = merge(results, ai_results) if merge else ai_results
+                entry['analysisSource'] = 'gemini'
+            except Exception as e:
+                entry['aiError'] = str(e)
+                entry['degraded'] = True
+        entry['atsScore'] = results.get('atsScore')
+        entry['results'] = results
+        return entry
+
+    try:
+        # Each task runs in a copy of the caller's context, so per-request state
+        # (such as AI usage attribution) follows the work onto the pool threads
+        futures = {
+            executor.submit(contextvars.copy_context().run, evaluate, index, item): index
+            for index, item in enumerate(job_descriptions)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                item = job_descriptions[index]
+                yield {'index': index, 'id': item['id'], 'title': item['title'], 'error': str(e)}
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
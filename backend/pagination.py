@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyset pagination for list endpoints
+Pages continue from an opaque cursor holding the last (updated_at, _id) seen, so deep
+pages cost the same as the first one. Totals come from a short-lived per-user counter
+instead of a count on every request.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+RESUMES_MAX_PAGE_SIZE = int(os.getenv('RESUMES_MAX_PAGE_SIZE', 50))
+RESUME_COUNT_TTL_SECONDS = float(os.getenv('RESUME_COUNT_TTL_SECONDS', 60))
+COUNT_CACHE_MAX_ENTRIES = 10000
+
+# Sort order the cursor follows: newest first, _id breaks ties between equal timestamps
+KEYSET_SORT = [('updated_at', -1), ('_id', -1)]
+
+
+class InvalidCursorError(ValueError):
+    """The cursor wasn't issued by this API (or was altered)"""
+
+
+def page_size(value, default=10, maximum=RESUMES_MAX_PAGE_SIZE):
+    """Requested page size clamped to [1, maximum]; ValueError if it isn't an integer"""
+    if value in (None, ''):
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return min(max(size, 1), maximum)
+
+
+def _encode(payload):
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Invalid cursor')
+    if not isinstance(payload, dict):
+        raise InvalidCursorError('Invalid cursor')
+    return payload
+
+
+def encode_keyset_cursor(doc):
+    """Cursor continuing after doc in KEYSET_SORT order"""
+    updated_at = doc.get('updated_at')
+    return _encode({'u': updated_at.isoformat() if updated_at else None, 'i': str(doc['_id'])})
+
+
+def encode_offset_cursor(offset):
+    """Cursor for result lists ranked in memory (search), where the position is the key"""
+    return _encode({'o': offset})
+
+
+def decode_cursor(cursor):
+    """('keyset', (updated_at, _id)) or ('offset', n); raises InvalidCursorError"""
+    payload = _decode(cursor)
+    try:
+        if 'o' in payload:
+            offset = int(payload['o'])
+            if offset < 0:
+                raise ValueError(offset)
+            return 'offset', offset
+        updated_at = datetime.fromisoformat(payload['u']) if payload['u'] else None
+        return 'keyset', (updated_at, ObjectId(payload['i']))
+    except (KeyError, TypeError, ValueError, InvalidId):
+        raise InvalidCursorError('Invalid cursor')
+
+
+def keyset_filter(position):
+    """Query clause for documents after position in KEYSET_SORT order"""
+    updated_at, last_id = position
+    if updated_at is None:
+        # Documents without updated_at sort last; continue among them by _id
+        return {'updated_at': None, '_id': {'$lt': last_id}}
+    return {'$or': [
+        {'updated_at': {'$lt': updated_at}},
+        {'updated_at': updated_at, '_id': {'$lt': last_id}},
+        {'updated_at': None}
+    ]}
+
+
+class CountCache:
+    """Per-key counts kept for ttl_seconds; writers invalidate their key"""
+
+    def __init__(self, ttl_seconds=RESUME_COUNT_TTL_SECONDS, max_entries=COUNT_CACHE_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, key, compute):
+        """Cached count for key, or compute() stored for the next ttl_seconds"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+        count = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (count, now + self.ttl_seconds)
+        return count
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sandboxed PDF text extraction
+PyPDF2 runs in a pool of worker processes with a wall-clock timeout and a memory
+rlimit per task; large documents are split across workers by page range
+"""
+
+import io
+import mmap
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts are enforced by the parent only
+    resource = None
+
+PDF_EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', os.cpu_count() or 2))
+PDF_TASK_TIMEOUT_SECONDS = float(os.getenv('PDF_TASK_TIMEOUT_SECONDS', 15))
+PDF_QUEUE_TIMEOUT_SECONDS = float(os.getenv('PDF_QUEUE_TIMEOUT_SECONDS', 30))
+PDF_WORKER_MEMORY_MB = int(os.getenv('PDF_WORKER_MEMORY_MB', 512))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 50))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 8))
+
+# text: pages joined exactly like the old inline extraction
+# page_seconds: extraction time of each extracted page, in page order
+PDFText = namedtuple('PDFText', ['text', 'page_count', 'pages_extracted', 'page_seconds', 'truncated', 'seconds'])
+
+
+class PDFExtractionError(Exception):
+    """The PDF could not be read, or the worker hit its time or memory limit"""
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a task exceeds its wall-clock budget"""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _address_space_in_use():
+    """Current virtual memory size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _mp_context():
+    """
+    Workers start from a forkserver (spawn where there is none): forking the multithreaded
+    server process directly could copy locks other threads hold into the child. The entry
+    script is re-imported in workers, so it must keep its startup under __main__.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])  # Workers fork with PyPDF2 already imported
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _init_worker(memory_limit_bytes):
+    """Worker initializer: cap memory and arm the per-task timeout handler"""
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    if resource is not None and memory_limit_bytes:
+        # The limit is headroom on top of what the worker has mapped at start
+        limit = _address_space_in_use() + memory_limit_bytes
+        try:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        except (ValueError, OSError) as e:
+            print(f'WARNING: Could not set PDF worker memory limit: {e}')
+
+
+def _open_source(source):
+    """PDF bytes, or the path of a spooled upload which is memory-mapped rather than read"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(source)
+
+
+def _extract_page_range(source, start, stop, timeout):
+    """Runs in a worker: returns (page_count, [(text, seconds)]) for pages start..stop-1"""
+    armed = timeout and hasattr(signal, 'setitimer')
+    if armed:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    stream = None
+    try:
+        stream = _open_source(source)
+        reader = PdfReader(stream)
+        page_count = len(reader.pages)
+        pages = []
+        for index in range(start, min(stop, page_count)):
+            page_start = time.perf_counter()
+            text = reader.pages[index].extract_text() or ''
+            pages.append((text, time.perf_counter() - page_start))
+        return page_count, pages
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if stream is not None:
+            stream.close()
+
+
+class PDFExtractionPool:
+    """Process pool for PDF extraction; a stuck or crashed worker pool is killed and rebuilt"""
+
+    def __init__(self, workers=PDF_EXTRACTION_WORKERS, task_timeout=PDF_TASK_TIMEOUT_SECONDS,
+                 queue_timeout=PDF_QUEUE_TIMEOUT_SECONDS, memory_limit_mb=PDF_WORKER_MEMORY_MB,
+                 max_pages=PDF_MAX_PAGES, pages_per_task=PDF_PAGES_PER_TASK):
+        self.workers = max(1, workers)
+        self.task_timeout = task_timeout
+        self.queue_timeout = queue_timeout
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+        self.max_pages = max_pages
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'documents': 0,
+            'pages': 0,
+            'truncated': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'memory_errors': 0,
+            'pool_resets': 0,
+            'page_seconds_total': 0.0,
+            'slowest_page_seconds': 0.0
+        }
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_mp_context(),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_bytes,)
+                )
+            return self._executor, self._generation
+
+    def _reset(self, generation):
+        """Kill the workers of a stuck or broken pool; the next task starts a fresh one"""
+        with self._lock:
+            if generation != self._generation or self._executor is None:
+                return  # Another request already replaced it
+            executor = self._executor
+            self._executor = None
+            self._generation += 1
+            self._stats['pool_resets'] += 1
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        print('WARNING: PDF extraction pool reset')
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _run(self, source, ranges, retry=True):
+        """Run page-range tasks in parallel and return their results in range order"""
+        executor, generation = self._get_executor()
+        try:
+            futures = [
+                executor.submit(_extract_page_range, source, start, stop, self.task_timeout)
+                for start, stop in ranges
+            ]
+            # Parent-side backstop for hangs the in-worker timer can't interrupt
+            deadline = time.monotonic() + self.task_timeout + self.queue_timeout
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except ExtractionTimeout:
+            self._count('timeouts')
+            raise PDFExtractionError(f'PDF extraction timed out after {self.task_timeout:g} seconds')
+        except FutureTimeoutError:
+            self._count('timeouts')
+            self._reset(generation)
+            raise PDFExtractionError('PDF extraction worker did not respond')
+        except MemoryError:
+            self._count('memory_errors')
+            raise PDFExtractionError('PDF extraction exceeded the worker memory limit')
+        except BrokenProcessPool:
+            stale = generation != self._generation
+            self._reset(generation)
+            if retry and stale:
+                # Our tasks died because another request reset the pool; try once more
+                return self._run(source, ranges, retry=False)
+            raise PDFExtractionError('PDF extraction worker crashed')
+        except PDFExtractionError:
+            raise
+        except Exception as e:
+            raise PDFExtractionError(f'Could not read PDF: {e}')
+
+    def extract(self, source):
+        """
+        Extract text from PDF bytes or a PDF file path (the file is mapped, not copied).
+        Returns PDFText or raises PDFExtractionError.
+        """
+        start_time = time.time()
+        try:
+            # The first task also reports the page count, so short resumes need one round trip
+            first_stop = min(self.pages_per_task, self.max_pages) if self.max_pages else self.pages_per_task
+            [(page_count, pages)] = self._run(source, [(0, first_stop)])
+
+            limit = min(page_count, self.max_pages) if self.max_pages else page_count
+            ranges = [(start, min(start + self.pages_per_task, limit))
+                      for start in range(first_stop, limit, self.pages_per_task)]
+            for _, more_pages in self._run(source, ranges) if ranges else []:
+                pages.extend(more_pages)
+        except PDFExtractionError:
+            self._count('failures')
+            raise
+
+        page_seconds = [round(seconds, 4) for _, seconds in pages]
+        with self._lock:
+            self._stats['documents'] += 1
+            self._stats['pages'] += len(pages)
+            self._stats['truncated'] += int(page_count > len(pages))
+            self._stats['page_seconds_total'] += sum(page_seconds)
+            self._stats['slowest_page_seconds'] = max([self._stats['slowest_page_seconds']] + page_seconds)
+
+        return PDFText(
+            text=''.join(text for text, _ in pages),
+            page_count=page_count,
+            pages_extracted=len(pages),
+            page_seconds=page_seconds,
+            truncated=page_count > len(pages),
+            seconds=time.time() - start_time
+        )
+
+    def extract_text(self, source):
+        return self.extract(source).text
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['max_pages'] = self.max_pages
+        stats['page_seconds_total'] = round(stats['page_seconds_total'], 3)
+        stats['avg_page_seconds'] = round(stats['page_seconds_total'] / stats['pages'], 4) if stats['pages'] else 0.0
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_pdf_extraction_pool():
+    """Process-wide extraction pool configured from the environment"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = PDFExtractionPool()
+    return _default_pool
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Section-aware prompt budgeting
+Splits the resume and job description into sections, drops low-value content (contact
+lines, EEO and benefits boilerplate), and fits what is left into a token budget,
+giving each resume section a share that grows with its relevance to the job
+"""
+
+import math
+import re
+import threading
+from collections import namedtuple
+
+from ats_scoring import extract_jd_terms, tokenize
+
+# Rough Gemini token estimate for English text
+CHARS_PER_TOKEN = 4
+
+# (section kind, priority, heading phrases); priority 0 means the section is dropped
+RESUME_SECTIONS = [
+    ('summary', 0.6, ['professional summary', 'career objective', 'summary', 'profile', 'objective', 'about me']),
+    ('experience', 1.0, ['professional experience', 'work experience', 'employment history', 'work history',
+                         'internship experience', 'internships', 'experience', 'employment']),
+    ('projects', 0.9, ['academic projects', 'personal projects', 'key projects', 'projects']),
+    ('skills', 0.8, ['technical skills', 'core competencies', 'key skills', 'tech stack', 'technologies',
+                     'programming languages', 'languages', 'skills']),
+    ('certifications', 0.4, ['certifications', 'certificates', 'licenses', 'courses', 'training']),
+    ('education', 0.4, ['academic background', 'education']),
+    ('awards', 0.3, ['accomplishments', 'achievements', 'awards', 'honors']),
+    ('publications', 0.3, ['publications', 'research']),
+    ('activities', 0.3, ['extracurricular activities', 'volunteer experience', 'volunteering', 'leadership', 'activities']),
+    ('interests', 0.1, ['interests', 'hobbies']),
+    ('references', 0.0, ['references']),
+]
+RESUME_HEADER_PRIORITY = 0.2  # Text before the first heading: name, contact, headline
+
+JD_SECTIONS = [
+    ('requirements', 1.0, ['minimum qualifications', 'basic qualifications', 'required qualifications',
+                           'required skills', 'qualifications', 'requirements', 'must have', 'what you bring',
+                           "what we're looking for", 'what we are looking for', 'who you are', 'skills']),
+    ('responsibilities', 0.9, ['key responsibilities', 'responsibilities', "what you'll do", 'what you will do',
+                               'duties', 'day to day', 'your role']),
+    ('preferred', 0.6, ['preferred qualifications', 'preferred skills', 'nice to have', 'good to have',
+                        'bonus points']),
+    ('role', 0.6, ['about the role', 'role overview', 'job summary', 'position summary', 'job description',
+                   'the role', 'overview']),
+    ('about', 0.2, ['about the company', 'company overview', 'about the team', 'about us', 'who we are',
+                    'our mission']),
+    ('benefits', 0.0, ['perks and benefits', 'what we offer', 'why join us', 'compensation', 'pay range',
+                       'salary', 'benefits', 'perks']),
+    ('eeo', 0.0, ['equal employment opportunity', 'equal opportunity', 'eeo statement', 'accommodations']),
+]
+JD_HEADER_PRIORITY = 0.7  # Text before the first heading: usually the title and role summary
+
+# Sentences that are boilerplate wherever they appear in a posting
+_EEO_PATTERN = re.compile(
+    r'equal opportunity|without regard to|sexual orientation|gender identity|protected veteran|'
+    r'national origin|reasonable accommodation|e-verify|drug[- ]free workplace',
+    re.IGNORECASE
+)
+_CONTACT_LINE_PATTERN = re.compile(
+    r'^\s*(?:name|e-?mail|phone|mobile|tel|location|address|linkedin|github|portfolio|website)\s*:',
+    re.IGNORECASE
+)
+_CONTACT_TOKEN_PATTERN = re.compile(
+    r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+'                              # email
+    r'|(?:https?://|www\.)\S+|\b(?:linkedin|github)\.com/\S*'   # links
+    r'|(?P<phone>(?<!\w)\+?\d[\d\s().-]{7,}\d(?!\w))',            # phone numbers (and date ranges)
+    re.IGNORECASE
+)
+PHONE_MIN_DIGITS = 9
+_UNIT_BREAK = re.compile(r'(?<=[.!?;])\s+(?=[A-Z0-9•*-])|\s*•\s*')
+
+Section = namedtuple('Section', ['kind', 'heading', 'priority', 'units'])
+# Token counts are estimates (CHARS_PER_TOKEN), before and after compression
+CompressedPrompt = namedtuple('CompressedPrompt', [
+    'resume', 'job_description',
+    'resume_tokens_before', 'resume_tokens_after', 'jd_tokens_before', 'jd_tokens_after'
+])
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _heading_pattern(sections):
+    phrases = sorted({phrase for _, _, names in sections for phrase in names}, key=len, reverse=True)
+    alternatives = '|'.join(re.escape(phrase).replace(r'\ ', r'\s+') for phrase in phrases)
+    return re.compile(rf'(?<![\w])({alternatives})(?![\w])(\s*:)?', re.IGNORECASE)
+
+
+def _kind_lookup(sections):
+    return {phrase: (kind, priority) for kind, priority, names in sections for phrase in names}
+
+
+class _Segmenter:
+    """Find section headings: a known phrase at the start of a line or followed by ':',
+    or written in capitals anywhere (flattened PDF text keeps 'EXPERIENCE' inline)"""
+
+    def __init__(self, sections, header_priority):
+        self.pattern = _heading_pattern(sections)
+        self.kinds = _kind_lookup(sections)
+        self.header_priority = header_priority
+
+    def _is_heading(self, text, match):
+        phrase = match.group(1)
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        at_line_start = not text[line_start:match.start()].strip(' \t#*•-')
+        line_end = text.find('\n', match.end())
+        rest_of_line = text[match.end():line_end if line_end >= 0 else len(text)].strip()
+        if at_line_start and (match.group(2) or not rest_of_line):
+            return True
+        if match.group(2) and phrase[0].isupper():
+            return True
+        return phrase.isupper() and len(phrase) > 3
+
+    def split(self, text):
+        sections = []
+        start = 0
+        heading = kind = None
+        priority = self.header_priority
+        for match in self.pattern.finditer(text):
+            if not self._is_heading(text, match):
+                continue
+            sections.append(Section(kind or 'header', heading, priority, _split_units(text[start:match.start()])))
+            heading = ' '.join(match.group(1).split())
+            kind, priority = self.kinds[heading.lower()]
+            start = match.end()
+        sections.append(Section(kind or 'header', heading, priority, _split_units(text[start:])))
+        return [section for section in sections if section.units or section.heading]
+
+
+def _strip_contact(unit):
+    """Remove emails, links and phone numbers, but not date ranges like 2016 - 2019"""
+    def replace(match):
+        phone = match.group('phone')
+        if phone and sum(c.isdigit() for c in phone) < PHONE_MIN_DIGITS:
+            return phone
+        return ' '
+    return ' '.join(_CONTACT_TOKEN_PATTERN.sub(replace, unit).split())
+
+
+def _split_units(text):
+    """Lines, then sentences/bullets: the smallest pieces kept or dropped verbatim"""
+    units = []
+    for line in text.split('\n'):
+        for unit in _UNIT_BREAK.split(line):
+            unit = ' '.join(unit.split())
+            if unit and unit.strip('-*•:'):
+                units.append(unit)
+    return units
+
+
+def _allocate(sizes, weights, budget):
+    """Water-filling: sections that fit keep everything, the rest share what is left by weight"""
+    allocation = {}
+    remaining = {i for i, weight in enumerate(weights) if weight > 0 and sizes[i] > 0}
+    left = budget
+    while remaining:
+        total_weight = sum(weights[i] for i in remaining)
+        fits = [i for i in remaining if sizes[i] <= left * weights[i] / total_weight]
+        if not fits:
+            for i in remaining:
+                allocation[i] = left * weights[i] / total_weight
+            break
+        for i in fits:
+            allocation[i] = sizes[i]
+            left -= sizes[i]
+            remaining.discard(i)
+    return allocation
+
+
+def _select_units(units, scores, budget_chars, keep_first=True):
+    """Best-scoring units that fit, returned in their original order"""
+    if sum(len(unit) + 1 for unit in units) <= budget_chars:
+        return list(units)
+    chosen = set()
+    used = 0
+    order = sorted(range(len(units)), key=lambda i: (-scores[i], i))
+    if keep_first and units:
+        order.remove(0)
+        order.insert(0, 0)  # The first line (job title, company) gives the rest context
+    for i in order:
+        cost = len(units[i]) + 1
+        if used + cost <= budget_chars:
+            chosen.add(i)
+            used += cost
+        elif i == 0 and keep_first:
+            break
+    if not chosen and units:
+        # Only reachable for a lone section whose first unit exceeds the whole budget
+        return [units[0][:max(0, int(budget_chars) - 1)].rsplit(' ', 1)[0]]
+    return [units[i] for i in sorted(chosen)]
+
+
+def _fit(sections, weights, budget_chars, keep_first=True):
+    """
+    Share budget_chars between (heading, units, scores) sections by weight.
+    A section whose share can't hold its smallest unit is dropped and its share
+    redistributed, so text is only ever cut at unit boundaries.
+    Returns ([(heading, kept units)] in original order, number of sections dropped).
+    """
+    overhead = [len(heading) + 2 if heading else 0 for heading, _, _ in sections]
+    sizes = [sum(len(unit) + 1 for unit in units) for _, units, _ in sections]
+    minimum = [
+        (len(units[0]) if keep_first else min(map(len, units))) + 1 if units else 0
+        for _, units, _ in sections
+    ]
+    weights = [weight if sizes[i] else 0 for i, weight in enumerate(weights)]
+    while True:
+        allocation = _allocate([sizes[i] + overhead[i] for i in range(len(sections))], weights, budget_chars)
+        starved = [i for i in allocation if allocation[i] - overhead[i] < minimum[i]]
+        if not starved or len(allocation) == 1:
+            break
+        weights[min(starved, key=lambda i: (weights[i], -i))] = 0
+
+    fitted = []
+    for i, (heading, units, scores) in enumerate(sections):
+        if i in allocation:
+            fitted.append((heading, _select_units(units, scores, allocation[i] - overhead[i], keep_first)))
+    return fitted, len(sections) - len(fitted)
+
+
+def _render(sections):
+    parts = []
+    for heading, units in sections:
+        body = '\n'.join(units)
+        parts.append(f'{heading.upper()}\n{body}' if heading else body)
+    return '\n\n'.join(part for part in parts if part.strip())
+
+
+class PromptCompressor:
+    """Fit resume and job description text into per-prompt token budgets"""
+
+    def __init__(self):
+        self._resume_segmenter = _Segmenter(RESUME_SECTIONS, RESUME_HEADER_PRIORITY)
+        self._jd_segmenter = _Segmenter(JD_SECTIONS, JD_HEADER_PRIORITY)
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'tokens_before': 0, 'tokens_after': 0, 'sections_dropped': 0}
+
+    def compress_job_description(self, job_description, max_tokens):
+        """Returns (compact text, sections dropped)"""
+        sections = self._jd_segmenter.split(job_description)
+        kept = []
+        weights = []
+        for section in sections:
+            units = [unit for unit in section.units if not _EEO_PATTERN.search(unit)]
+            if section.priority > 0 and units:
+                # Postings list what matters most first, so earlier units win
+                kept.append((section.heading, units, [-position for position in range(len(units))]))
+                weights.append(section.priority)
+        fitted, over_budget = _fit(kept, weights, max_tokens * CHARS_PER_TOKEN, keep_first=False)
+        return _render(fitted), len(sections) - len(kept) + over_budget
+
+    def compress_resume(self, resume_text, job_description, max_tokens):
+        """Returns (compact text, sections dropped); units are ranked by job description terms"""
+        term_weights = dict(extract_jd_terms(job_description))
+        sections = self._resume_segmenter.split(resume_text)
+        kept = []
+        priorities = []
+        for section in sections:
+            units = [unit for unit in section.units if not _CONTACT_LINE_PATTERN.match(unit)]
+            if section.kind == 'header':
+                units = [_strip_contact(unit) for unit in units]
+                units = [unit for unit in units if unit.strip(' |,-')]
+            if section.priority > 0 and units:
+                kept.append((section.heading, units, [_relevance(unit, term_weights) for unit in units]))
+                priorities.append(section.priority)
+
+        total_score = sum(sum(scores) for _, _, scores in kept) or 1.0
+        weights = [priority * (0.5 + sum(scores) / total_score) for priority, (_, _, scores) in zip(priorities, kept)]
+        fitted, over_budget = _fit(kept, weights, max_tokens * CHARS_PER_TOKEN)
+        return _render(fitted), len(sections) - len(kept) + over_budget
+
+    def compress(self, resume_text, job_description, resume_tokens, jd_tokens):
+        """Return a CompressedPrompt with both texts fitted to their budgets"""
+        compact_jd, jd_dropped = self.compress_job_description(job_description or '', jd_tokens)
+        # Relevance is judged against the compacted JD so boilerplate terms don't count
+        compact_resume, resume_dropped = self.compress_resume(resume_text or '', compact_jd, resume_tokens)
+        result = CompressedPrompt(
+            resume=compact_resume,
+            job_description=compact_jd,
+            resume_tokens_before=estimate_tokens(resume_text or ''),
+            resume_tokens_after=estimate_tokens(compact_resume),
+            jd_tokens_before=estimate_tokens(job_description or ''),
+            jd_tokens_after=estimate_tokens(compact_jd)
+        )
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['tokens_before'] += result.resume_tokens_before + result.jd_tokens_before
+            self._stats['tokens_after'] += result.resume_tokens_after + result.jd_tokens_after
+            self._stats['sections_dropped'] += resume_dropped + jd_dropped
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        before = stats['tokens_before']
+        stats['tokens_saved'] = before - stats['tokens_after']
+        stats['saved_ratio'] = round(stats['tokens_saved'] / before, 4) if before else 0.0
+        return stats
+
+
+def _relevance(unit, term_weights):
+    """Sum of JD term weights present in a unit, damped by its length"""
+    tokens = tokenize(unit)
+    if not tokens:
+        return 0.0
+    terms = set(tokens)
+    terms.update(f'{a} {b}' for a, b in zip(tokens, tokens[1:]))
+    score = sum(term_weights.get(term, 0.0) for term in terms)
+    return score / math.sqrt(len(tokens))
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resilience layer for calls to an external provider (Gemini)
+Classified retries with exponential backoff and full jitter, an AIMD adaptive
+concurrency limit, and a circuit breaker that fails fast while the provider is down
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+
+try:
+    from google.api_core import exceptions as api_exceptions
+except ImportError:  # Only used to recognise provider errors by type
+    api_exceptions = None
+
+GEMINI_RETRY_ATTEMPTS = int(os.getenv('GEMINI_RETRY_ATTEMPTS', 3))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv('GEMINI_RETRY_BASE_DELAY', 0.5))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv('GEMINI_RETRY_MAX_DELAY', 8))
+GEMINI_CONCURRENCY_INITIAL = int(os.getenv('GEMINI_CONCURRENCY_INITIAL', 16))
+GEMINI_CONCURRENCY_MIN = int(os.getenv('GEMINI_CONCURRENCY_MIN', 2))
+GEMINI_CONCURRENCY_MAX = int(os.getenv('GEMINI_CONCURRENCY_MAX', 64))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv('GEMINI_QUEUE_TIMEOUT_SECONDS', 10))
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', 5))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', 30))
+
+# Error classes
+RETRYABLE = 'retryable'    # Transient provider or network failure: retry, counts against the circuit
+OVERLOADED = 'overloaded'  # 429 / quota / timeout: like retryable, and shrinks the concurrency limit
+FATAL = 'fatal'            # Bad request, auth, safety block, parse error: don't retry
+
+# Circuit states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_OVERLOAD_CODES = {429, 504}
+_RETRYABLE_CODES = {500, 502, 503}
+
+
+class ResilienceError(Exception):
+    """The call was refused without reaching the provider"""
+
+
+class CircuitOpenError(ResilienceError):
+    """The circuit is open: the provider failed repeatedly and calls fail fast until it recovers"""
+
+
+class ConcurrencyLimitError(ResilienceError):
+    """No concurrency slot became free within the queue timeout"""
+
+
+class ProviderUnavailableError(ResilienceError):
+    """The provider isn't configured (no API key), so there is nothing to call"""
+
+
+def _status_code(error):
+    code = getattr(error, 'code', None)
+    if code is None:
+        code = getattr(error, 'status_code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None  # grpc status enums and the like
+
+
+def classify_error(error):
+    """RETRYABLE, OVERLOADED or FATAL for an exception raised by a provider call"""
+    if api_exceptions is not None:
+        if isinstance(error, (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests,
+                              api_exceptions.DeadlineExceeded, api_exceptions.GatewayTimeout)):
+            return OVERLOADED
+        if isinstance(error, (api_exceptions.ServiceUnavailable, api_exceptions.InternalServerError,
+                              api_exceptions.BadGateway, api_exceptions.Aborted)):
+            return RETRYABLE
+        if isinstance(error, api_exceptions.GoogleAPICallError):
+            return FATAL  # 4xx: retrying the same request won't help
+
+    code = _status_code(error)
+    if code in _OVERLOAD_CODES:
+        return OVERLOADED
+    if code in _RETRYABLE_CODES:
+        return RETRYABLE
+    if isinstance(error, (TimeoutError, socket.timeout)):
+        return OVERLOADED
+    if isinstance(error, (ConnectionError, OSError)):
+        return RETRYABLE
+    return FATAL
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: sleep uniform(0, min(max_delay, base * 2**attempt))"""
+
+    def __init__(self, attempts=GEMINI_RETRY_ATTEMPTS, base_delay=GEMINI_RETRY_BASE_DELAY,
+                 max_delay=GEMINI_RETRY_MAX_DELAY, rng=None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt):
+        """Delay before retry number attempt + 1 (attempt counts from 0)"""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: each success raises the limit by 1/limit (about +1 per
+    round of calls), each overload signal halves it, bounded by [min_limit, max_limit]
+    """
+
+    def __init__(self, initial=GEMINI_CONCURRENCY_INITIAL, min_limit=GEMINI_CONCURRENCY_MIN,
+                 max_limit=GEMINI_CONCURRENCY_MAX, queue_timeout=GEMINI_QUEUE_TIMEOUT_SECONDS,
+                 decrease_factor=0.5):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.queue_timeout = queue_timeout
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+
+    def acquire(self, timeout=None):
+        timeout = self.queue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConcurrencyLimitError(f'No provider slot free within {timeout:g} seconds')
+                self._condition.wait(remaining)
+            self.in_flight += 1
+
+    def release(self, outcome):
+        """outcome: 'success', OVERLOADED, or anything else (no change to the limit)"""
+        with self._condition:
+            self.in_flight -= 1
+            if outcome == 'success':
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif outcome == OVERLOADED:
+                now = time.monotonic()
+                # One halving per burst: calls that were already in flight report the same overload
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive provider failures; while open, calls fail fast.
+    After reset_timeout one probe call is let through (half-open): success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=GEMINI_BREAKER_FAILURES, reset_timeout=GEMINI_BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Per-state metrics: entries into, calls seen in (rejections while open) and time spent in each state
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self.calls_by_state = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self.seconds_in_state = {CLOSED: 0.0, OPEN: 0.0, HALF_OPEN: 0.0}
+        self._state_since = clock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            now = self._clock()
+            self.seconds_in_state[self.state] += now - self._state_since
+            self._state_since = now
+            self.state = state
+            self.transitions[state] += 1
+            if state == CLOSED:
+                print('SUCCESS: Circuit breaker closed, provider calls resumed')
+            else:
+                print(f'WARNING: Circuit breaker {state}')
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    self.calls_by_state[OPEN] += 1
+                    raise CircuitOpenError('AI provider unavailable (circuit open)')
+                self._set_state(HALF_OPEN)
+            self.calls_by_state[self.state] += 1
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError('AI provider unavailable (circuit half-open, probe in flight)')
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def record_ignored(self):
+        """The call ended with an error that says nothing about provider health"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            seconds = dict(self.seconds_in_state)
+            seconds[self.state] += self._clock() - self._state_since
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'transitions': dict(self.transitions),
+                'calls_by_state': dict(self.calls_by_state),
+                'seconds_in_state': {state: round(value, 1) for state, value in seconds.items()}
+            }
+
+    def seconds_until_retry(self):
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+
+class ResilientCaller:
+    """Run provider calls through the circuit breaker, the adaptive limiter and the retry policy"""
+
+    def __init__(self, name, retry=None, limiter=None, breaker=None, sleep=time.sleep):
+        self.name = name
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or AdaptiveLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'successes': 0,
+            'retries': 0,
+            'rejected_open': 0,
+            'rejected_limit': 0,
+            'failures': {RETRYABLE: 0, OVERLOADED: 0, FATAL: 0}
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _count_failure(self, error_class):
+        with self._lock:
+            self._stats['failures'][error_class] += 1
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) with retries; raises ResilienceError subclasses when refused"""
+        self._count('calls')
+        for attempt in range(self.retry.attempts):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count('rejected_open')
+                raise
+            try:
+                self.limiter.acquire()
+            except ConcurrencyLimitError:
+                self.breaker.record_ignored()
+                self._count('rejected_limit')
+                raise
+
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error_class = classify_error(e)
+                self.limiter.release(error_class)
+                self._count_failure(error_class)
+                if error_class == FATAL:
+                    self.breaker.record_ignored()
+                    raise
+                self.breaker.record_failure()
+                if attempt + 1 >= self.retry.attempts:
+                    raise
+                delay = self.retry.backoff(attempt)
+                print(f'WARNING: {self.name} call failed ({error_class}: {e}), retrying in {delay:.2f}s')
+                self._count('retries')
+                self._sleep(delay)
+                continue
+
+            self.limiter.release('success')
+            self.breaker.record_success()
+            self._count('successes')
+            return result
+
+    def stats(self):
+        with self._lock:
+            stats = {key: dict(value) if isinstance(value, dict) else value for key, value in self._stats.items()}
+        stats['circuit'] = self.breaker.snapshot()
+        stats['circuit']['seconds_until_retry'] = round(self.breaker.seconds_until_retry(), 1)
+        stats['concurrency'] = {
+            'limit': round(self.limiter.limit, 2),
+            'in_flight': self.limiter.in_flight,
+            'min': self.limiter.min_limit,
+            'max': self.limiter.max_limit
+        }
+        return stats
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resume document helpers
+Storage: the parsed resume (`structured_data`) is the only stored copy of the content;
+the JSON string clients send and read back is derived from it. Large fields are stored
+zlib-compressed under `<field>_z` once their JSON exceeds a threshold.
+Lists read a compact `preview` subdocument maintained at write time, so list queries
+project a few hundred bytes per resume instead of loading the full content.
+
+    python resume_documents.py --backfill-previews   # add previews to resumes that have none
+    python resume_documents.py --migrate-storage     # rewrite older documents, report sizes
+    python resume_documents.py --migrate-storage --dry-run
+"""
+
+import json
+import os
+import sys
+import zlib
+
+from bson.binary import Binary
+
+PREVIEW_SUMMARY_CHARS = 100
+BACKFILL_BATCH_SIZE = 500
+RESUME_COMPRESS_THRESHOLD_BYTES = int(os.getenv('RESUME_COMPRESS_THRESHOLD_BYTES', 4096))
+COMPRESSION_LEVEL = 6
+STORAGE_FORMAT = 2  # Documents without storage_format keep `content` next to `structured_data`
+
+# Fields stored compressed when large; readers go through unpack_field
+PACKED_FIELDS = ('structured_data', 'improvements_applied')
+# What readers of the stored content need, whatever the document's storage format
+CONTENT_PROJECTION = {'content': 1, 'structured_data': 1, 'structured_data_z': 1}
+
+# Everything /api/resumes returns per item; content, structured_data and search tokens stay in MongoDB
+LIST_PROJECTION = {
+    'title': 1,
+    'created_at': 1,
+    'updated_at': 1,
+    'version': 1,
+    'ats_score': 1,
+    'keywords': 1,
+    'metadata': 1,
+    'preview': 1
+}
+
+
+def pack_field(name, value, threshold=RESUME_COMPRESS_THRESHOLD_BYTES):
+    """{name: value}, or {name + '_z': compressed JSON} when the JSON is larger than threshold"""
+    encoded = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    if len(encoded) <= threshold:
+        return {name: value}
+    return {name + '_z': Binary(zlib.compress(encoded, COMPRESSION_LEVEL))}
+
+
+def unpack_field(doc, name, default=None):
+    """Value of a field written by pack_field (plain or compressed)"""
+    packed = doc.get(name + '_z')
+    if packed is not None:
+        return json.loads(zlib.decompress(bytes(packed)).decode('utf-8'))
+    return doc.get(name, default)
+
+
+def parse_content(content):
+    """Structured data from the content a client sent: a JSON string, a dict, or plain text"""
+    if isinstance(content, dict):
+        return content
+    try:
+        parsed = json.loads(content) if isinstance(content, str) else None
+    except json.JSONDecodeError:
+        parsed = None
+    return parsed if isinstance(parsed, dict) else {'raw_content': content}
+
+
+def content_string(structured_data):
+    """The `content` string clients read back: JSON of the resume, or the plain text it was saved as"""
+    if set(structured_data) == {'raw_content'} and isinstance(structured_data['raw_content'], str):
+        return structured_data['raw_content']
+    return json.dumps(structured_data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def resume_structured_data(doc):
+    """Parsed resume of a stored document, in either storage format"""
+    structured_data = unpack_field(doc, 'structured_data')
+    if isinstance(structured_data, dict) and (structured_data or 'content' not in doc):
+        return structured_data
+    # Older documents: the content string (or dict) is the source of truth
+    return parse_content(doc.get('content', ''))
+
+
+def resume_analysis_text(doc, format_resume):
+    """
+    Analysis text of a stored resume, the same whichever storage format it is in:
+    format_resume(structured data) for a resume, the text itself for plain-text ones
+    """
+    structured_data = resume_structured_data(doc)
+    if set(structured_data) == {'raw_content'}:
+        return content_string(structured_data)
+    return format_resume(structured_data)
+
+
+def storage_fields(structured_data, improvements_applied=None):
+    """Content fields of a resume document in the current storage format"""
+    fields = {'storage_format': STORAGE_FORMAT, **pack_field('structured_data', structured_data)}
+    if improvements_applied is not None:
+        fields.update(pack_field('improvements_applied', improvements_applied))
+    return fields
+
+
+def build_preview(structured_data):
+    """The list card of a resume: contact line, truncated summary and layout"""
+    structured_data = structured_data if isinstance(structured_data, dict) else {}
+    layout = structured_data.get('layout') if isinstance(structured_data.get('layout'), dict) else {}
+    summary = structured_data.get('summary') or ''
+    if not isinstance(summary, str):
+        summary = str(summary)
+    return {
+        'name': structured_data.get('name', ''),
+        'email': structured_data.get('email', ''),
+        'phone': structured_data.get('phone', ''),
+        'summary': summary[:PREVIEW_SUMMARY_CHARS] + '...' if summary else '',
+        'template': layout.get('template', 'modern'),
+        'color': layout.get('color', '#0d6efd')
+    }
+
+
+def fill_missing_previews(collection, docs):
+    """
+    Previews for list docs written before previews existed: computed from the stored
+    structured_data (one extra query for just those docs) and saved for next time
+    """
+    missing = [doc['_id'] for doc in docs if 'preview' not in doc]
+    if not missing:
+        return docs
+    previews = {
+        doc['_id']: build_preview(resume_structured_data(doc))
+        for doc in collection.find({'_id': {'$in': missing}}, CONTENT_PROJECTION)
+    }
+    for doc in docs:
+        if doc['_id'] in previews:
+            doc['preview'] = previews[doc['_id']]
+            collection.update_one({'_id': doc['_id']}, {'$set': {'preview': doc['preview']}})
+    return docs
+
+
+def list_item(doc):
+    """/api/resumes entry for a document read with LIST_PROJECTION"""
+    return {
+        'id': str(doc['_id']),
+        'title': doc['title'],
+        'created_at': doc['created_at'].isoformat(),
+        'updated_at': doc['updated_at'].isoformat(),
+        'version': doc.get('version', 1),
+        'ats_score': doc.get('ats_score', 0),
+        'keywords': doc.get('keywords', []),
+        'metadata': doc.get('metadata', {}),
+        'preview': doc.get('preview') or build_preview(None)
+    }
+
+
+def backfill_previews(collection, batch_size=BACKFILL_BATCH_SIZE):
+    """Set preview on every resume missing one; returns the count updated"""
+    from pymongo import UpdateOne
+
+    updated = 0
+    batch = []
+    for doc in collection.find({'preview': {'$exists': False}}, CONTENT_PROJECTION):
+        batch.append(UpdateOne({'_id': doc['_id']}, {'$set': {'preview': build_preview(resume_structured_data(doc))}}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+
+def migrate_document(doc):
+    """(set, unset) rewriting one document into the current storage format"""
+    structured_data = resume_structured_data(doc)
+    improvements_applied = unpack_field(doc, 'improvements_applied')
+    new_fields = storage_fields(structured_data, improvements_applied)
+    if 'preview' not in doc:
+        new_fields['preview'] = build_preview(structured_data)
+    unset = {'content': ''}
+    for name in PACKED_FIELDS:
+        for stored in (name, name + '_z'):
+            if stored not in new_fields and stored in doc:
+                unset[stored] = ''
+    return new_fields, unset
+
+
+def collection_size(db, name):
+    """collStats sizes in bytes, or None where the server doesn't report them"""
+    try:
+        stats = db.command('collStats', name)
+    except Exception:
+        return None
+    return {key: stats.get(key) for key in ('count', 'size', 'avgObjSize', 'storageSize', 'totalIndexSize')}
+
+
+def migrate_storage(collection, dry_run=False, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Rewrite documents stored before STORAGE_FORMAT: drop the duplicated content string,
+    compress large fields, add missing previews. Returns document and BSON byte counts.
+    """
+    import bson
+    from pymongo import UpdateOne
+
+    report = {'documents': 0, 'bytes_before': 0, 'bytes_after': 0}
+    batch = []
+    for doc in collection.find({'storage_format': {'$ne': STORAGE_FORMAT}}):
+        new_fields, unset = migrate_document(doc)
+        migrated = {key: value for key, value in doc.items() if key not in unset}
+        migrated.update(new_fields)
+        report['documents'] += 1
+        report['bytes_before'] += len(bson.encode(doc))
+        report['bytes_after'] += len(bson.encode(migrated))
+        if dry_run:
+            continue
+        # Guarded on the format so a document rewritten by the API meanwhile is left alone
+        batch.append(UpdateOne({'_id': doc['_id'], 'storage_format': {'$ne': STORAGE_FORMAT}},
+                               {'$set': new_fields, '$unset': unset}))
+        if len(batch) >= batch_size:
+            collection.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.bulk_write(batch, ordered=False)
+    return report
+
+
+def _print_sizes(label, sizes):
+    if sizes is None:
+        print(f'  {label}: collStats not available')
+        return
+    print(f'  {label}: ' + ', '.join(f'{key}={value}' for key, value in sizes.items()))
+
+
+def main(argv):
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    from db_indexes import DATABASE_NAME
+
+    if '--backfill-previews' not in argv and '--migrate-storage' not in argv:
+        print('Usage: python resume_documents.py --backfill-previews | --migrate-storage [--dry-run]')
+        return 1
+    load_dotenv()
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        print('ERROR: MONGODB_URI missing in .env')
+        return 1
+    db = MongoClient(mongodb_uri)[DATABASE_NAME]
+
+    if '--backfill-previews' in argv:
+        updated = backfill_previews(db['resumes'])
+        print(f'SUCCESS: Previews written to {updated} resumes')
+        return 0
+
+    dry_run = '--dry-run' in argv
+    before = collection_size(db, 'resumes')
+    report = migrate_storage(db['resumes'], dry_run=dry_run)
+    saved = report['bytes_before'] - report['bytes_after']
+    ratio = saved / report['bytes_before'] if report['bytes_before'] else 0.0
+    print(f'SUCCESS: {"Would rewrite" if dry_run else "Rewrote"} {report["documents"]} resumes: '
+          f'{report["bytes_before"]} -> {report["bytes_after"]} BSON bytes ({ratio:.0%} smaller)')
+    print('Collection size (resumes):')
+    _print_sizes('before', before)
+    if not dry_run:
+        # storageSize shrinks as WiredTiger reuses the freed space (or after compact)
+        _print_sizes('after', collection_size(db, 'resumes'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indexed resume search
+Every saved resume carries normalized search tokens derived from its title, keywords,
+skills and summary. Queries prefix-match those tokens through the multikey
+(user_id, is_active, search_tokens) index and rank hits by where the terms matched.
+
+    python resume_search.py --backfill         # add tokens to resumes that have none
+    python resume_search.py --backfill --all   # recompute tokens for every resume
+"""
+
+import os
+import re
+import sys
+import unicodedata
+
+from ats_scoring import STOPWORDS, tokenize
+from resume_documents import CONTENT_PROJECTION, resume_structured_data
+from skill_matcher import skill_key
+
+RESUME_SEARCH_MAX_CANDIDATES = int(os.getenv('RESUME_SEARCH_MAX_CANDIDATES', 1000))
+MAX_QUERY_TERMS = 8
+MAX_SUMMARY_CHARS = 2000
+BACKFILL_BATCH_SIZE = 500
+
+# Relevance of one query term, by where its best match is
+EXACT_TITLE = 4
+PREFIX_TITLE = 3
+EXACT_OTHER = 2
+PREFIX_OTHER = 1
+
+
+def _fold(text):
+    """Strip accents so 'José' and 'Jose' index alike"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def text_tokens(text):
+    if not text:
+        return []
+    return [token for token in tokenize(_fold(str(text))) if token not in STOPWORDS]
+
+
+def _names(values):
+    """Skill or keyword names from a list of strings or {'name'|'skill': ...} objects"""
+    if isinstance(values, str):
+        values = [values]
+    for value in values or []:
+        if isinstance(value, dict):
+            value = value.get('name') or value.get('skill')
+        if isinstance(value, str) and value.strip():
+            yield value
+
+
+def _skill_tokens(values):
+    """Tokens of each name plus those of its canonical form, so 'JS' is found as 'javascript'"""
+    tokens = []
+    for name in _names(values):
+        tokens.extend(text_tokens(name))
+        tokens.extend(text_tokens(skill_key(name)))
+    return tokens
+
+
+def search_fields(title, keywords=None, structured_data=None):
+    """{'search_tokens', 'search_title_tokens'} to $set on a resume document"""
+    structured_data = structured_data if isinstance(structured_data, dict) else {}
+    summary = structured_data.get('summary')
+    title_tokens = sorted(set(text_tokens(title)))
+    tokens = set(title_tokens)
+    tokens.update(_skill_tokens(keywords))
+    tokens.update(_skill_tokens(structured_data.get('skills')))
+    tokens.update(text_tokens(summary[:MAX_SUMMARY_CHARS] if isinstance(summary, str) else ''))
+    return {'search_tokens': sorted(tokens), 'search_title_tokens': title_tokens}
+
+
+def query_terms(search):
+    """[(term, alternatives)] for a search string; alternatives include a known skill's canonical token"""
+    terms = []
+    seen = set()
+    for token in text_tokens(search):
+        if token in seen:
+            continue
+        seen.add(token)
+        alternatives = {token}
+        canonical = text_tokens(skill_key(token))
+        if len(canonical) == 1:
+            alternatives.add(canonical[0])
+        terms.append((token, sorted(alternatives)))
+    return terms[:MAX_QUERY_TERMS]
+
+
+def search_filter(terms):
+    """Every term must prefix-match some token; anchored patterns keep to index bounds"""
+    return {'$and': [
+        {'search_tokens': {'$in': [re.compile('^' + re.escape(alternative)) for alternative in alternatives]}}
+        for _, alternatives in terms
+    ]}
+
+
+def _term_score(alternatives, title_tokens, tokens):
+    best = 0
+    for alternative in alternatives:
+        if alternative in title_tokens:
+            return EXACT_TITLE
+        if any(token.startswith(alternative) for token in title_tokens):
+            best = max(best, PREFIX_TITLE)
+        elif alternative in tokens:
+            best = max(best, EXACT_OTHER)
+        elif any(token.startswith(alternative) for token in tokens):
+            best = max(best, PREFIX_OTHER)
+    return best
+
+
+def relevance(doc, terms):
+    title_tokens = doc.get('search_title_tokens') or []
+    tokens = doc.get('search_tokens') or []
+    return sum(_term_score(alternatives, title_tokens, tokens) for _, alternatives in terms)
+
+
+def rank(docs, terms):
+    """Docs ordered by relevance, then newest first"""
+    docs = sorted(docs, key=lambda doc: (doc.get('updated_at') is not None, doc.get('updated_at'), doc['_id']), reverse=True)
+    return sorted(docs, key=lambda doc: relevance(doc, terms), reverse=True)
+
+
+def backfill(collection, recompute=False, batch_size=BACKFILL_BATCH_SIZE):
+    """Set search tokens on resumes missing them (or on all with recompute); returns the count updated"""
+    from pymongo import UpdateOne
+
+    query = {} if recompute else {'search_tokens': {'$exists': False}}
+    projection = {'title': 1, 'keywords': 1, **CONTENT_PROJECTION}
+    updated = 0
+    batch = []
+    for doc in collection.find(query, projection):
+        fields = search_fields(doc.get('title'), doc.get('keywords'), resume_structured_data(doc))
+        batch.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+
+def main(argv):
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    from db_indexes import DATABASE_NAME, ensure_indexes
+
+    if '--backfill' not in argv:
+        print('Usage: python resume_search.py --backfill [--all]')
+        return 1
+    load_dotenv()
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        print('ERROR: MONGODB_URI missing in .env')
+        return 1
+    db = MongoClient(mongodb_uri)[DATABASE_NAME]
+    ensure_indexes(db)
+    updated = backfill(db['resumes'], recompute='--all' in argv)
+    print(f'SUCCESS: Search tokens written to {updated} resumes')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Background Job Worker Runner
+Drains the MongoDB-backed AI job queue (async mode of the improvement endpoints)
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+def _keep_lease_alive(job_queue, job_id, worker_id, stop_event):
+    """Renew the job lease periodically while the handler is running"""
+    interval = max(1, job_queue.lease_seconds // 3)
+    while not stop_event.wait(interval):
+        if not job_queue.extend_lease(job_id, worker_id):
+            print(f"WARNING: Lost lease on job {job_id}")
+            return
+
+
+def run_job(job_queue, job, handler, worker_id):
+    """Run one claimed job under a renewed lease; returns its final status, or None if the lease was lost"""
+    from ai_usage import usage_scope
+    from job_queue import COMPLETED
+
+    job_id = str(job['_id'])
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(
+        target=_keep_lease_alive,
+        args=(job_queue, job_id, worker_id, stop_event),
+        daemon=True
+    )
+    heartbeat.start()
+    start_time = time.time()
+    try:
+        # Token usage is charged to the user who queued the job
+        with usage_scope(job.get('user_id'), f"job:{job.get('type')}"):
+            result = handler(job['payload'])
+        if not job_queue.complete(job_id, worker_id, result):
+            # Another worker re-claimed the job after our lease expired; its run owns the result
+            print(f"WARNING: Job {job_id} finished after its lease was lost, result discarded")
+            return None
+        print(f"SUCCESS: Job {job_id} completed in {time.time() - start_time:.2f} seconds")
+        return COMPLETED
+    except Exception as e:
+        status = job_queue.fail(job_id, worker_id, e)
+        print(f"ERROR: Job {job_id} failed ({str(e)}) -> {status}")
+        return status
+    finally:
+        stop_event.set()
+        heartbeat.join()
+
+
+def run_worker(poll_interval=2.0, once=False):
+    from app import job_queue, JOB_HANDLERS
+    from job_queue import new_worker_id
+
+    worker_id = new_worker_id()
+    print(f"Job worker {worker_id} started")
+    print(f"  - Lease: {job_queue.lease_seconds}s, max attempts: {job_queue.max_attempts}")
+    print(f"  - Handlers: {', '.join(sorted(JOB_HANDLERS))}")
+
+    while True:
+        reaped = job_queue.reap_expired()
+        if reaped:
+            print(f"WARNING: Dead-lettered {reaped} job(s) with expired leases")
+
+        job = job_queue.claim(worker_id)
+        if not job:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        job_id = str(job['_id'])
+        handler = JOB_HANDLERS.get(job.get('type'))
+        print(f"Running job {job_id} ({job.get('type')}), attempt {job['attempts']}/{job_queue.max_attempts}")
+
+        if handler is None:
+            status = job_queue.fail(job_id, worker_id, f"No handler for job type '{job.get('type')}'")
+            print(f"ERROR: Unknown job type for {job_id} -> {status}")
+            continue
+
+        run_job(job_queue, job, handler, worker_id)
+
+
+if __name__ == '__main__':
+    try:
+        poll_interval = float(os.getenv('JOB_POLL_INTERVAL', 2))
+        run_worker(poll_interval=poll_interval, once='--once' in sys.argv)
+
+    except ImportError as e:
+        print(f"ERROR: Error importing app: {e}")
+        print("Please make sure you have installed the requirements:")
+        print("pip install -r requirements.txt")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nWorker stopped by user")
+    except Exception as e:
+        print(f"ERROR: Worker error: {e}")
+        sys.exit(1)
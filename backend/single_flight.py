@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-flight request coalescing
+Concurrent callers with the same key share one in-flight call and its result
+"""
+
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls onto one shared future"""
+
+    def __init__(self, name, max_in_flight=256):
+        self.name = name
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.deduplicated = 0
+        self.bypassed = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key; concurrent callers wait for the same result"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                is_leader = False
+            elif len(self._calls) >= self.max_in_flight:
+                # Table is full: run uncoalesced rather than grow without bound
+                self.bypassed += 1
+                future = None
+                is_leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+                is_leader = True
+
+        if future is None:
+            return fn(*args, **kwargs)
+
+        if not is_leader:
+            # Followers get their own copy so nobody mutates a shared result
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'in_flight': len(self._calls),
+            'max_in_flight': self.max_in_flight,
+            'executed': self.executed,
+            'deduplicated': self.deduplicated,
+            'bypassed': self.bypassed
+        }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Skill taxonomy matcher
+Compiles the skill dictionary (data/skills.json) into an Aho-Corasick automaton once,
+then finds every skill occurrence, with offsets and canonical names, in one linear pass
+"""
+
+import json
+import os
+import threading
+from collections import deque, namedtuple
+
+SKILLS_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skills.json')
+
+SkillMatch = namedtuple('SkillMatch', ['start', 'end', 'canonical', 'surface'])
+
+# Case-fold ASCII and map every whitespace character to a plain space without changing
+# string length, so offsets in the normalized text are offsets in the original
+_NORMALIZE_TABLE = {ord(c): ord(c.lower()) for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+_NORMALIZE_TABLE.update({ord(c): ord(' ') for c in '\t\n\r\x0b\x0c\xa0'})
+_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+
+
+def normalize_for_matching(text):
+    return text.translate(_NORMALIZE_TABLE)
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over skill names and their synonyms"""
+
+    def __init__(self, skills):
+        """
+        skills: iterable of {'name': canonical, 'aliases': [...], 'category': ...}.
+        Set 'match_name': false when the name itself is too ambiguous to match (e.g. 'Go').
+        """
+        self.categories = {}
+        self._aliases = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        patterns = []
+
+        for skill in skills:
+            canonical = skill['name']
+            self.categories[canonical] = skill.get('category', 'other')
+            names = list(skill.get('aliases', []))
+            if skill.get('match_name', True):
+                names.insert(0, canonical)
+            for alias in names:
+                key = ' '.join(normalize_for_matching(alias).split())
+                # Single characters ('C', 'R') are never matched on their own
+                if len(key) > 1 and key not in self._aliases:
+                    self._aliases[key] = canonical
+                    patterns.append((key, canonical))
+
+        for key, canonical in patterns:
+            self._add_pattern(key, canonical)
+        self._build_failure_links()
+
+    @classmethod
+    def from_file(cls, path=SKILLS_DATA_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['skills'])
+
+    def __len__(self):
+        return len(self._aliases)
+
+    def names(self):
+        """[(normalized skill name or synonym, canonical name)]"""
+        return list(self._aliases.items())
+
+    def _add_pattern(self, key, canonical):
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + ((len(key), canonical),)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Every whole-word skill occurrence, including overlapping ones"""
+        if not text:
+            return []
+        normalized = normalize_for_matching(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(normalized)
+        matches = []
+        state = 0
+
+        for index, char in enumerate(normalized):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            for pattern_length, canonical in output[state]:
+                start = end - pattern_length
+                # Whole words only: 'java' must not match inside 'javascript'
+                if start > 0 and normalized[start - 1] in _WORD_CHARS and normalized[start] in _WORD_CHARS:
+                    continue
+                if end < length and normalized[end] in _WORD_CHARS and normalized[end - 1] in _WORD_CHARS:
+                    continue
+                matches.append(SkillMatch(start, end, canonical, text[start:end]))
+
+        matches.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        return matches
+
+    def find_skills(self, text):
+        """Non-overlapping occurrences, preferring the longest match ('react native' over 'react')"""
+        selected = []
+        last_end = -1
+        for match in self.find_all(text):
+            if match.start >= last_end:
+                selected.append(match)
+                last_end = match.end
+        return selected
+
+    def skill_counts(self, text):
+        """{canonical: occurrences}, in order of first appearance"""
+        counts = {}
+        for match in self.find_skills(text):
+            counts[match.canonical] = counts.get(match.canonical, 0) + 1
+        return counts
+
+    def canonicalize(self, name):
+        """Canonical skill name for an exact skill/synonym ('k8s' -> 'Kubernetes'), else None"""
+        if not isinstance(name, str):
+            return None
+        return self._aliases.get(' '.join(normalize_for_matching(name).split()))
+
+
+_default_matcher = None
+_default_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    """Process-wide matcher compiled from data/skills.json on first use"""
+    global _default_matcher
+    if _default_matcher is None:
+        with _default_lock:
+            if _default_matcher is None:
+                _default_matcher = SkillMatcher.from_file(os.getenv('SKILLS_DATA_PATH') or SKILLS_DATA_PATH)
+                print(f'SUCCESS: Skill matcher compiled with {len(_default_matcher)} skill names')
+    return _default_matcher
+
+
+def skill_key(name):
+    """Dedup key for a skill name: its canonical form when known, otherwise the lowercase name"""
+    canonical = get_skill_matcher().canonicalize(name)
+    return (canonical or name.strip()).lower()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test the two-tier AI result cache"""
+
+from ai_cache import LRUCache, ResultCache, make_cache_key
+
+
+def test_cache_key_is_content_addressed():
+    key = make_cache_key('gemini-1.5-flash', 'ats-v1', 'resume text', 'job description')
+    assert key == make_cache_key('gemini-1.5-flash', 'ats-v1', 'resume text', 'job description')
+    assert key != make_cache_key('gemini-1.5-flash', 'ats-v2', 'resume text', 'job description')
+    assert len(key) == 64
+    print("SUCCESS: Cache keys are stable and content addressed")
+
+
+def test_lru_eviction():
+    lru = LRUCache(max_entries=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.get('a')  # 'b' is now least recently used
+    lru.set('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+    assert lru.evictions == 1
+    print("SUCCESS: LRU evicts the least recently used entry")
+
+
+def test_result_cache_counters():
+    cache = ResultCache('test', max_entries=4)
+    assert cache.get('missing') is None
+    cache.set('key', {'atsScore': 80, 'matchedSkills': ['Python']})
+
+    cached = cache.get('key')
+    assert cached == {'atsScore': 80, 'matchedSkills': ['Python']}
+
+    # Callers get a copy, so mutating the result must not poison the cache
+    cached['matchedSkills'].append('AWS')
+    assert cache.get('key')['matchedSkills'] == ['Python']
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['evictions'] == 0
+    print(f"SUCCESS: Cache stats: {stats}")
+
+
+def test_bytes_saved_counts_hits_only():
+    cache = ResultCache('resume_text', max_entries=4)
+    assert cache.get('pdf-hash', saved_bytes=2048) is None
+    cache.set('pdf-hash', 'Python developer')
+    assert cache.get('pdf-hash', saved_bytes=2048) == 'Python developer'
+    assert cache.get('pdf-hash', saved_bytes=2048) == 'Python developer'
+    assert cache.stats()['bytes_saved'] == 4096
+    print("SUCCESS: Bytes saved are reported for hits")
+
+
+if __name__ == '__main__':
+    test_cache_key_is_content_addressed()
+    test_lru_eviction()
+    test_result_cache_counters()
+    test_bytes_saved_counts_hits_only()
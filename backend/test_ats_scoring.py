@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test the local deterministic ATS scoring engine"""
+
+import time
+
+from ats_scoring import score_resume, tokenize
+from text_normalizer import normalize_resume_text
+
+JOB_DESCRIPTION = """We need a backend engineer with 3+ years of Python and AWS experience.
+Docker and Kubernetes are required. Experience with CI/CD pipelines and PostgreSQL is a plus."""
+
+STRONG_RESUME = """Backend Engineer 2019 - Present. Built Python services on AWS with Docker and
+Kubernetes, reducing latency by 35%. Maintained CI/CD pipelines and PostgreSQL databases for 2M users."""
+
+WEAK_RESUME = """Graphic designer with experience in Photoshop and Illustrator. Created brand
+identities for small businesses."""
+
+EXPECTED_KEYS = {'atsScore', 'matchedSkills', 'missingSkills', 'gapAnalysis',
+                 'keywordDensity', 'skillsMatch', 'experienceMatch'}
+
+
+def test_same_shape_as_gemini_results():
+    results = score_resume(STRONG_RESUME, JOB_DESCRIPTION)
+    assert set(results) == EXPECTED_KEYS
+    for key in ('atsScore', 'keywordDensity', 'skillsMatch', 'experienceMatch'):
+        assert 0 <= results[key] <= 100
+    assert isinstance(results['gapAnalysis'], list) and results['gapAnalysis']
+    print(f"SUCCESS: Local results have the Gemini response shape: {results}")
+
+
+def test_strong_resume_outscores_weak_resume():
+    strong = score_resume(STRONG_RESUME, JOB_DESCRIPTION, current_year=2025)
+    weak = score_resume(WEAK_RESUME, JOB_DESCRIPTION, current_year=2025)
+    assert strong['atsScore'] > weak['atsScore']
+    assert 'Kubernetes' in strong['matchedSkills']
+    assert 'Kubernetes' in weak['missingSkills']
+    assert strong['experienceMatch'] == 100
+    print(f"SUCCESS: Strong {strong['atsScore']} > weak {weak['atsScore']}")
+
+
+def test_scoring_is_deterministic_and_fast():
+    start_time = time.time()
+    first = score_resume(STRONG_RESUME * 20, JOB_DESCRIPTION * 5)
+    elapsed = time.time() - start_time
+    assert first == score_resume(STRONG_RESUME * 20, JOB_DESCRIPTION * 5)
+    assert elapsed < 0.5
+    print(f"SUCCESS: Scored in {elapsed * 1000:.1f} ms")
+
+
+def test_tokenizer_keeps_tech_names():
+    assert tokenize('C++, C#, Node.js and CI/CD') == ['c++', 'c#', 'node.js', 'and', 'ci/cd']
+    print("SUCCESS: Tokenizer keeps technology names intact")
+
+
+def test_cleaned_resume_keeps_symbol_skills():
+    job_description = 'Systems engineer with C++ and C# experience, CI/CD and Linux.'
+    resume = 'Systems engineer: 6 years of C++ and C#, CI/CD pipelines on Linux.'
+    cleaned = normalize_resume_text(resume)  # What clean_resume_text hands the scorer
+    raw_results = score_resume(resume, job_description)
+    cleaned_results = score_resume(cleaned, job_description)
+    assert cleaned_results == raw_results
+    missing = ' '.join(cleaned_results['missingSkills'])
+    assert 'C++' not in missing and 'C#' not in missing
+    print(f"SUCCESS: Cleaned resume scores like the raw one ({cleaned_results['atsScore']})")
+
+
+if __name__ == '__main__':
+    test_same_shape_as_gemini_results()
+    test_strong_resume_outscores_weak_resume()
+    test_scoring_is_deterministic_and_fast()
+    test_tokenizer_keeps_tech_names()
+    test_cleaned_resume_keeps_symbol_skills()
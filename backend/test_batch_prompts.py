@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test packed batch prompts (planning, response splitting, individual retries)"""
+
+import json
+import re
+
+from batch_prompts import BatchItem, PackedScorer, plan_batches, split_packed_response
+
+
+def make_items(count, resume_chars=400):
+    return [BatchItem(str(i), 'r' * resume_chars, 'Python developer') for i in range(count)]
+
+
+def test_plan_batches_adapts_to_budget():
+    items = make_items(10)  # ~330 tokens each with the answer allowance
+    assert [len(batch) for batch in plan_batches(items, max_tokens=2000, max_items=8)] == [5, 5]
+    assert [len(batch) for batch in plan_batches(items, max_tokens=100000, max_items=8)] == [8, 2]
+    # An item larger than the budget still gets a call of its own
+    big = [BatchItem('big', 'x' * 40000, 'jd')] + make_items(2)
+    assert [[item.id for item in batch] for batch in plan_batches(big, max_tokens=2000)] == [['big'], ['0', '1']]
+    print("SUCCESS: Batch size follows the token budget")
+
+
+def test_split_packed_response():
+    text = 'Here you go:\n```json\n' + json.dumps([
+        {'id': 1, 'ats_score': 70},
+        {'id': '2', 'ats_score': 80},
+        {'id': '2', 'ats_score': 81},
+        {'id': 'unknown', 'ats_score': 10},
+        'junk'
+    ]) + '\n```'
+    found = split_packed_response(text, ['1', '2', '3'])
+    # Numeric ids are matched as strings; duplicated and missing ids are left for retry
+    assert list(found) == ['1'] and json.loads(found['1'])['ats_score'] == 70
+    print("SUCCESS: Packed response split per item id")
+
+
+def test_failed_items_retried_individually():
+    prompts = []
+
+    def generate(prompt):
+        prompts.append(prompt)
+        ids = re.findall(r'<item id="(\d+)">', prompt)
+        answers = [{'id': item_id, 'ats_score': 90} for item_id in ids if item_id != '1']
+        answers[0] = {'id': answers[0]['id'], 'broken': True}
+        return json.dumps(answers)
+
+    def parse(text):
+        data = json.loads(text)
+        return {'atsScore': data['ats_score']} if 'ats_score' in data else {'failed': True}
+
+    singles = []
+
+    def single(item):
+        singles.append(item.id)
+        if item.id == '1':
+            raise RuntimeError('quota')
+        return {'atsScore': 50}
+
+    scorer = PackedScorer(generate, parse, single, is_failure=lambda result: result.get('failed'))
+    results = {item.id: result for item, result in scorer.score(make_items(4))}
+
+    assert len(prompts) == 1
+    # '0' came back malformed and '1' was missing: both are retried on their own
+    assert sorted(singles) == ['0', '1']
+    assert results['0'] == {'atsScore': 50} and results['3'] == {'atsScore': 90}
+    assert isinstance(results['1'], RuntimeError)  # A failed retry is reported, not raised
+    stats = scorer.stats()
+    assert stats['packed_calls'] == 1 and stats['packed_items'] == 2 and stats['retried_items'] == 2
+    print("SUCCESS: Malformed or missing items retried individually")
+
+
+if __name__ == '__main__':
+    print("Testing packed batch prompts...")
+    test_plan_batches_adapts_to_budget()
+    test_split_packed_response()
+    test_failed_items_retried_individually()
+    print("\nSUCCESS: All packed batch prompt tests passed!")
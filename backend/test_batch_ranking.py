@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Test batch resume ranking (uploads, top-k heap, streaming order)"""
+
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from reportlab.pdfgen import canvas
+from werkzeug.datastructures import FileStorage, MultiDict
+
+from ats_scoring import score_resume
+from batch_ranking import TopK, collect_uploaded_resumes, rank_resumes
+from pdf_extraction import PDFExtractionPool
+from text_normalizer import normalize_resume_text
+
+JOB_DESCRIPTION = 'Backend engineer with Python, Flask, MongoDB and Docker. 3+ years of experience.'
+
+
+def make_pdf(text):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.drawString(72, 720, text)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def test_top_k_keeps_best_scores():
+    top = TopK(3)
+    for score, name in [(40, 'a'), (90, 'b'), (10, 'c'), (75, 'd'), (90, 'e'), (60, 'f')]:
+        top.push(score, {'filename': name})
+    assert [entry['filename'] for entry in top.ranked()] == ['b', 'e', 'd']
+    print("SUCCESS: Top-k heap keeps the best entries, earlier uploads win ties")
+
+
+def test_collect_from_multipart_and_zip():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('batch/alice.pdf', b'%PDF-alice')
+        zf.writestr('batch/notes.txt', b'ignored')
+        zf.writestr('__MACOSX/batch/._alice.pdf', b'ignored')
+    archive.seek(0)
+
+    files = MultiDict([
+        ('resumes', FileStorage(io.BytesIO(b'%PDF-bob'), filename='bob.pdf')),
+        ('resumesZip', FileStorage(archive, filename='batch.zip')),
+    ])
+    resumes = collect_uploaded_resumes(files)
+    assert [(name, upload.source, upload.size) for name, upload in resumes] == [
+        ('bob.pdf', b'%PDF-bob', 8), ('batch/alice.pdf', b'%PDF-alice', 10)]
+
+    try:
+        collect_uploaded_resumes(files, max_resumes=1)
+        assert False, 'Expected ValueError'
+    except ValueError:
+        pass
+    print("SUCCESS: Uploads collected from multipart list and zip archive")
+
+
+def test_zip_bomb_rejected():
+    def zip_of(entries):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in entries:
+                zf.writestr(name, data)
+        archive.seek(0)
+        return MultiDict([('resumesZip', FileStorage(archive, filename='batch.zip'))])
+
+    bomb = b'%PDF-' + b'\0' * 5000000  # Deflates to a few KB
+    for files, limits in [
+        (zip_of([('bomb.pdf', bomb)]), {'max_file_bytes': 1000000}),
+        (zip_of([('a.pdf', b'%PDF-' + b'a' * 600), ('b.pdf', b'%PDF-' + b'b' * 600)]), {'max_total_bytes': 1000}),
+    ]:
+        try:
+            collect_uploaded_resumes(files, **limits)
+            assert False, 'Expected ValueError'
+        except ValueError as e:
+            print(f'  rejected: {e}')
+
+    spooled = []
+    resumes = collect_uploaded_resumes(zip_of([('big.pdf', b'%PDF-' + b'x' * 600000)]), spooled=spooled)
+    assert len(spooled) == 1 and resumes[0][1].source == spooled[0].name and resumes[0][1].size == 600005
+    spooled[0].close()
+    print("SUCCESS: Oversized zip entries rejected, large ones streamed to temp files")
+
+
+def test_rank_resumes_streams_results_then_ranking():
+    resumes = [
+        ('weak.pdf', make_pdf('Graphic designer skilled in Photoshop and Illustrator.')),
+        ('strong.pdf', make_pdf('Backend engineer, 5 years of Python, Flask, MongoDB and Docker.')),
+        ('broken.pdf', b'not a pdf'),
+    ]
+    pool = PDFExtractionPool(workers=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            events = list(rank_resumes(resumes, JOB_DESCRIPTION, normalize_resume_text, score_resume, top_k=2,
+                                       extract=pool.extract_text, executor=executor))
+    finally:
+        pool.shutdown()
+
+    kinds = [kind for kind, _ in events]
+    assert kinds == ['result'] * 3 + ['ranking']
+    errors = [payload for kind, payload in events if kind == 'result' and 'error' in payload]
+    assert [error['filename'] for error in errors] == ['broken.pdf']
+
+    ranking = events[-1][1]
+    assert [entry['filename'] for entry in ranking] == ['strong.pdf', 'weak.pdf']
+    assert ranking[0]['atsScore'] > ranking[1]['atsScore']
+    assert 'Python' in ranking[0]['results']['matchedSkills']
+    print(f"SUCCESS: Ranked {[(e['filename'], e['atsScore']) for e in ranking]}")
+
+
+def test_symbol_skills_rank_after_cleaning():
+    job_description = 'Systems engineer with C++, C# and CI/CD. Linux required.'
+    resumes = [
+        ('linux.pdf', make_pdf('Systems engineer: Linux administration and Bash scripting.')),
+        ('cpp.pdf', make_pdf('Systems engineer: C++ and C# services, CI/CD pipelines, Linux.')),
+    ]
+    pool = PDFExtractionPool(workers=1)
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            events = list(rank_resumes(resumes, job_description, normalize_resume_text, score_resume,
+                                       extract=pool.extract_text, executor=executor))
+    finally:
+        pool.shutdown()
+
+    ranking = events[-1][1]
+    assert [entry['filename'] for entry in ranking] == ['cpp.pdf', 'linux.pdf']
+    assert {'C++', 'C#', 'CI/CD'} <= set(ranking[0]['results']['matchedSkills'])
+    print(f"SUCCESS: C++/C#/CI/CD survive cleaning and rank first {[(e['filename'], e['atsScore']) for e in ranking]}")
+
+
+if __name__ == '__main__':
+    test_top_k_keeps_best_scores()
+    test_collect_from_multipart_and_zip()
+    test_zip_bomb_rejected()
+    test_rank_resumes_streams_results_then_ranking()
+    test_symbol_skills_rank_after_cleaning()
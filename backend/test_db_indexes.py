@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test MongoDB index bootstrap"""
+
+from pymongo.errors import DuplicateKeyError
+
+from db_indexes import CREATED, DROPPED, EXISTS, FAILED, INDEXES, ensure_indexes, list_indexes
+
+
+class IndexedCollection:
+    """Keeps index_information() in step with create_index calls"""
+
+    def __init__(self, fail_with=None):
+        self.indexes = {'_id_': {'key': [('_id', 1)]}}
+        self.fail_with = fail_with
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def create_index(self, keys, name, **options):
+        if self.fail_with:
+            raise self.fail_with
+        self.indexes[name] = {'key': keys, **options}
+        return name
+
+    def drop_index(self, name):
+        del self.indexes[name]
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = IndexedCollection()
+        return self[name]
+
+
+def test_creates_missing_indexes_once():
+    db = FakeDatabase()
+    first = ensure_indexes(db)
+    assert [outcome for _, outcome, _ in first] == [CREATED] * len(INDEXES)
+    assert db['users'].indexes['email_unique']['unique'] is True
+    assert db['resumes'].indexes['user_active_updated_id']['key'][:2] == [('user_id', 1), ('is_active', 1)]
+    assert [key for key, _ in db['ats_evaluations'].indexes['user_created']['key']] == ['user_id', 'created_at']
+
+    second = ensure_indexes(db)
+    assert [outcome for _, outcome, _ in second] == [EXISTS] * len(INDEXES)
+    assert sorted(list_indexes(db)) == ['ats_evaluations', 'resumes', 'users']
+    print("SUCCESS: Missing indexes created, existing ones left alone")
+
+
+def test_duplicate_emails_reported_not_raised():
+    db = FakeDatabase()
+    db['users'] = IndexedCollection(fail_with=DuplicateKeyError('E11000 duplicate key error'))
+    report = {spec.name: outcome for spec, outcome, _ in ensure_indexes(db)}
+    assert report['email_unique'] == FAILED
+    assert report['user_active_updated_id'] == CREATED  # Other indexes still get created
+    print("SUCCESS: An index that can't be built is reported and the rest still created")
+
+
+def test_superseded_index_dropped_after_replacement():
+    db = FakeDatabase()
+    db['resumes'].indexes['user_active_updated'] = {'key': [('user_id', 1), ('is_active', 1), ('updated_at', -1)]}
+    report = {spec.name: outcome for spec, outcome, _ in ensure_indexes(db)}
+    assert report['user_active_updated_id'] == CREATED and report['user_active_updated'] == DROPPED
+    assert 'user_active_updated' not in db['resumes'].indexes
+    print("SUCCESS: Superseded index dropped once its replacement exists")
+
+
+if __name__ == '__main__':
+    print("Testing MongoDB index bootstrap...")
+    test_creates_missing_indexes_once()
+    test_duplicate_emails_reported_not_raised()
+    test_superseded_index_dropped_after_replacement()
+    print("\nSUCCESS: All index bootstrap tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Test latency budgets and the degraded-mode error mapping"""
+
+import socket
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+from deadlines import (
+    REASON_PROVIDER_ERROR, REASON_TIMEOUT, REASON_UNAVAILABLE,
+    DeadlineExceededError, DeadlineRunner, degraded_reason, parse_latency_budget
+)
+from resilience import CircuitOpenError, ProviderUnavailableError
+
+
+def test_parse_latency_budget():
+    assert parse_latency_budget(None, default=25) == 25
+    assert parse_latency_budget('1500', default=25) == 1.5
+    assert parse_latency_budget(600000, default=25, maximum=120) == 120
+    for bad in ('soon', -5, 0):
+        try:
+            parse_latency_budget(bad)
+            assert False, f'Expected ValueError for {bad!r}'
+        except ValueError:
+            pass
+    print("SUCCESS: Latency budgets parsed from milliseconds and clamped")
+
+
+def test_deadline_stops_waiting():
+    runner = DeadlineRunner(max_workers=2)
+    deadline = runner.deadline(0.1)
+    assert deadline.run(lambda value: value * 2, 21) == 42
+
+    start = time.monotonic()
+    try:
+        deadline.run(time.sleep, 1.0)
+        assert False, 'Expected DeadlineExceededError'
+    except DeadlineExceededError:
+        pass
+    assert time.monotonic() - start < 0.5
+
+    try:
+        deadline.run(lambda: 'too late')  # Budget already spent: not even submitted
+        assert False, 'Expected DeadlineExceededError'
+    except DeadlineExceededError:
+        pass
+
+    def socket_timeout():
+        raise socket.timeout('read timed out')
+
+    try:
+        runner.deadline(5).run(socket_timeout)  # The work's own timeout is not the deadline's
+        assert False, 'Expected socket.timeout'
+    except DeadlineExceededError:
+        assert False, 'socket.timeout reported as an expired deadline'
+    except socket.timeout:
+        pass
+
+    stats = runner.stats()
+    assert stats['calls'] == 3 and stats['expired'] == 2
+    print("SUCCESS: Deadline returns results in time and stops waiting when the budget is spent")
+
+
+def test_expired_queued_calls_never_run():
+    runner = DeadlineRunner(max_workers=1)
+    release = threading.Event()
+    ran = []
+    runner.submit(release.wait)  # Occupies the only worker
+    for index in range(5):
+        try:
+            runner.deadline(0.02).run(ran.append, index)
+            assert False, 'Expected DeadlineExceededError'
+        except DeadlineExceededError:
+            pass
+    release.set()
+    assert runner.deadline(1).run(lambda: 'after') == 'after'  # Queue drained past the cancelled calls
+    assert ran == []
+    assert runner.stats()['expired'] == 5
+    print("SUCCESS: Calls still queued when their deadline expires are dropped, not run late")
+
+
+def test_degraded_reasons():
+    assert degraded_reason(DeadlineExceededError()) == REASON_TIMEOUT
+    assert degraded_reason(CircuitOpenError()) == REASON_UNAVAILABLE
+    assert degraded_reason(ProviderUnavailableError()) == REASON_UNAVAILABLE
+    assert degraded_reason(api_exceptions.ServiceUnavailable('down')) == REASON_PROVIDER_ERROR
+    # Bad requests and unparseable answers are real errors, not outages
+    assert degraded_reason(api_exceptions.InvalidArgument('bad')) is None
+    assert degraded_reason(ValueError('Empty response from Gemini API.')) is None
+
+    runner = DeadlineRunner()
+    runner.record_degraded('analyze_resume', REASON_TIMEOUT)
+    runner.record_degraded('analyze_resume', REASON_TIMEOUT)
+    runner.record_degraded(None, REASON_UNAVAILABLE)
+    assert runner.stats()['degraded'] == {'analyze_resume': {REASON_TIMEOUT: 2}, 'unknown': {REASON_UNAVAILABLE: 1}}
+    print("SUCCESS: Timeouts and provider outages degrade, other errors surface")
+
+
+if __name__ == '__main__':
+    print("Testing latency budgets...")
+    test_parse_latency_budget()
+    test_deadline_stops_waiting()
+    test_expired_queued_calls_never_run()
+    test_degraded_reasons()
+    print("\nSUCCESS: All latency budget tests passed!")
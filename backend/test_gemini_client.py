@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Test the process-wide Gemini model registry"""
+
+import threading
+from types import SimpleNamespace
+
+from gemini_client import GeminiModelRegistry
+
+
+class StubModel:
+    """Records generate_content calls and answers with a canned response"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls.append((prompt, kwargs))
+        if kwargs.get('stream'):
+            return iter([SimpleNamespace(text='O'), SimpleNamespace(text='K')])
+        return SimpleNamespace(text=f'{self.name}: OK')
+
+
+class StubFactory:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, name):
+        self.created.append(name)
+        return StubModel(name)
+
+
+class RecordingResilience:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, fn, *args, **kwargs):
+        self.calls.append(kwargs)
+        return fn(*args, **kwargs)
+
+
+class RecordingHedger:
+    def __init__(self):
+        self.models = []
+
+    def call(self, fn, model_name):
+        self.models.append(model_name)
+        return fn()
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.tracked = []
+
+    def track(self, prompt, response, model_name, stream=False):
+        self.tracked.append((model_name, stream))
+        return response
+
+
+def test_model_selection_and_caching():
+    factory = StubFactory()
+    registry = GeminiModelRegistry('gemini-1.5-flash', model_factory=factory)
+    assert registry.get_model().name == 'gemini-1.5-flash'  # Default when no name is given
+    assert registry.get_model(None) is registry.get_model('gemini-1.5-flash')
+    assert registry.get_model('gemini-1.5-pro').name == 'gemini-1.5-pro'
+
+    threads = [threading.Thread(target=registry.get_model, args=('gemini-1.0-pro',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert factory.created == ['gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-1.0-pro']  # One handle per name
+    assert registry.stats()['models'] == ['gemini-1.0-pro', 'gemini-1.5-flash', 'gemini-1.5-pro']
+    print("SUCCESS: Default model used when none is named, one handle per model")
+
+
+def test_generate_content_pass_through():
+    registry = GeminiModelRegistry('gemini-1.5-flash', generation_config={'temperature': 0.4},
+                                   model_factory=StubFactory())
+    assert registry.generate_content('Hi').text == 'gemini-1.5-flash: OK'
+    assert registry.generate_content('Hi', model_name='gemini-1.5-pro',
+                                     generation_config={'max_output_tokens': 1}).text == 'gemini-1.5-pro: OK'
+    assert ''.join(chunk.text for chunk in registry.generate_content('Hi', stream=True)) == 'OK'
+
+    assert registry.get_model().calls == [
+        ('Hi', {'generation_config': {'temperature': 0.4}}),
+        ('Hi', {'stream': True, 'generation_config': {'temperature': 0.4}}),
+    ]
+    assert registry.get_model('gemini-1.5-pro').calls == [
+        ('Hi', {'generation_config': {'temperature': 0.4, 'max_output_tokens': 1}})
+    ]
+    assert registry.generation_config() == {'temperature': 0.4}  # Overrides don't leak into the default
+    assert registry.stats()['calls'] == 3
+
+    bare = GeminiModelRegistry('gemini-1.5-flash', model_factory=StubFactory())
+    bare.generate_content('Hi')
+    assert bare.get_model().calls == [('Hi', {})]  # No empty generation_config sent
+    print("SUCCESS: generate_content passes prompt, merged config and stream flag to the model")
+
+
+def test_wrappers_and_warm_up():
+    resilience, hedger, tracker = RecordingResilience(), RecordingHedger(), RecordingTracker()
+    registry = GeminiModelRegistry('gemini-1.5-flash', usage_tracker=tracker, resilience=resilience,
+                                   hedger=hedger, model_factory=StubFactory())
+    registry.generate_content('Hi')
+    list(registry.generate_content('Hi', stream=True))
+    assert hedger.models == ['gemini-1.5-flash']  # Streams are never hedged
+    assert resilience.calls == [{}, {'stream': True}]
+    assert tracker.tracked == [('gemini-1.5-flash', False), ('gemini-1.5-flash', True)]
+
+    registry.warm_up()
+    assert registry.warmed_up and registry.get_model().calls[-1] == (
+        'Reply with OK.', {'generation_config': {'max_output_tokens': 1}})
+
+    class OfflineModel(StubModel):
+        def generate_content(self, prompt, **kwargs):
+            raise RuntimeError('no network')
+
+    offline = GeminiModelRegistry('gemini-1.5-flash', model_factory=OfflineModel)
+    offline.warm_up()  # Logged, never raised
+    assert not offline.warmed_up
+    print("SUCCESS: Calls go through resilience, hedging (non-stream) and usage tracking; warm-up failures are logged")
+
+
+if __name__ == '__main__':
+    print("Testing the Gemini model registry...")
+    test_model_selection_and_caching()
+    test_generate_content_pass_through()
+    test_wrappers_and_warm_up()
+    print("\nSUCCESS: All Gemini model registry tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test hedged provider calls (latency percentiles, first answer wins, hedge budget)"""
+
+import threading
+import time
+
+from hedging import HedgeBudget, Hedger, LatencyTracker
+
+
+def warmed_hedger(budget_ratio=1.0, latency=0.01):
+    tracker = LatencyTracker()
+    for _ in range(tracker.window):
+        tracker.record('gemini', latency)
+    return Hedger(enabled=True, percentile=95, budget=HedgeBudget(budget_ratio), min_samples=20, tracker=tracker)
+
+
+def test_latency_percentiles_per_model():
+    tracker = LatencyTracker(window=100)
+    for value in range(1, 101):
+        tracker.record('fast', value / 100)
+    tracker.record('slow', 5.0)
+    assert tracker.percentile('fast', 50) == 0.5
+    assert tracker.percentile('fast', 95) == 0.95
+    assert tracker.percentile('slow', 95) == 5.0
+    assert tracker.percentile('unknown', 95) is None
+    tracker.record('fast', 2.0)  # Oldest sample falls out of the window
+    assert tracker.count('fast') == 100 and tracker.percentile('fast', 100) == 2.0
+    print("SUCCESS: Latency percentiles tracked per model over a sliding window")
+
+
+def test_slow_call_hedged_first_answer_wins():
+    hedger = warmed_hedger()
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+            slow = len(calls) == 1
+        time.sleep(1.0 if slow else 0.01)
+        return 'slow' if slow else 'hedge'
+
+    start = time.monotonic()
+    assert hedger.call(fn, 'gemini') == 'hedge'
+    assert time.monotonic() - start < 0.5  # Didn't wait for the slow primary
+    stats = hedger.stats()
+    assert len(calls) == 2 and stats['hedged_calls'] == 1 and stats['hedge_wins'] == 1
+
+    # A failed hedge leaves the primary's answer
+    hedger = warmed_hedger()
+    attempts = []
+
+    def flaky():
+        with lock:
+            attempts.append(1)
+            first = len(attempts) == 1
+        if first:
+            time.sleep(0.1)
+            return 'primary'
+        raise RuntimeError('hedge failed')
+
+    assert hedger.call(flaky, 'gemini') == 'primary'
+    print("SUCCESS: Slow call hedged and the first successful answer returned")
+
+
+def test_hedges_capped_by_budget_and_warm_up():
+    cold = Hedger(enabled=True, budget=HedgeBudget(1.0), min_samples=20)
+    assert cold.call(lambda: 'ok', 'gemini') == 'ok'
+    assert cold.stats()['hedged_calls'] == 0  # Still learning the model's latency
+
+    hedger = warmed_hedger(budget_ratio=0.25)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'ok'
+
+    for _ in range(8):
+        assert hedger.call(slow, 'gemini') == 'ok'
+    stats = hedger.stats()
+    # 8 calls at 0.25 hedges per call: 2 hedges, the other slow calls just wait
+    assert stats['hedged_calls'] == 2 and stats['budget_exhausted'] == 6
+    assert stats['models']['gemini']['p50_seconds'] == 0.01
+    print("SUCCESS: Hedges wait for enough samples and stay within the budget")
+
+
+if __name__ == '__main__':
+    print("Testing hedged provider calls...")
+    test_latency_percentiles_per_model()
+    test_slow_call_hedged_first_answer_wins()
+    test_hedges_capped_by_budget_and_warm_up()
+    print("\nSUCCESS: All hedging tests passed!")
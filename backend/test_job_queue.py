@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Test the Mongo-backed job queue: leases, retries, dead-lettering and lost leases"""
+
+import copy
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from job_queue import COMPLETED, DEAD_LETTER, QUEUED, RUNNING, JobQueue
+from run_job_worker import run_job
+
+USER_ID = '64b000000000000000000001'
+
+
+class QueueCollection:
+    """In-memory collection supporting the filters and updates JobQueue issues"""
+
+    def __init__(self):
+        self.docs = {}
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, condition in query.items():
+            if key == '$or':
+                if not any(QueueCollection._matches(doc, branch) for branch in condition):
+                    return False
+                continue
+            value = doc.get(key)
+            if isinstance(condition, dict):
+                for operator, operand in condition.items():
+                    if value is None:
+                        return False
+                    if operator == '$lt' and not value < operand:
+                        return False
+                    if operator == '$lte' and not value <= operand:
+                        return False
+                    if operator == '$gte' and not value >= operand:
+                        return False
+            elif value != condition:
+                return False
+        return True
+
+    @staticmethod
+    def _apply(doc, update):
+        doc.update(update.get('$set', {}))
+        for key, amount in update.get('$inc', {}).items():
+            doc[key] = doc.get(key, 0) + amount
+
+    def insert_one(self, doc):
+        doc = dict(doc, _id=ObjectId())
+        self.docs[doc['_id']] = doc
+        return SimpleNamespace(inserted_id=doc['_id'])
+
+    def find_one(self, query, projection=None):
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    def find_one_and_update(self, query, update, sort=None, return_document=None):
+        matching = [doc for doc in self.docs.values() if self._matches(doc, query)]
+        if not matching:
+            return None
+        field = sort[0][0]
+        doc = min(matching, key=lambda doc: doc[field])
+        self._apply(doc, update)
+        return copy.deepcopy(doc)
+
+    def update_one(self, query, update):
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                self._apply(doc, update)
+                return SimpleNamespace(matched_count=1, modified_count=1)
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+    def update_many(self, query, update):
+        matching = [doc for doc in self.docs.values() if self._matches(doc, query)]
+        for doc in matching:
+            self._apply(doc, update)
+        return SimpleNamespace(matched_count=len(matching), modified_count=len(matching))
+
+    def expire_lease(self, job_id):
+        self.docs[ObjectId(job_id)]['lease_expires_at'] = datetime.utcnow() - timedelta(seconds=1)
+
+    def make_available(self, job_id):
+        self.docs[ObjectId(job_id)]['available_at'] = datetime.utcnow() - timedelta(seconds=1)
+
+
+def test_claim_leases_oldest_job_once():
+    collection = QueueCollection()
+    queue = JobQueue(collection, lease_seconds=60, max_attempts=3)
+    first = queue.enqueue('improvement_analysis', {'n': 1}, USER_ID)
+    queue.enqueue('improvement_analysis', {'n': 2}, USER_ID)
+
+    job = queue.claim('worker-a')
+    assert str(job['_id']) == first and job['status'] == RUNNING and job['attempts'] == 1
+    assert job['worker_id'] == 'worker-a' and job['lease_expires_at'] > datetime.utcnow()
+    assert queue.claim('worker-b')['payload'] == {'n': 2}
+    assert queue.claim('worker-c') is None  # Both leased
+
+    assert queue.extend_lease(first, 'worker-a')
+    assert not queue.complete(first, 'worker-b', {'ok': True})  # Not the lease holder
+    assert queue.complete(first, 'worker-a', {'ok': True})
+    assert queue.get(first, USER_ID)['status'] == COMPLETED
+    assert queue.get(first, '64b000000000000000000002') is None
+    print("SUCCESS: Jobs leased oldest first, one worker at a time; only the holder completes them")
+
+
+def test_expired_lease_reclaimed():
+    collection = QueueCollection()
+    queue = JobQueue(collection, lease_seconds=60, max_attempts=3)
+    job_id = queue.enqueue('improvement_analysis', {})
+    queue.claim('worker-a')
+
+    collection.expire_lease(job_id)
+    job = queue.claim('worker-b')
+    assert str(job['_id']) == job_id and job['worker_id'] == 'worker-b' and job['attempts'] == 2
+    assert not queue.extend_lease(job_id, 'worker-a')
+    assert not queue.complete(job_id, 'worker-a', {'stale': True})
+    assert queue.fail(job_id, 'worker-a', 'late failure') is None
+    assert queue.get(job_id)['status'] == RUNNING and queue.get(job_id)['result'] is None
+    print("SUCCESS: Expired leases are re-claimed and the previous holder can no longer write")
+
+
+def test_fail_requeues_then_dead_letters():
+    collection = QueueCollection()
+    queue = JobQueue(collection, lease_seconds=60, max_attempts=2, retry_delay_seconds=30)
+    job_id = queue.enqueue('improvement_analysis', {})
+
+    queue.claim('worker-a')
+    assert queue.fail(job_id, 'worker-a', ValueError('bad answer')) == QUEUED
+    job = queue.get(job_id)
+    assert job['last_error'] == 'bad answer' and job['available_at'] > datetime.utcnow()
+    assert queue.claim('worker-a') is None  # Retry delay not over yet
+
+    collection.make_available(job_id)
+    assert queue.claim('worker-a')['attempts'] == 2
+    assert queue.fail(job_id, 'worker-a', 'still bad') == DEAD_LETTER
+    collection.make_available(job_id)
+    assert queue.claim('worker-a') is None
+    assert queue.get(job_id)['status'] == DEAD_LETTER
+    print("SUCCESS: Failures are retried after a delay and dead-lettered at the attempt limit")
+
+
+def test_reap_expired_final_attempts():
+    collection = QueueCollection()
+    queue = JobQueue(collection, lease_seconds=60, max_attempts=1)
+    final = queue.enqueue('improvement_analysis', {})
+    queue.claim('worker-a')
+    assert queue.reap_expired() == 0  # Lease still valid
+
+    collection.expire_lease(final)
+    assert queue.claim('worker-b') is None  # Out of attempts, so not re-claimable
+    assert queue.reap_expired() == 1
+    job = queue.get(final)
+    assert job['status'] == DEAD_LETTER and job['last_error'] == 'Lease expired on final attempt'
+    print("SUCCESS: Jobs whose worker died on the final attempt are dead-lettered")
+
+
+def test_worker_discards_result_after_lost_lease():
+    collection = QueueCollection()
+    queue = JobQueue(collection, lease_seconds=60, max_attempts=3)
+    job_id = queue.enqueue('improvement_analysis', {'n': 1}, USER_ID)
+    job = queue.claim('worker-a')
+
+    def slow_handler(payload):
+        collection.expire_lease(job_id)
+        queue.claim('worker-b')  # Re-claimed while worker-a is still running
+        return {'n': payload['n']}
+
+    assert run_job(queue, job, slow_handler, 'worker-a') is None
+    assert queue.get(job_id)['status'] == RUNNING and queue.get(job_id)['result'] is None
+
+    other = queue.enqueue('improvement_analysis', {'n': 2})
+    assert run_job(queue, queue.claim('worker-c'), lambda payload: payload, 'worker-c') == COMPLETED
+    assert queue.get(other)['result'] == {'n': 2}
+    print("SUCCESS: Worker reports a lost lease instead of claiming success")
+
+
+if __name__ == '__main__':
+    print("Testing the job queue...")
+    test_claim_leases_oldest_job_once()
+    test_expired_lease_reclaimed()
+    test_fail_requeues_then_dead_letters()
+    test_reap_expired_final_attempts()
+    test_worker_discards_result_after_lost_lease()
+    print("\nSUCCESS: All job queue tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Test the incremental, string-aware JSON extractor"""
+
+import json
+
+from json_stream import StreamingJSONExtractor, extract_first_json_object
+
+SAMPLE_RESPONSE = '```json\n' + json.dumps({
+    'specific_improvements': [
+        {
+            'section': 'Experience',
+            'original_text': 'Managed {team} of 5 engineers}',
+            'improved_text': 'Led a team of 5 engineers, shipping \\"Project X\\" [ahead] of schedule',
+            'reason': 'Quantifies leadership'
+        },
+        {
+            'section': 'Projects',
+            'original_text': 'Built a website.',
+            'improved_text': 'Built a React website serving 10k users.',
+            'reason': 'Adds scale'
+        }
+    ]
+}, indent=2) + '\n```'
+
+
+def _stream(text, chunk_size):
+    extractor = StreamingJSONExtractor(array_key='specific_improvements')
+    elements = []
+    for i in range(0, len(text), chunk_size):
+        elements.extend(extractor.feed(text[i:i + chunk_size]))
+    return extractor, elements
+
+
+def test_elements_match_full_parse_for_any_chunking():
+    expected = json.loads(SAMPLE_RESPONSE[len('```json\n'):-len('\n```')])['specific_improvements']
+    for chunk_size in (1, 2, 5, 17, len(SAMPLE_RESPONSE)):
+        extractor, elements = _stream(SAMPLE_RESPONSE, chunk_size)
+        assert elements == expected, f'chunk size {chunk_size}'
+        assert extractor.done
+    print("SUCCESS: Streamed elements match the full parse for every chunk size")
+
+
+def test_elements_are_emitted_before_the_response_ends():
+    cutoff = SAMPLE_RESPONSE.index('"Projects"')
+    extractor = StreamingJSONExtractor(array_key='specific_improvements')
+    first = extractor.feed(SAMPLE_RESPONSE[:cutoff])
+    assert len(first) == 1
+    assert first[0]['section'] == 'Experience'
+    print("SUCCESS: First element is available before the stream completes")
+
+
+def test_other_arrays_are_ignored():
+    extractor = StreamingJSONExtractor(array_key='specific_improvements')
+    text = '{"skill_additions": [{"skill": "AWS"}], "specific_improvements": [{"section": "Summary"}]}'
+    assert extractor.feed(text) == [{'section': 'Summary'}]
+    print("SUCCESS: Only the requested array is extracted")
+
+
+def test_braces_inside_strings_do_not_end_the_object():
+    data = extract_first_json_object(SAMPLE_RESPONSE)
+    assert data['specific_improvements'][0]['original_text'] == 'Managed {team} of 5 engineers}'
+    assert len(data['specific_improvements']) == 2
+    print("SUCCESS: Braces inside string values are ignored")
+
+
+def test_prose_around_the_object_is_skipped():
+    text = 'Here is the "JSON" you asked for:\n{"ats_score": 85, "note": "a } b"}\nThanks! {not json}'
+    assert extract_first_json_object(text) == {'ats_score': 85, 'note': 'a } b'}
+    print("SUCCESS: Leading and trailing prose is skipped")
+
+
+def test_incomplete_and_missing_objects_raise():
+    for text, message in (('no json here', 'No JSON object'), ('{"a": "b"', 'Could not find a complete')):
+        try:
+            extract_first_json_object(text)
+            assert False, 'Expected ValueError'
+        except ValueError as e:
+            assert message in str(e)
+    print("SUCCESS: Missing or truncated objects raise ValueError")
+
+
+def test_object_result_is_resumable_across_chunks():
+    extractor = StreamingJSONExtractor()
+    for i in range(0, len(SAMPLE_RESPONSE), 3):
+        extractor.feed(SAMPLE_RESPONSE[i:i + 3])
+    assert extractor.close() == extract_first_json_object(SAMPLE_RESPONSE)
+    print("SUCCESS: Chunked feeding yields the same object")
+
+
+if __name__ == '__main__':
+    test_elements_match_full_parse_for_any_chunking()
+    test_elements_are_emitted_before_the_response_ends()
+    test_other_arrays_are_ignored()
+    test_braces_inside_strings_do_not_end_the_object()
+    test_prose_around_the_object_is_skipped()
+    test_incomplete_and_missing_objects_raise()
+    test_object_result_is_resumable_across_chunks()
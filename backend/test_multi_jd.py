@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test multi-JD evaluation (input parsing, bounded concurrency, per-JD fallback)"""
+
+import threading
+import time
+
+from ats_scoring import score_resume
+from multi_jd import evaluate_job_descriptions, parse_job_descriptions
+
+RESUME = 'Backend engineer: Python, Flask, MongoDB, Docker. 5 years of experience.'
+
+
+def test_parse_job_descriptions():
+    parsed = parse_job_descriptions('["Python developer", {"id": "acme", "title": "SRE", "jobDescription": " Go, Kubernetes "}]')
+    assert parsed == [
+        {'id': '0', 'title': None, 'jobDescription': 'Python developer'},
+        {'id': 'acme', 'title': 'SRE', 'jobDescription': 'Go, Kubernetes'}
+    ]
+    for bad in (None, '[]', 'not json', ['ok', '  '], ['a', 'b', 'c']):
+        try:
+            parse_job_descriptions(bad, max_items=2)
+            assert False, f'Expected ValueError for {bad!r}'
+        except ValueError:
+            pass
+    print("SUCCESS: Job descriptions parsed and validated")
+
+
+def test_concurrent_and_bounded():
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def analyze(job_description, resume_text):
+        with lock:
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        if 'Rust' in job_description:
+            raise RuntimeError('Gemini unavailable')
+        return {'atsScore': 99}
+
+    job_descriptions = parse_job_descriptions([f'Python Flask role {i}' for i in range(7)] + ['Rust role'])
+    start = time.perf_counter()
+    entries = list(evaluate_job_descriptions(
+        RESUME, job_descriptions, score_resume, analyze=analyze,
+        merge=lambda local, ai: {**local, **ai}, max_workers=4
+    ))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(entry['index'] for entry in entries) == list(range(8))
+    assert peak[0] == 4
+    assert elapsed < 8 * 0.05  # Sequential calls would take 0.4s
+    by_index = {entry['index']: entry for entry in entries}
+    assert by_index[0]['atsScore'] == 99 and by_index[0]['analysisSource'] == 'gemini'
+    # A failed Gemini call keeps that JD's local score
+    assert by_index[7]['analysisSource'] == 'local' and by_index[7]['aiError'] == 'Gemini unavailable'
+    assert by_index[7]['degraded'] is True and 'degraded' not in by_index[0]
+    assert by_index[7]['atsScore'] == by_index[7]['results']['atsScore']
+    print(f"SUCCESS: 8 job descriptions evaluated in {elapsed:.2f}s with at most {peak[0]} concurrent calls")
+
+
+if __name__ == '__main__':
+    print("Testing multi-JD evaluation...")
+    test_parse_job_descriptions()
+    test_concurrent_and_bounded()
+    print("\nSUCCESS: All multi-JD tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test keyset cursors, page size limits and the cached counter"""
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from pagination import (
+    CountCache, InvalidCursorError, decode_cursor, encode_keyset_cursor, encode_offset_cursor,
+    keyset_filter, page_size
+)
+
+
+def test_cursor_round_trip():
+    doc = {'_id': ObjectId('64b000000000000000000abc'), 'updated_at': datetime(2024, 5, 1, 12, 30, 0, 123000)}
+    kind, (updated_at, last_id) = decode_cursor(encode_keyset_cursor(doc))
+    assert kind == 'keyset' and updated_at == doc['updated_at'] and last_id == doc['_id']
+    assert keyset_filter((updated_at, last_id))['$or'][1] == {'updated_at': updated_at, '_id': {'$lt': last_id}}
+    assert decode_cursor(encode_offset_cursor(20)) == ('offset', 20)
+
+    for bad in ('not-base64!', encode_offset_cursor(-1), 'eyJ1IjoxfQ'):  # the last one is {"u":1}
+        try:
+            decode_cursor(bad)
+            assert False, f'Expected InvalidCursorError for {bad!r}'
+        except InvalidCursorError:
+            pass
+    print("SUCCESS: Cursors round-trip and tampered cursors are rejected")
+
+
+def test_page_size_capped():
+    assert page_size(None) == 10
+    assert page_size('500', maximum=50) == 50
+    assert page_size('0') == 1
+    try:
+        page_size('ten')
+        assert False, 'Expected ValueError'
+    except ValueError:
+        pass
+    print("SUCCESS: Page size defaults, clamps and validates")
+
+
+def test_count_cache_expires_and_invalidates():
+    now = [0.0]
+    cache = CountCache(ttl_seconds=60, clock=lambda: now[0])
+    counts = iter([3, 4, 5])
+    assert cache.get('user', lambda: next(counts)) == 3
+    assert cache.get('user', lambda: next(counts)) == 3  # Cached
+    cache.invalidate('user')  # A write by this worker
+    assert cache.get('user', lambda: next(counts)) == 4
+    now[0] = 61  # Writes by other workers show up once the entry expires
+    assert cache.get('user', lambda: next(counts)) == 5
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 3 and stats['invalidations'] == 1
+    print("SUCCESS: Counts cached until invalidated or expired")
+
+
+if __name__ == '__main__':
+    print("Testing keyset pagination...")
+    test_cursor_round_trip()
+    test_page_size_capped()
+    test_count_cache_expires_and_invalidates()
+    print("\nSUCCESS: All pagination tests passed!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test sandboxed, page-parallel PDF extraction"""
+
+import io
+import time
+
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+
+import pdf_extraction
+from pdf_extraction import PDFExtractionError, PDFExtractionPool
+
+
+def make_pdf(page_count):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for index in range(page_count):
+        pdf.drawString(72, 720, f'Page {index + 1}: Python developer with Flask experience')
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def inline_text(pdf_bytes):
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+def test_matches_inline_extraction_across_page_ranges():
+    pdf_bytes = make_pdf(7)
+    pool = PDFExtractionPool(workers=2, pages_per_task=2, max_pages=0)
+    try:
+        extraction = pool.extract(pdf_bytes)
+    finally:
+        pool.shutdown()
+
+    assert extraction.text == inline_text(pdf_bytes)
+    assert extraction.page_count == extraction.pages_extracted == 7
+    assert len(extraction.page_seconds) == 7
+    assert not extraction.truncated
+    print(f"SUCCESS: 7 pages in {extraction.seconds:.3f}s, per page: {extraction.page_seconds}")
+
+
+def test_page_cap_truncates():
+    pool = PDFExtractionPool(workers=1, pages_per_task=2, max_pages=3)
+    try:
+        extraction = pool.extract(make_pdf(5))
+    finally:
+        pool.shutdown()
+
+    assert extraction.pages_extracted == 3 and extraction.page_count == 5
+    assert extraction.truncated
+    assert 'Page 3' in extraction.text and 'Page 4' not in extraction.text
+    assert pool.stats()['truncated'] == 1
+    print("SUCCESS: Page cap respected")
+
+
+def test_malformed_pdf_raises():
+    pool = PDFExtractionPool(workers=1)
+    try:
+        pool.extract(b'not a pdf')
+        assert False, 'Expected PDFExtractionError'
+    except PDFExtractionError:
+        pass
+    finally:
+        pool.shutdown()
+    assert pool.stats()['failures'] == 1
+    print("SUCCESS: Malformed PDF reported as PDFExtractionError")
+
+
+def slow_page_range(pdf_bytes, start, stop, timeout):
+    pdf_extraction.signal.setitimer(pdf_extraction.signal.ITIMER_REAL, timeout)
+    time.sleep(5)
+
+
+def test_worker_timeout():
+    original = pdf_extraction._extract_page_range
+    pdf_extraction._extract_page_range = slow_page_range
+    pool = PDFExtractionPool(workers=1, task_timeout=0.3)
+    try:
+        started = time.time()
+        pool.extract(make_pdf(1))
+        assert False, 'Expected PDFExtractionError'
+    except PDFExtractionError as e:
+        assert 'timed out' in str(e)
+        assert time.time() - started < 3
+    finally:
+        pdf_extraction._extract_page_range = original
+        pool.shutdown()
+    assert pool.stats()['timeouts'] == 1
+    print("SUCCESS: Stuck task interrupted by the worker timeout")
+
+
+if __name__ == '__main__':
+    test_matches_inline_extraction_across_page_ranges()
+    test_page_cap_truncates()
+    test_malformed_pdf_raises()
+    test_worker_timeout()
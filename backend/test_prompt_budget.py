@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test section-aware prompt compression"""
+
+from prompt_budget import PromptCompressor, estimate_tokens
+from text_normalizer import normalize_resume_text, normalize_text
+
+RESUME = """John Doe
+john.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/johndoe
+SUMMARY
+Backend engineer with 6 years building Python services.
+EXPERIENCE
+Senior Engineer, Acme Corp 2019 - Present
+• Built Flask APIs serving 2M requests per day on AWS.
+• Migrated MongoDB clusters and cut latency by 40%.
+• Organized the office book club and social events.
+Engineer, Beta Inc 2016 - 2019
+• Wrote React dashboards for internal sales teams.
+• Maintained Docker based CI pipelines with Jenkins.
+EDUCATION
+B.Tech Computer Science, State University 2016
+SKILLS: Python, Flask, MongoDB, Docker, AWS, React
+HOBBIES
+Chess, hiking, photography
+REFERENCES
+Available on request
+"""
+
+JOB_DESCRIPTION = """Senior Python Engineer
+Responsibilities
+Design Flask APIs and scale MongoDB. Own Docker deployments on AWS.
+Requirements
+5+ years Python. Experience with Flask, MongoDB, Docker and AWS.
+Benefits
+Health insurance, 401k matching, unlimited PTO.
+We are an equal opportunity employer and value diversity without regard to race, color or religion.
+"""
+
+
+def _sentences(text):
+    return [line for line in text.split('\n') if line and not line.isupper()]
+
+
+def test_drops_contact_and_boilerplate():
+    result = PromptCompressor().compress(RESUME, JOB_DESCRIPTION, 1000, 1000)
+    assert 'john.doe@example.com' not in result.resume
+    assert '555' not in result.resume
+    assert 'Available on request' not in result.resume
+    assert '2016 - 2019' in result.resume  # Date ranges are not phone numbers
+    assert 'Health insurance' not in result.job_description
+    assert 'equal opportunity' not in result.job_description
+    assert 'Own Docker deployments on AWS.' in result.job_description
+    print("SUCCESS: Contact details, references, benefits and EEO text dropped")
+
+
+def test_fits_budget_with_verbatim_units():
+    compressor = PromptCompressor()
+    for resume in (RESUME, normalize_text(RESUME)):
+        result = compressor.compress(resume, JOB_DESCRIPTION, 60, 30)
+        assert result.resume_tokens_after <= 60 + 10  # Headings are estimated loosely
+        assert estimate_tokens(result.job_description) == result.jd_tokens_after
+        # Improvements quote resume text, so every kept unit must appear verbatim
+        for sentence in _sentences(result.resume):
+            assert sentence in resume, sentence
+        assert 'Built Flask APIs serving 2M requests per day on AWS.' in result.resume
+        assert 'book club' not in result.resume
+        assert 'Chess' not in result.resume
+    stats = compressor.stats()
+    assert stats['calls'] == 2 and stats['tokens_saved'] > 0
+    print(f"SUCCESS: Budgets respected, {stats['saved_ratio']:.0%} of tokens saved")
+
+
+def test_short_inputs_kept_whole():
+    result = PromptCompressor().compress(
+        'Python developer. Built Flask APIs.', 'Python developer with Flask', 1000, 750
+    )
+    assert result.resume == 'Python developer.\nBuilt Flask APIs.'
+    assert result.job_description == 'Python developer with Flask'
+    print("SUCCESS: Inputs under budget are not trimmed")
+
+
+def test_cleaned_resume_keeps_sections():
+    resume = RESUME.replace('SUMMARY', 'Summary').replace('EXPERIENCE', 'Experience').replace('REFERENCES', 'References')
+    cleaned = normalize_resume_text(resume, preserve_lines=True)  # What resume_text_from_pdf returns
+    compact = PromptCompressor().compress_resume(cleaned, JOB_DESCRIPTION, 1000)[0]
+    assert 'SUMMARY\n' in compact and 'EXPERIENCE\n' in compact
+    assert 'Available on request' not in compact  # References dropped as a section
+    flat = PromptCompressor().compress_resume(normalize_resume_text(resume), JOB_DESCRIPTION, 1000)[0]
+    assert 'EXPERIENCE\n' not in flat  # Title-case headings are lost once lines are flattened
+    print("SUCCESS: Line-preserved resume text keeps its sections through compression")
+
+
+if __name__ == '__main__':
+    print("Testing prompt compression...")
+    test_drops_contact_and_boilerplate()
+    test_fits_budget_with_verbatim_units()
+    test_short_inputs_kept_whole()
+    test_cleaned_resume_keeps_sections()
+    print("\nSUCCESS: All prompt compression tests passed!")
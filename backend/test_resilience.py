@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Test the provider resilience layer (retry classes, AIMD limit, circuit breaker)"""
+
+import threading
+
+from google.api_core import exceptions as api_exceptions
+
+from resilience import (
+    CLOSED, FATAL, HALF_OPEN, OPEN, OVERLOADED, RETRYABLE,
+    AdaptiveLimiter, CircuitBreaker, CircuitOpenError, ConcurrencyLimitError,
+    ResilientCaller, RetryPolicy, classify_error
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(errors, result='ok'):
+    """A callable that raises the given errors in turn, then returns result"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def test_classify_error():
+    assert classify_error(api_exceptions.ResourceExhausted('quota')) == OVERLOADED
+    assert classify_error(api_exceptions.ServiceUnavailable('down')) == RETRYABLE
+    assert classify_error(api_exceptions.InvalidArgument('bad prompt')) == FATAL
+    assert classify_error(ConnectionResetError()) == RETRYABLE
+    assert classify_error(TimeoutError()) == OVERLOADED
+    assert classify_error(ValueError('blocked by safety filters')) == FATAL
+    print("SUCCESS: Provider errors classified")
+
+
+def test_retries_with_backoff_then_succeeds():
+    sleeps = []
+    caller = ResilientCaller('test', retry=RetryPolicy(attempts=3, base_delay=1, max_delay=3), sleep=sleeps.append)
+    fn = flaky([api_exceptions.ServiceUnavailable('down'), api_exceptions.ResourceExhausted('quota')])
+    assert caller.call(fn) == 'ok'
+    assert len(fn.calls) == 3
+    # Full jitter: attempt n sleeps somewhere in [0, min(max_delay, base * 2**n)]
+    assert 0 <= sleeps[0] <= 1 and 0 <= sleeps[1] <= 2
+
+    fatal = flaky([api_exceptions.InvalidArgument('bad')])
+    try:
+        caller.call(fatal)
+        assert False, 'Expected InvalidArgument'
+    except api_exceptions.InvalidArgument:
+        pass
+    assert len(fatal.calls) == 1  # Not retried
+    stats = caller.stats()
+    assert stats['retries'] == 2 and stats['failures'] == {RETRYABLE: 1, OVERLOADED: 1, FATAL: 1}
+    print("SUCCESS: Transient errors retried with jittered backoff, fatal errors raised at once")
+
+
+def test_aimd_limit():
+    limiter = AdaptiveLimiter(initial=8, min_limit=2, max_limit=10, queue_timeout=0.05)
+    limiter.acquire()
+    limiter.release(OVERLOADED)
+    assert limiter.limit == 4
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release('success')
+    assert 5 < limiter.limit < 6  # +1/limit per success
+
+    for _ in range(5):
+        limiter.acquire()
+    try:
+        limiter.acquire()
+        assert False, 'Expected ConcurrencyLimitError'
+    except ConcurrencyLimitError:
+        pass
+    threading.Timer(0.01, limiter.release, args=('success',)).start()
+    limiter.acquire(timeout=1)  # A released slot wakes a waiter
+    print("SUCCESS: Concurrency limit grows additively, halves on overload and queues callers")
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    caller = ResilientCaller(
+        'test',
+        retry=RetryPolicy(attempts=1),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    )
+    down = flaky([api_exceptions.ServiceUnavailable('down')] * 10)
+    for _ in range(2):
+        try:
+            caller.call(down)
+        except api_exceptions.ServiceUnavailable:
+            pass
+    assert caller.breaker.state == OPEN
+
+    try:
+        caller.call(down)
+        assert False, 'Expected CircuitOpenError'
+    except CircuitOpenError:
+        pass
+    assert len(down.calls) == 2  # Failed fast without calling the provider
+
+    clock.now = 31  # Half-open: one probe goes through and its success closes the circuit
+    assert caller.call(lambda: 'ok') == 'ok'
+    stats = caller.stats()
+    assert stats['circuit']['state'] == CLOSED and stats['rejected_open'] == 1
+    assert stats['circuit']['transitions'] == {CLOSED: 1, OPEN: 1, HALF_OPEN: 1}
+    assert stats['circuit']['calls_by_state'][OPEN] == 1
+    assert stats['circuit']['seconds_in_state'][OPEN] == 31
+    print("SUCCESS: Circuit opens after repeated failures, fails fast, and closes after a good probe")
+
+
+if __name__ == '__main__':
+    print("Testing the resilience layer...")
+    test_classify_error()
+    test_retries_with_backoff_then_succeeds()
+    test_aimd_limit()
+    test_circuit_breaker_opens_and_recovers()
+    print("\nSUCCESS: All resilience tests passed!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Test list previews, the projected list shape and compact resume storage"""
+
+import json
+from datetime import datetime
+
+import bson
+
+from resume_documents import (
+    LIST_PROJECTION, STORAGE_FORMAT, build_preview, content_string, fill_missing_previews, list_item,
+    migrate_document, migrate_storage, pack_field, parse_content, resume_analysis_text, resume_structured_data,
+    storage_fields, unpack_field
+)
+
+
+class PreviewCollection:
+    """Serves find() from stored docs and records update_one calls"""
+
+    def __init__(self, docs):
+        self.docs = {doc['_id']: doc for doc in docs}
+        self.updates = []
+
+    def find(self, query, projection):
+        for doc_id in query['_id']['$in']:
+            doc = self.docs[doc_id]
+            yield {'_id': doc_id, **{key: doc[key] for key in projection if key in doc}}
+
+    def update_one(self, query, update):
+        self.updates.append((query['_id'], update['$set']))
+
+
+class MigrationCollection:
+    """Serves find() from stored docs and records bulk_write batches"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.batches = []
+
+    def find(self, query):
+        assert query == {'storage_format': {'$ne': STORAGE_FORMAT}}
+        return [doc for doc in self.docs if doc.get('storage_format') != STORAGE_FORMAT]
+
+    def bulk_write(self, requests, ordered=True):
+        self.batches.append(len(requests))
+
+
+def long_resume():
+    return {
+        'name': 'Ann Lee', 'email': 'ann@example.com', 'phone': '555 0100',
+        'summary': 'Backend engineer ' * 40,
+        'experience': [{'title': 'Engineer', 'description': 'Shipped services. ' * 200}] * 5,
+        'skills': ['Python', 'Go', 'Kubernetes'] * 20,
+        'layout': {'template': 'classic', 'color': '#222222'}
+    }
+
+
+def test_build_preview():
+    preview = build_preview(long_resume())
+    assert preview['name'] == 'Ann Lee' and preview['template'] == 'classic'
+    assert len(preview['summary']) == 103 and preview['summary'].endswith('...')
+    assert build_preview({'raw_content': 'text', 'layout': None}) == {
+        'name': '', 'email': '', 'phone': '', 'summary': '', 'template': 'modern', 'color': '#0d6efd'
+    }
+    print("SUCCESS: Preview built from structured data, with defaults for odd shapes")
+
+
+def test_projection_is_an_order_of_magnitude_smaller():
+    content = long_resume()
+    doc = {
+        '_id': bson.ObjectId(), 'user_id': bson.ObjectId(), 'title': 'Backend', 'content': json.dumps(content),
+        'structured_data': content, 'keywords': ['Python'], 'ats_score': 80, 'version': 2, 'is_active': True,
+        'created_at': datetime(2024, 1, 1), 'updated_at': datetime(2024, 1, 2),
+        'metadata': {'template': 'classic'}, 'preview': build_preview(content)
+    }
+    projected = {'_id': doc['_id'], **{key: doc[key] for key in LIST_PROJECTION if key in doc}}
+    assert len(bson.encode(doc)) > 10 * len(bson.encode(projected))
+    assert list_item(projected)['preview'] == doc['preview']
+    print("SUCCESS: Projected list documents are over 10x smaller and carry everything the list needs")
+
+
+def test_missing_previews_filled_and_saved():
+    legacy_id, current_id = bson.ObjectId(), bson.ObjectId()
+    collection = PreviewCollection([{'_id': legacy_id, 'structured_data': long_resume()}])
+    docs = [{'_id': current_id, 'preview': {'name': 'Kept'}}, {'_id': legacy_id}]
+    fill_missing_previews(collection, docs)
+    assert docs[0]['preview'] == {'name': 'Kept'} and docs[1]['preview']['name'] == 'Ann Lee'
+    assert collection.updates == [(legacy_id, {'preview': docs[1]['preview']})]
+    print("SUCCESS: Older documents get their preview computed once and stored")
+
+
+def test_storage_round_trip():
+    small = {'name': 'Ann Lee', 'skills': ['Python']}
+    assert pack_field('structured_data', small) == {'structured_data': small}
+
+    fields = storage_fields(long_resume(), [{'type': 'skill_addition'}])
+    assert fields['storage_format'] == STORAGE_FORMAT and 'content' not in fields
+    assert 'structured_data' not in fields and 'structured_data_z' in fields  # Over the threshold
+    assert fields['improvements_applied'] == [{'type': 'skill_addition'}]
+    assert len(fields['structured_data_z']) * 10 < len(json.dumps(long_resume()))
+    assert resume_structured_data(fields) == long_resume()
+    assert unpack_field(fields, 'improvements_applied') == [{'type': 'skill_addition'}]
+
+    assert content_string(parse_content(json.dumps(small))) == json.dumps(small, separators=(',', ':'))
+    assert content_string(parse_content('Plain text resume')) == 'Plain text resume'
+    print("SUCCESS: One stored copy, large fields compressed, content string derived on read")
+
+
+def test_legacy_documents_read_and_migrated():
+    content = long_resume()
+    legacy = {
+        '_id': bson.ObjectId(), 'title': 'Backend', 'content': json.dumps(content),
+        'structured_data': content, 'improvements_applied': [{'type': 'bullet'}] * 3
+    }
+    text_only = {'_id': bson.ObjectId(), 'title': 'Plain', 'content': 'Plain text resume', 'structured_data': {}}
+    assert resume_structured_data(legacy) == content
+    assert resume_structured_data(text_only) == {'raw_content': 'Plain text resume'}
+
+    new_fields, unset = migrate_document(legacy)
+    assert unset == {'content': '', 'structured_data': ''}
+    assert resume_structured_data(new_fields) == content and new_fields['preview']['name'] == 'Ann Lee'
+    new_fields, unset = migrate_document(text_only)
+    assert unset == {'content': ''} and new_fields['structured_data'] == {'raw_content': 'Plain text resume'}
+
+    current = {'_id': bson.ObjectId(), **storage_fields({'name': 'Done'})}
+    collection = MigrationCollection([legacy, text_only, current])
+    report = migrate_storage(collection, dry_run=True)
+    assert report['documents'] == 2 and collection.batches == []
+    assert report['bytes_after'] * 5 < report['bytes_before']
+    assert migrate_storage(collection, batch_size=1)['documents'] == 2 and collection.batches == [1, 1]
+    print("SUCCESS: Older documents read as before and migrate to a fraction of their size")
+
+
+def test_analysis_text_same_for_both_formats():
+    def format_resume(structured_data):
+        return f"Name: {structured_data['name']}\nSKILLS: {', '.join(structured_data['skills'])}"
+
+    content = long_resume()
+    legacy = {'content': json.dumps(content), 'structured_data': content}
+    legacy_dict = {'content': content}  # Saved by the old improve route
+    current = storage_fields(content)
+    expected = format_resume(content)
+    assert resume_analysis_text(legacy, format_resume) == expected
+    assert resume_analysis_text(legacy_dict, format_resume) == expected
+    assert resume_analysis_text(current, format_resume) == expected
+    new_fields, _ = migrate_document(legacy)
+    assert resume_analysis_text(new_fields, format_resume) == expected
+
+    for doc in ({'content': 'Plain text resume', 'structured_data': {}}, storage_fields(parse_content('Plain text resume'))):
+        assert resume_analysis_text(doc, format_resume) == 'Plain text resume'
+    print("SUCCESS: Analysis text is formatted alike for legacy, migrated and new documents")
+
+
+if __name__ == '__main__':
+    print("Testing resume list previews...")
+    test_build_preview()
+    test_projection_is_an_order_of_magnitude_smaller()
+    test_missing_previews_filled_and_saved()
+    test_storage_round_trip()
+    test_legacy_documents_read_and_migrated()
+    test_analysis_text_same_for_both_formats()
+    print("\nSUCCESS: All resume document tests passed!")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test resume search tokens, query filters and relevance ranking"""
+
+from datetime import datetime
+
+from resume_search import query_terms, rank, search_fields, search_filter
+
+
+def test_search_fields_normalized():
+    fields = search_fields(
+        'Senior Backend Engineer – José',
+        keywords=['JS', {'name': 'Node.js'}],
+        structured_data={'summary': 'Built the payments APIs', 'skills': ['Python', 'C++', '']}
+    )
+    tokens = fields['search_tokens']
+    assert fields['search_title_tokens'] == ['backend', 'engineer', 'jose', 'senior']
+    # Canonical skill names are indexed next to what the user wrote
+    assert {'js', 'javascript', 'node.js', 'python', 'c++', 'payments', 'apis'} <= set(tokens)
+    assert 'the' not in tokens and tokens == sorted(set(tokens))
+    assert search_fields(None, None, 'not a dict') == {'search_tokens': [], 'search_title_tokens': []}
+    print("SUCCESS: Search tokens derived from title, keywords, skills and summary")
+
+
+def test_query_filter_is_anchored():
+    terms = query_terms('Pyth the pyth JavaScript')
+    assert [term for term, _ in terms] == ['pyth', 'javascript']
+    clauses = search_filter(query_terms('c++ js'))['$and']
+    patterns = [[pattern.pattern for pattern in clause['search_tokens']['$in']] for clause in clauses]
+    assert patterns == [[r'^c\+\+'], ['^javascript', '^js']]
+    print("SUCCESS: Queries become anchored prefix patterns, one clause per term")
+
+
+def test_rank_by_relevance_then_recency():
+    def doc(doc_id, day, title, other=()):
+        title_tokens = search_fields(title)['search_title_tokens']
+        return {'_id': doc_id, 'updated_at': datetime(2024, 1, day),
+                'search_title_tokens': title_tokens, 'search_tokens': sorted(set(title_tokens) | set(other))}
+
+    docs = [
+        doc(1, 1, 'Data Scientist', ['python']),
+        doc(2, 2, 'Python Developer'),
+        doc(3, 3, 'Pythonista'),
+        doc(4, 4, 'Analyst', ['python']),
+    ]
+    # Exact title match, prefix in title, then the other-field matches newest first
+    assert [d['_id'] for d in rank(docs, query_terms('python'))] == [2, 3, 4, 1]
+    print("SUCCESS: Hits ordered by where the terms matched, then by recency")
+
+
+if __name__ == '__main__':
+    print("Testing resume search...")
+    test_search_fields_normalized()
+    test_query_filter_is_anchored()
+    test_rank_by_relevance_then_recency()
+    print("\nSUCCESS: All resume search tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test single-flight coalescing of identical concurrent calls"""
+
+import threading
+import time
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test')
+    calls = []
+    results = []
+
+    def slow_analysis(value):
+        calls.append(value)
+        time.sleep(0.2)
+        return {'atsScore': value}
+
+    def worker():
+        results.append(flight.do('same-key', slow_analysis, 42))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [42]
+    assert results == [{'atsScore': 42}] * 5
+    assert flight.stats()['deduplicated'] == 4
+    assert flight.stats()['in_flight'] == 0
+    print(f"SUCCESS: Coalesced calls: {flight.stats()}")
+
+
+def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight('test')
+
+    def failing_analysis():
+        raise ValueError('Empty response from Gemini API.')
+
+    try:
+        flight.do('key', failing_analysis)
+        assert False, 'Expected ValueError'
+    except ValueError:
+        pass
+    assert flight.stats()['in_flight'] == 0
+    print("SUCCESS: Errors propagate and the key is released")
+
+
+def test_bounded_table_bypasses_coalescing():
+    flight = SingleFlight('test', max_in_flight=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(2)
+        return 'first'
+
+    thread = threading.Thread(target=flight.do, args=('a', blocking))
+    thread.start()
+    started.wait(2)
+    assert flight.do('b', lambda: 'second') == 'second'
+    release.set()
+    thread.join()
+    assert flight.stats()['bypassed'] == 1
+    print("SUCCESS: Full table falls back to uncoalesced calls")
+
+
+if __name__ == '__main__':
+    test_concurrent_calls_share_one_execution()
+    test_errors_propagate_to_all_waiters()
+    test_bounded_table_bypasses_coalescing()
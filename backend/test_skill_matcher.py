@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Test the Aho-Corasick skill taxonomy matcher"""
+
+from skill_matcher import SkillMatcher, get_skill_matcher, skill_key
+
+
+def test_synonyms_map_to_canonical_names():
+    matcher = get_skill_matcher()
+    assert matcher.canonicalize('JS') == 'JavaScript'
+    assert matcher.canonicalize('k8s') == 'Kubernetes'
+    assert matcher.canonicalize('ci cd') == 'CI/CD'
+    assert matcher.canonicalize('not a skill') is None
+    assert skill_key('ReactJS') == skill_key('React')
+    print("SUCCESS: Synonyms canonicalize")
+
+
+def test_offsets_and_whole_words():
+    matcher = get_skill_matcher()
+    text = 'Shipped JavaScript and React Native apps on K8s; CI/CD with Jenkins.'
+    matches = matcher.find_skills(text)
+    assert [m.canonical for m in matches] == ['JavaScript', 'React Native', 'Kubernetes', 'CI/CD', 'Jenkins']
+    for match in matches:
+        assert text[match.start:match.end] == match.surface
+    # 'Java' must not be found inside 'JavaScript'
+    assert 'Java' not in {m.canonical for m in matcher.find_all(text)}
+    print("SUCCESS: Offsets are exact and matches are whole words")
+
+
+def test_overlapping_patterns_share_one_pass():
+    matcher = SkillMatcher([
+        {'name': 'Machine Learning'},
+        {'name': 'Learning Management', 'aliases': ['lms']},
+        {'name': 'Learn'},
+    ])
+    found = [(m.start, m.canonical) for m in matcher.find_all('machine learning management')]
+    assert found == [(0, 'Machine Learning'), (8, 'Learning Management')]
+    print("SUCCESS: Overlapping patterns are all reported")
+
+
+if __name__ == '__main__':
+    test_synonyms_map_to_canonical_names()
+    test_offsets_and_whole_words()
+    test_overlapping_patterns_share_one_pass()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Test the single-pass resume text normalizer"""
+
+import random
+import re
+
+from text_normalizer import TextNormalizer, normalize_text
+
+
+def legacy_clean_resume_text(content):
+    """The previous three-regex clean_resume_text, kept for comparison"""
+    content = re.sub(r'[^\w\s\.,;:()\-@]', ' ', content)
+    content = re.sub(r'\s+', ' ', content)
+    content = re.sub(r'\n\s*\n', '\n', content)
+    return content.strip()
+
+
+def test_matches_legacy_output():
+    samples = [
+        'John Doe | john@example.com | +1 (555) 123-4567',
+        '• Built REST APIs in C++/C# — 40% faster\n\n\tLed CI/CD\r\nmigration',
+        'Résumé: café ☕ naïve 東京 ½ ²      end!',
+        '',
+        '   \n\n  ',
+    ]
+    rng = random.Random(7)
+    alphabet = 'abc XYZ 019_.,;:()-@#$%^&*+=/\\|"\'<>?!~`\n\r\t\x0b\x0c é•–’😀'
+    samples += [''.join(rng.choice(alphabet) for _ in range(200)) for _ in range(200)]
+
+    for sample in samples:
+        assert normalize_text(sample) == legacy_clean_resume_text(sample), repr(sample)
+    print(f"SUCCESS: Output identical to the legacy cleaner on {len(samples)} samples")
+
+
+def test_preserve_lines_keeps_sections():
+    text = 'EXPERIENCE\r\n  Senior Engineer • Acme   \n\n\n\nSKILLS\nPython, C++\x0cDocker'
+    assert normalize_text(text, preserve_lines=True) == (
+        'EXPERIENCE\nSenior Engineer Acme\n\nSKILLS\nPython, C\nDocker'
+    )
+    assert normalize_text(text) == 'EXPERIENCE Senior Engineer Acme SKILLS Python, C Docker'
+    print("SUCCESS: Line and section boundaries preserved on request")
+
+
+def test_custom_punctuation():
+    keep_symbols = TextNormalizer(kept_punctuation='.,;:()-@+#/')
+    assert keep_symbols.normalize('C++ / C# & CI/CD!') == 'C++ / C# CI/CD'
+    print("SUCCESS: Custom punctuation set")
+
+
+if __name__ == '__main__':
+    test_matches_legacy_output()
+    test_preserve_lines_keeps_sections()
+    test_custom_punctuation()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test spooled upload handling and path-based PDF extraction"""
+
+import hashlib
+import io
+import os
+
+from reportlab.pdfgen import canvas
+from werkzeug.test import EnvironBuilder
+
+from pdf_extraction import PDFExtractionPool
+from uploads import SpooledUploadRequest, open_pdf_upload, pdf_upload_from_stream
+
+
+def make_pdf(page_count):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for index in range(page_count):
+        pdf.drawString(72, 720, f'Page {index + 1}: ' + 'Python Flask MongoDB ' * 8)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def upload_request(pdf_bytes, spool_threshold):
+    builder = EnvironBuilder(method='POST', data={'resume': (io.BytesIO(pdf_bytes), 'resume.pdf')})
+    request = SpooledUploadRequest(builder.get_environ())
+    request.spool_threshold = spool_threshold
+    return request
+
+
+def test_small_upload_stays_in_memory():
+    pdf_bytes = make_pdf(1)
+    request = upload_request(pdf_bytes, spool_threshold=1024 * 1024)
+    upload = open_pdf_upload(request.files['resume'])
+    assert upload.source == pdf_bytes
+    assert upload.sha256 == hashlib.sha256(pdf_bytes).hexdigest()
+    request.close()
+    print("SUCCESS: Small upload kept in memory")
+
+
+def test_large_upload_spooled_and_extracted_by_path():
+    pdf_bytes = make_pdf(30)
+    request = upload_request(pdf_bytes, spool_threshold=1024)
+    pool = PDFExtractionPool(workers=1, max_pages=0)
+    try:
+        upload = open_pdf_upload(request.files['resume'])
+        assert isinstance(upload.source, str) and os.path.isfile(upload.source)
+        assert upload.size == len(pdf_bytes)
+        assert upload.sha256 == hashlib.sha256(pdf_bytes).hexdigest()
+        assert pool.extract_text(upload.source) == pool.extract_text(pdf_bytes)
+    finally:
+        pool.shutdown()
+        request.close()
+    assert not os.path.exists(upload.source)
+    print("SUCCESS: Large upload spooled to disk, hashed and extracted via mmap")
+
+
+def test_stream_copied_in_chunks_with_a_size_cap():
+    data = b'%PDF-' + os.urandom(4096)
+    upload, spool = pdf_upload_from_stream(io.BytesIO(data), max_bytes=10000, spool_threshold=8192)
+    assert spool is None and upload.source == data
+
+    upload, spool = pdf_upload_from_stream(io.BytesIO(data), max_bytes=10000, spool_threshold=1024)
+    with open(upload.source, 'rb') as spooled:
+        assert spooled.read() == data
+    assert upload.size == len(data) and upload.sha256 == hashlib.sha256(data).hexdigest()
+    spool.close()
+    assert not os.path.exists(upload.source)
+
+    for threshold in (1024, 8192):
+        try:
+            pdf_upload_from_stream(io.BytesIO(data), max_bytes=2048, spool_threshold=threshold)
+            assert False, 'Expected ValueError'
+        except ValueError:
+            pass
+    print("SUCCESS: Streams spooled past the threshold and cut off past the size cap")
+
+
+if __name__ == '__main__':
+    test_small_upload_stays_in_memory()
+    test_large_upload_spooled_and_extracted_by_path()
+    test_stream_copied_in_chunks_with_a_size_cap()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resume text normalizer
+Strips punctuation and collapses whitespace without regexes: ASCII is rewritten by one
+bytes.translate() through a precompiled 256-entry table, and the few non-ASCII runs are
+classified by a codec error handler whose per-character decisions are cached
+"""
+
+import codecs
+import string
+
+# Punctuation that survives normalization, besides word characters and whitespace
+KEPT_PUNCTUATION = '.,;:()-@'
+# Resume text also keeps the symbols inside tech names (C++, C#, CI/CD), which scoring tokenizes
+RESUME_KEPT_PUNCTUATION = KEPT_PUNCTUATION + '+#/'
+
+_ASCII_WORD_CHARS = string.ascii_letters + string.digits + '_'
+_ASCII_SPACE = ' \t\n\r\x0b\x0c'
+_ASCII_LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e'
+_UNICODE_LINE_BREAKS = '\x85\u2028\u2029'
+
+
+def _classify(char, line_breaks):
+    """UTF-8 replacement for one non-ASCII character (same rule as re's [\\w\\s.,;:()\\-@])"""
+    if line_breaks and char in _UNICODE_LINE_BREAKS:
+        return b'\n'
+    if char.isalnum() or char == '_':
+        try:
+            return char.encode('utf-8')
+        except UnicodeEncodeError:  # lone surrogate
+            return b' '
+    return b' '
+
+
+def _make_error_handler(line_breaks):
+    decisions = {}
+
+    def handler(error):
+        replacement = []
+        for char in error.object[error.start:error.end]:
+            value = decisions.get(char)
+            if value is None:
+                value = decisions[char] = _classify(char, line_breaks)
+            replacement.append(value)
+        return b''.join(replacement), error.end
+
+    return handler
+
+
+# ASCII encoding hands every run of non-ASCII characters to these handlers
+codecs.register_error('resume_normalize', _make_error_handler(line_breaks=False))
+codecs.register_error('resume_normalize_lines', _make_error_handler(line_breaks=True))
+
+
+def _ascii_table(kept_punctuation, line_breaks):
+    """bytes.translate table: junk ASCII becomes a space; bytes >= 0x80 pass through untouched"""
+    kept = set(_ASCII_WORD_CHARS + _ASCII_SPACE + kept_punctuation)
+    table = bytearray(range(256))
+    for byte in range(128):
+        char = chr(byte)
+        if line_breaks and char in _ASCII_LINE_BREAKS:
+            table[byte] = ord('\n')
+        elif char not in kept:
+            table[byte] = ord(' ')
+    return bytes(table)
+
+
+class TextNormalizer:
+    """Strip punctuation and collapse whitespace; optionally keep line and section breaks"""
+
+    def __init__(self, kept_punctuation=KEPT_PUNCTUATION):
+        if not kept_punctuation.isascii():
+            raise ValueError('kept_punctuation must be ASCII')
+        self._flat_table = _ascii_table(kept_punctuation, line_breaks=False)
+        self._lines_table = _ascii_table(kept_punctuation, line_breaks=True)
+
+    def normalize(self, text, preserve_lines=False):
+        """
+        Default: a single line with single spaces (the clean_resume_text format).
+        preserve_lines: one line per input line, blank-line runs kept as a single
+        empty line so section boundaries survive.
+        """
+        if not isinstance(text, str):
+            text = str(text)
+        if not preserve_lines:
+            data = text.encode('ascii', 'resume_normalize').translate(self._flat_table)
+            return b' '.join(data.split()).decode('utf-8')
+
+        if '\r\n' in text:
+            text = text.replace('\r\n', '\n')  # One break, not a blank line
+        data = text.encode('ascii', 'resume_normalize_lines').translate(self._lines_table)
+        lines = []
+        blank = False
+        for line in data.split(b'\n'):
+            words = line.split()
+            if words:
+                if blank and lines:
+                    lines.append(b'')
+                lines.append(b' '.join(words))
+                blank = False
+            else:
+                blank = True
+        return b'\n'.join(lines).decode('utf-8')
+
+
+_default_normalizer = TextNormalizer()
+normalize_text = _default_normalizer.normalize
+
+_resume_normalizer = TextNormalizer(RESUME_KEPT_PUNCTUATION)
+normalize_resume_text = _resume_normalizer.normalize
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Upload handling without extra copies
+Large multipart files are spooled straight to named temp files, hashed in fixed-size
+chunks and handed to the PDF workers by path (they mmap the file); small ones stay in memory
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from collections import namedtuple
+
+from flask import Request
+
+# Request body limits; oversized uploads are rejected before they are read. They also bound
+# what a batch zip may expand to: per entry, and in total
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', 10)) * 1024 * 1024
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv('MAX_BATCH_UPLOAD_MB', 200)) * 1024 * 1024
+
+UPLOAD_SPOOL_THRESHOLD_BYTES = int(os.getenv('UPLOAD_SPOOL_THRESHOLD_KB', 512)) * 1024
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR') or None
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# source: bytes for in-memory uploads, or the path of the spooled file
+PDFUpload = namedtuple('PDFUpload', ['source', 'size', 'sha256'])
+
+
+class SpooledUploadRequest(Request):
+    """Request class whose file parts go to a named temp file when the body is large"""
+
+    spool_threshold = UPLOAD_SPOOL_THRESHOLD_BYTES
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= self.spool_threshold:
+            return io.BytesIO()
+        # Deleted when werkzeug closes the request's files
+        return tempfile.NamedTemporaryFile('wb+', prefix='upload-', suffix='.part', dir=UPLOAD_SPOOL_DIR)
+
+
+def _hash_stream(stream):
+    """SHA-256 of a file through one reusable buffer; the upload is never held in memory"""
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK_BYTES)
+    view = memoryview(buffer)
+    stream.seek(0)
+    while True:
+        read = stream.readinto(buffer)
+        if not read:
+            break
+        digest.update(view[:read])
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def pdf_upload_from_bytes(data):
+    return PDFUpload(data, len(data), hashlib.sha256(data).hexdigest())
+
+
+def pdf_upload_from_stream(stream, max_bytes, spool_threshold=UPLOAD_SPOOL_THRESHOLD_BYTES):
+    """
+    (PDFUpload, spool file or None) from a readable stream such as a zip entry, copied in
+    chunks and hashed on the way. Small streams stay in memory; larger ones go to a named
+    temp file the caller closes (which deletes it). ValueError once more than max_bytes is read.
+    """
+    head = stream.read(min(spool_threshold, max_bytes) + 1)
+    if len(head) <= spool_threshold:
+        if len(head) > max_bytes:
+            raise ValueError(f'File larger than {max_bytes} bytes')
+        return pdf_upload_from_bytes(head), None
+
+    digest = hashlib.sha256(head)
+    size = len(head)
+    spool = tempfile.NamedTemporaryFile('wb+', prefix='upload-', suffix='.pdf', dir=UPLOAD_SPOOL_DIR)
+    try:
+        spool.write(head)
+        while True:
+            chunk = stream.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise ValueError(f'File larger than {max_bytes} bytes')
+            digest.update(chunk)
+            spool.write(chunk)
+        spool.flush()
+    except BaseException:
+        spool.close()
+        raise
+    return PDFUpload(spool.name, size, digest.hexdigest()), spool
+
+
+def open_pdf_upload(file_storage):
+    """Describe an uploaded file without reading it into a new buffer"""
+    stream = file_storage.stream
+    name = getattr(stream, 'name', None)
+
+    if isinstance(name, str) and os.path.isfile(name):
+        stream.flush()
+        return PDFUpload(name, os.fstat(stream.fileno()).st_size, _hash_stream(stream))
+
+    if isinstance(stream, io.BytesIO):
+        # getvalue() shares the buffer instead of copying it while nothing else holds a view
+        return pdf_upload_from_bytes(stream.getvalue())
+
+    return pdf_upload_from_bytes(file_storage.read())